@@ -1,11 +1,61 @@
 import os
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-import requests # Import for making external API calls
+from sqlalchemy.exc import IntegrityError
+import requests # RapidAPI client failures are raised as requests exceptions
 from flask_cors import CORS
 from datetime import datetime, timezone, timedelta
+from itertools import groupby, islice
 from dotenv import load_dotenv
+import hashlib
 import json
+import queue
+import time
+import click
+import functools
+
+from cache import SingleFlight, TTLCache
+from database import configure_engine, database_url, engine_options
+from earnings_archive import open_earnings_archive
+from fields import (
+    FIELD_REFRESH_LEASE,
+    GOLFER_FIELD_MAX_AGE,
+    claim_field_refresh,
+    field_is_fresh,
+    refresh_tournament_field,
+    release_field_refresh,
+)
+from ingest import RESULT_UNIQUE_INDEX, ingest_earnings_file, parse_leaderboard, upsert_tournament_results
+from jobs import JobScheduler, Reschedule, job
+from jsonstream import expand_paths
+from live import ScoreboardFeed, record_score_changes
+from metrics import RequestMetrics, counter, name_request, open_metrics_store
+from migrations import DuplicatePicksError, dedupe_picks, normalize_key, upgrade as upgrade_schema
+from models import Base, Golfer, Pick, Tournament, TournamentResult, User, UserScore, tournament_golfers
+from pagination import (
+    after,
+    before,
+    decode_cursor,
+    encode_cursor,
+    key_values,
+    order_by,
+    parse_fields,
+    parse_limit,
+)
+from planner import load_earnings_table, plan_picks
+from projection import ProjectionError, current_season, open_projection_store, project_standings
+from rapidapi import RapidAPIClient
+from schedule import DEFAULT_EVENTS, EventSelector, read_schedule_events, tournament_rows, upsert_tournaments
+from serialization import FastJSONProvider, iter_json_array
+from versions import DOMAINS, open_versions
+from scoring import (
+    find_score_mismatches,
+    rebuild_user_scores,
+    refresh_scores_for_tournament,
+    refresh_scores_for_users,
+    scoreboard_position,
+    user_scores_need_rebuild,
+)
 
 # --- Database Setup ---
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -13,52 +63,152 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv() # Load environment variables from .env file
 
 app = Flask(__name__)
-CORS(app)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'golf_app.db')
+app.json = FastJSONProvider(app) # orjson-backed jsonify when orjson is installed
+CORS(app, expose_headers=['X-Next-Cursor']) # Readable by the web client for paging
+app.config['SQLALCHEMY_DATABASE_URI'] = database_url()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-db = SQLAlchemy(app)
-
-# --- Association Table for Tournament Golfers ---
-tournament_golfers = db.Table('tournament_golfers',
-    db.Column('tournament_id', db.String, db.ForeignKey('tournament.id'), primary_key=True),
-    db.Column('golfer_id', db.String, db.ForeignKey('golfer.id'), primary_key=True)
-)
-
-# --- Database Models ---
-class User(db.Model):
-    id = db.Column(db.String, primary_key=True) # Firebase UID
-    displayName = db.Column(db.String)
-    email = db.Column(db.String)
-    picks = db.relationship('Pick', backref='user', lazy=True)
-
-class Golfer(db.Model):
-    id = db.Column(db.String, primary_key=True)
-    name = db.Column(db.String, nullable=False)
-    # The 'tournaments' backref is created automatically by the relationship in the Tournament model
-
-class Tournament(db.Model):
-    id = db.Column(db.String, primary_key=True)
-    name = db.Column(db.String, nullable=False)
-    year = db.Column(db.Integer, nullable=False)
-    submission_start = db.Column(db.DateTime, nullable=False)
-    submission_end = db.Column(db.DateTime, nullable=False)
-    golfers_last_updated = db.Column(db.DateTime, nullable=True) # For caching
-    
-    golfers = db.relationship('Golfer', secondary=tournament_golfers, lazy='subquery',
-        backref=db.backref('tournaments', lazy=True))
-
-class Pick(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.String, db.ForeignKey('user.id'), nullable=False)
-    golfer_id = db.Column(db.String, db.ForeignKey('golfer.id'), nullable=False)
-    tournament_id = db.Column(db.String, db.ForeignKey('tournament.id'), nullable=False)
-
-class TournamentResult(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    tournament_id = db.Column(db.String, db.ForeignKey('tournament.id'), nullable=False)
-    golfer_id = db.Column(db.String, db.ForeignKey('golfer.id'), nullable=False)
-    earnings = db.Column(db.Integer)
+db = SQLAlchemy(app, model_class=Base) # The models live in models.py, free of Flask
+
+# SQLite pragmas (WAL, busy timeout, ...) or pool settings; see database.py
+with app.app_context():
+    configure_engine(db.engine)
+
+# Shared client for the external golf API: pooled, with timeouts and an on-disk response cache
+rapidapi = RapidAPIClient.from_env()
+
+# Per-domain change counters shared by every worker; they drive the ETags below
+data_versions = open_versions()
+
+# Golfer earnings as memory-mapped running totals, refreshed by every results
+# write before it bumps 'results'; serves the golfer statistics endpoints
+earnings_archive = open_earnings_archive()
+
+# --- Metrics ---
+# Every request is timed and its SQL counted (see metrics.py); /metrics serves
+# the totals of all workers in the Prometheus text format. It is not proxied by
+# nginx, so scrape the backend directly.
+app.wsgi_app = RequestMetrics(app.wsgi_app)
+metrics_store = open_metrics_store()
+
+@app.before_request
+def _name_request_metrics():
+    name_request(request.environ, request.url_rule.rule if request.url_rule else 'unmatched')
+
+@app.route('/metrics')
+def get_metrics():
+    return Response(metrics_store.render(), mimetype='text/plain; version=0.0.4')
+
+# --- Conditional Caching ---
+# Read endpoints carry an ETag and Last-Modified derived from the version
+# counters of the data they show, and answer a matching If-None-Match with a 304
+# before running the view. If-Modified-Since is not honoured: dates have 1 s
+# precision, so two writes in the same second would leave a stale copy looking
+# current. Cache-Control lets the nginx proxy cache responses briefly and then
+# revalidate them here.
+API_CACHE_CONTROL = os.getenv('API_CACHE_CONTROL', 'public, max-age=5, stale-while-revalidate=30')
+
+def _etag_matches(etag):
+    return bool(request.if_none_match) and request.if_none_match.contains_weak(etag)
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = API_CACHE_CONTROL
+    return response
+
+def conditional(*domains, shortcut=None):
+    """Makes a GET view conditional on the version counters of `domains`.
+
+    The validators are read before the view runs, so a write that lands while
+    it runs only makes the response look older than it is. If `shortcut` is
+    given, the 304 before the view is only served when `shortcut(**view_args)`
+    is true (e.g. when the view would not refresh anything); otherwise the view
+    runs and a 304 is sent only if it didn't change the data.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = data_versions.etag(domains)
+            if etag is None:
+                return view(*args, **kwargs)
+            last_modified = data_versions.last_modified(domains)
+            matched = _etag_matches(etag)
+            if matched and (shortcut is None or shortcut(**kwargs)):
+                return _set_validators(app.response_class(status=304), etag, last_modified)
+
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            # A view that refreshed the data itself has bumped the counters past the client's copy
+            if matched and data_versions.etag(domains) == etag:
+                response.close() # Releases a streamed body that will not be sent
+                response = app.response_class(status=304)
+            return _set_validators(response, etag, last_modified)
+        return wrapper
+    return decorator
+
+# --- Streamed Responses ---
+# Rows fetched from the cursor (and encoded) at a time by streamed list endpoints
+STREAM_BATCH_SIZE = 1000
+
+def _batches(rows, size=STREAM_BATCH_SIZE):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+def _json_stream(chunks):
+    """A chunked JSON response; the request context stays open while `chunks` is consumed."""
+    # The view's app context, and with it the scoped session, is torn down before
+    # the body is sent, so queries the stream reads reopen that session. Close it
+    # again once the stream ends or else it keeps a pooled connection until GC.
+    session = db.session()
+
+    def body():
+        try:
+            yield from chunks
+        finally:
+            session.close()
+    return app.response_class(stream_with_context(body()), mimetype='application/json')
+
+def _stream_rows(query, to_dict):
+    """Streams `query` as a JSON array, reading and encoding STREAM_BATCH_SIZE rows at a time."""
+    rows = iter(query.yield_per(STREAM_BATCH_SIZE)) # Executed by the first read, while streaming
+    batches = ([to_dict(r) for r in batch] for batch in _batches(rows))
+    return _json_stream(iter_json_array(batches, app.json.dumps_bytes))
+
+# --- Pagination ---
+# List endpoints take ?limit=&cursor=&fields= (see pagination.py). Without a
+# limit the whole list is streamed as before.
+def _page_response(rows, limit, keys, to_dict):
+    """One page of `rows` (fetched with limit + 1) with X-Next-Cursor set if more follow."""
+    response = jsonify([to_dict(r) for r in rows[:limit]])
+    if len(rows) > limit:
+        response.headers['X-Next-Cursor'] = encode_cursor(key_values(rows[limit - 1], keys))
+    return response
+
+def _keyset_list(query, keys, fields, default_fields):
+    """Serves `query` in `keys` order as a JSON array, paged and projected per the request.
+
+    `keys` is a list of (column, descending) pairs ending in a unique column and
+    `fields` maps every selectable field name to a function of the row.
+    """
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        selected = parse_fields(request.args.get('fields'), fields, default_fields)
+        cursor = request.args.get('cursor')
+        if cursor:
+            query = query.filter(after(keys, decode_cursor(cursor, keys)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = query.order_by(*order_by(keys))
+    to_dict = lambda r: {field: fields[field](r) for field in selected}
+    if limit is None:
+        return _stream_rows(query, to_dict)
+    return _page_response(query.limit(limit + 1).all(), limit, keys, to_dict)
 
 # --- API Endpoints ---
 @app.route('/')
@@ -72,18 +222,18 @@ def add_user():
     if not data or not data.get('id') or not data.get('displayName') or not data.get('email'):
         return jsonify({"error": "Missing user ID, display name, or email"}), 400
     
-    # Check for uniqueness of display name (case-insensitive)
-    existing_user_by_name = User.query.filter(User.displayName.ilike(data['displayName'])).first()
+    # Check for uniqueness of display name (case-insensitive, via the normalized index)
+    existing_user_by_name = User.query.filter(User.display_name_normalized == normalize_key(data['displayName'])).first()
     if existing_user_by_name:
         return jsonify({"error": "Display name is already taken"}), 409 # 409 Conflict
 
-    # Check for uniqueness of email (case-insensitive)
-    existing_user_by_email = User.query.filter(User.email.ilike(data['email'])).first()
+    # Check for uniqueness of email (case-insensitive, via the normalized index)
+    existing_user_by_email = User.query.filter(User.email_normalized == normalize_key(data['email'])).first()
     if existing_user_by_email:
         return jsonify({"error": "This email is already registered"}), 409 # 409 Conflict
 
     # Check if user already exists by ID (Firebase UID)
-    user = User.query.get(data['id'])
+    user = db.session.get(User, data['id'])
     if user:
         # If user exists, but perhaps display name or email changed in Firebase, update them
         if user.displayName != data['displayName']:
@@ -91,11 +241,19 @@ def add_user():
         if user.email != data['email']:
             user.email = data['email']
         db.session.commit()
+        data_versions.bump('users')
         return jsonify({"message": "User already exists and updated", "user": {"id": user.id, "displayName": user.displayName, "email": user.email}}), 200 # User already registered
     
     new_user = User(id=data['id'], displayName=data['displayName'], email=data['email'])
     db.session.add(new_user)
-    db.session.commit()
+    db.session.add(UserScore(user_id=new_user.id, total_score=0))
+    try:
+        db.session.commit()
+        data_versions.bump('users')
+    except IntegrityError:
+        # A concurrent registration claimed the name or email between the checks and the insert
+        db.session.rollback()
+        return jsonify({"error": "Display name or email is already taken"}), 409
     return jsonify({"message": "User added successfully", "user": {"id": new_user.id, "displayName": new_user.displayName, "email": new_user.email}}), 201
 
 # --- Golfer Endpoints ---
@@ -105,19 +263,77 @@ def add_golfer():
     if not data or not 'id' in data or not 'name' in data:
         return jsonify({"error": "Missing golfer ID or name"}), 400
     
-    golfer = Golfer.query.get(data['id'])
+    golfer = db.session.get(Golfer, data['id'])
     if golfer:
         return jsonify({"error": "Golfer with this ID already exists"}), 409
 
     new_golfer = Golfer(id=data['id'], name=data['name'])
     db.session.add(new_golfer)
     db.session.commit()
+    data_versions.bump('fields')
     return jsonify({"message": "Golfer added successfully", "golfer": {"id": new_golfer.id, "name": new_golfer.name}}), 201
 
+GOLFER_KEYS = [(Golfer.name, False), (Golfer.id, False)]
+GOLFER_FIELDS = {
+    "id": lambda g: g.id,
+    "name": lambda g: g.name,
+}
+
 @app.route('/golfers', methods=['GET'])
+@conditional('fields')
 def get_golfers():
-    golfers = Golfer.query.all()
-    return jsonify([{"id": g.id, "name": g.name} for g in golfers])
+    golfers = db.session.query(Golfer.id, Golfer.name)
+    return _keyset_list(golfers, GOLFER_KEYS, GOLFER_FIELDS, ("id", "name"))
+
+# --- Golfer Statistics ---
+# Season, form and career earnings, starts and made cuts per golfer, read off
+# the earnings archive (see earnings_archive.py) in constant time per golfer.
+# ?season= picks the season; the default is the latest one with results.
+def _archive_generation():
+    generation = earnings_archive.current()
+    if generation is None and earnings_archive.refresh(db.session): # First use: build it from the database
+        generation = earnings_archive.current()
+    return generation
+
+def _golfer_stats(golfer_ids):
+    """`(stats, None)` for `golfer_ids`, or `(None, error_response)`."""
+    season = request.args.get('season')
+    if season:
+        try:
+            season = int(season)
+        except ValueError:
+            return None, (jsonify({"error": "season must be a year"}), 400)
+    generation = _archive_generation()
+    if generation is None:
+        return None, (jsonify({"error": "Golfer statistics are unavailable"}), 503)
+    return generation.stats(golfer_ids, season or None), None
+
+@app.route('/api/golfers/<string:golfer_id>/stats', methods=['GET'])
+@conditional('results')
+def get_golfer_stats(golfer_id):
+    golfer = db.session.get(Golfer, golfer_id)
+    if not golfer:
+        return jsonify({"error": "Golfer not found"}), 404
+    stats, error = _golfer_stats([golfer_id])
+    if error:
+        return error
+    return jsonify({"name": golfer.name, **stats[0]})
+
+@app.route('/api/tournaments/<string:tournament_id>/golfer-stats', methods=['GET'])
+@conditional('results', 'fields')
+def get_field_stats(tournament_id):
+    """Statistics for every golfer in the stored field, by name, for the pick screen in one call."""
+    if not db.session.get(Tournament, tournament_id):
+        return jsonify({"error": "Tournament not found"}), 404
+    field = db.session.query(Golfer.id, Golfer.name)\
+        .join(tournament_golfers, tournament_golfers.c.golfer_id == Golfer.id)\
+        .filter(tournament_golfers.c.tournament_id == tournament_id)\
+        .order_by(Golfer.name, Golfer.id)\
+        .all()
+    stats, error = _golfer_stats([golfer_id for golfer_id, _ in field])
+    if error:
+        return error
+    return jsonify([{"name": name, **row} for (_, name), row in zip(field, stats)])
 
 # --- Tournament Endpoints ---
 @app.route('/api/tournaments', methods=['POST'])
@@ -127,7 +343,7 @@ def add_tournament():
     if not data or not all(field in data for field in required_fields):
         return jsonify({"error": "Missing required tournament fields"}), 400
 
-    tournament = Tournament.query.get(data['id'])
+    tournament = db.session.get(Tournament, data['id'])
     if tournament:
         return jsonify({"error": "Tournament with this ID already exists"}), 409
 
@@ -139,19 +355,47 @@ def add_tournament():
 
     new_tournament = Tournament(
         id=data['id'], 
+        tourn_id=data.get('tourn_id') or data['id'], # The RapidAPI tournId, if it differs from the ID
         name=data['name'], 
         year=data['year'],
         submission_start=start_date,
         submission_end=end_date
     )
     db.session.add(new_tournament)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Each tournId appears once per season
+        db.session.rollback()
+        return jsonify({"error": "A tournament with this tourn_id already exists for that year"}), 409
+    data_versions.bump('tournaments')
     return jsonify({"message": "Tournament added successfully"}), 201
 
+# Chronological by deadline
+TOURNAMENT_KEYS = [(Tournament.submission_end, False), (Tournament.id, False)]
+TOURNAMENT_FIELDS = {
+    "id": lambda t: t.id,
+    "name": lambda t: t.name,
+    "year": lambda t: t.year,
+    "submission_start": lambda t: t.submission_start.isoformat(),
+    "submission_end": lambda t: t.submission_end.isoformat(),
+    "purse": lambda t: t.purse,
+    "winners_share": lambda t: t.winners_share,
+}
+
 @app.route('/api/tournaments', methods=['GET'])
+@conditional('tournaments')
 def get_tournaments():
-    tournaments = Tournament.query.all()
-    return jsonify([{"id": t.id, "name": t.name, "year": t.year} for t in tournaments])
+    tournaments = db.session.query(
+        Tournament.id,
+        Tournament.name,
+        Tournament.year,
+        Tournament.submission_start,
+        Tournament.submission_end,
+        Tournament.purse,
+        Tournament.winners_share
+    )
+    return _keyset_list(tournaments, TOURNAMENT_KEYS, TOURNAMENT_FIELDS, ("id", "name", "year"))
 
 @app.route('/api/available-tournaments', methods=['GET'])
 def get_available_tournaments():
@@ -169,136 +413,83 @@ def get_available_tournaments():
         "submission_end": t.submission_end.isoformat()
     } for t in available_tournaments])
 
-@app.route('/api/load-tournaments', methods=['POST'])
-def load_tournaments_from_file():
-    try:
-        with open(os.path.join(basedir, 'schedule_2026.txt'), 'r') as f:
-            schedule_data = json.load(f)
-    except FileNotFoundError:
-        return jsonify({"error": "schedule_2026.txt not found"}), 404
-    except json.JSONDecodeError:
-        return jsonify({"error": "Failed to decode JSON from schedule_2026.txt"}), 500
-
-    tournaments_to_load = [
-        "THE PLAYERS Championship",
-        "Masters Tournament",
-        "PGA Championship",
-        "U.S. Open",
-        "The Open Championship"
-    ]
-    
-    loaded_count = 0
-    for tourn in schedule_data.get('schedule', []):
-        # Normalize names for comparison
-        tourn_name = tourn.get('name', '')
-        
-        # Special handling for Masters, which doesn't have "The" in its name in some APIs
-        if "Masters Tournament" in tournaments_to_load and "Masters Tournament" in tourn_name:
-            tourn_name_to_check = "Masters Tournament"
-        else:
-            tourn_name_to_check = tourn_name
+# --- File Loading ---
+# Payload files are resolved relative to DATA_DIR (the backend directory by
+# default) and may be given as a single file, a glob or a directory.
+DATA_DIR = os.getenv('DATA_DIR', basedir)
+# Which schedule events become tournaments; see schedule.EventSelector
+SCHEDULE_EVENTS = os.getenv('SCHEDULE_EVENTS', DEFAULT_EVENTS)
 
-        if any(t.lower() in tourn_name_to_check.lower() for t in tournaments_to_load):
-            tourn_id = tourn.get('tournId')
-            if not tourn_id:
-                continue
+def _request_option(name):
+    """An option from the JSON body, falling back to the query string."""
+    return (request.get_json(silent=True) or {}).get(name) or request.args.get(name)
 
-            # Check if tournament already exists
-            if Tournament.query.get(tourn_id):
-                continue
+def _requested_paths(default):
+    """The `path` from the JSON body or query string (else `default`), expanded to files."""
+    spec = _request_option('path') or default
+    return spec, expand_paths(spec, DATA_DIR)
 
-            try:
-                # Calculate submission window
-                start_timestamp_ms = tourn['date']['start']['$date']['$numberLong']
-                tourn_start_date = datetime.fromtimestamp(int(start_timestamp_ms) / 1000, tz=timezone.utc)
-                
-                # Sunday before the tournament starts (weekday() is 0 for Monday, 6 for Sunday)
-                submission_start = tourn_start_date - timedelta(days=(tourn_start_date.weekday() + 1) % 7)
-                
-                # Wednesday 11:59:59 PM before the tournament
-                # Find the Thursday of the tournament week
-                thursday_of_week = tourn_start_date + timedelta(days=(3 - tourn_start_date.weekday() + 7) % 7)
-                # Wednesday is the day before Thursday
-                wednesday_of_week = thursday_of_week - timedelta(days=1)
-                submission_end = wednesday_of_week.replace(hour=23, minute=59, second=59)
-
-                new_tournament = Tournament(
-                    id=tourn_id,
-                    name=tourn_name,
-                    year=int(schedule_data.get('year')),
-                    submission_start=submission_start,
-                    submission_end=submission_end
-                )
-                db.session.add(new_tournament);
-                loaded_count += 1
-            except (KeyError, TypeError) as e:
-                print(f"Skipping tournament due to missing data: {tourn_name}, Error: {e}")
-                continue
+@app.route('/api/load-tournaments', methods=['POST'])
+def load_tournaments_from_file():
+    try:
+        select_event = EventSelector(_request_option('events') or SCHEDULE_EVENTS)
+        spec, paths = _requested_paths('schedule_2026.txt')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not paths:
+        return jsonify({"error": f"{spec} not found"}), 404
+
+    rows = []
+    schedule_files = 0
+    for path in paths:
+        try:
+            year, events = read_schedule_events(path, select_event)
+        except json.JSONDecodeError:
+            return jsonify({"error": f"Failed to decode JSON from {os.path.basename(path)}"}), 500
+        except ValueError as e:
+            if len(paths) == 1:
+                return jsonify({"error": str(e)}), 400
+            app.logger.warning("Skipping %s: %s", os.path.basename(path), e) # Not a schedule payload
+            continue
+        rows.extend(tournament_rows(year, events))
+        schedule_files += 1
+    if not schedule_files:
+        return jsonify({"error": f"No schedule files found in {spec}"}), 400
 
+    # Every selected event from every file is written in one transaction
+    loaded_count, updated_count = upsert_tournaments(db.session, rows)
     db.session.commit()
-    return jsonify({"message": f"Successfully loaded {loaded_count} new tournaments."}), 200
+    data_versions.bump('tournaments')
+
+    message = f"Successfully loaded {loaded_count} new tournaments."
+    if updated_count:
+        message += f" Updated {updated_count} existing tournaments."
+    return jsonify({"message": message}), 200
 
 @app.route('/api/tournaments/<string:tournament_id>/update-earnings', methods=['POST'])
 def update_earnings_for_tournament(tournament_id):
-    rapidapi_key = os.getenv('RAPIDAPI_KEY')
-    rapidapi_host = os.getenv('RAPIDAPI_HOST')
-
-    if not rapidapi_key or not rapidapi_host:
+    if not rapidapi.configured:
         return jsonify({"error": "RapidAPI key or host not configured in environment variables"}), 500
 
-    tournament = Tournament.query.get(tournament_id)
+    tournament = db.session.get(Tournament, tournament_id)
     if not tournament:
         return jsonify({"error": "Tournament not found in local database"}), 404
-    
-    year = str(tournament.year)
-    
-    url = f"https://{rapidapi_host}/earnings"
-    headers = {
-        "x-rapidapi-key": rapidapi_key,
-        "x-rapidapi-host": rapidapi_host
-    }
-    params = {
-        "tournId": tournament_id,
-        "year": year
-    }
+
+    # ?refresh=1 skips the response cache and always asks the API
+    use_cache = request.args.get('refresh') not in ('1', 'true')
 
     try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = rapidapi.earnings(tournament.tourn_id, tournament.year, use_cache=use_cache)
 
         if 'leaderboard' not in data:
             return jsonify({"error": "No leaderboard/earnings found for this tournament from external API"}), 404
 
-        updated_count = 0
-        for player_result in data['leaderboard']:
-            golfer_id = player_result.get('playerId')
-            # The earnings are nested, so we need to be careful
-            earnings_data = player_result.get('earnings', {})
-            earnings = earnings_data.get('$numberInt')
-
-            if not golfer_id or earnings is None:
-                continue
-
-            # Use 'upsert' logic: update if exists, insert if not
-            existing_result = TournamentResult.query.filter_by(
-                tournament_id=tournament_id,
-                golfer_id=golfer_id
-            ).first()
-
-            if existing_result:
-                existing_result.earnings = int(earnings)
-            else:
-                new_result = TournamentResult(
-                    tournament_id=tournament_id,
-                    golfer_id=golfer_id,
-                    earnings=int(earnings)
-                )
-                db.session.add(new_result)
-            
-            updated_count += 1
-        
+        updated_count = upsert_tournament_results(db.session, tournament_id, data['leaderboard'])
+        changes = refresh_scores_for_tournament(db.session, tournament_id)
+        record_score_changes(db.session, tournament_id, changes)
         db.session.commit()
+        earnings_archive.refresh(db.session, [tournament_id])
+        data_versions.bump('results')
         return jsonify({"message": f"Successfully updated earnings for {updated_count} golfers."}), 200
 
     except requests.exceptions.RequestException as e:
@@ -311,129 +502,280 @@ def update_earnings_for_tournament(tournament_id):
 @app.route('/api/load-earnings', methods=['POST'])
 def load_earnings_from_file():
     try:
-        with open(os.path.join(basedir, 'genesis_invitational_2025_earnings.txt'), 'r') as f:
-            earnings_data = json.load(f)
-    except FileNotFoundError:
-        return jsonify({"error": "genesis_invitational_2025_earnings.txt not found"}), 404
-    except json.JSONDecodeError:
-        return jsonify({"error": "Failed to decode JSON from genesis_invitational_2025_earnings.txt"}), 500
-
-    tourn_id = earnings_data.get('tournId')
-    if not tourn_id:
-        return jsonify({"error": "Tournament ID not found in earnings file"}), 400
-
-    updated_count = 0
-    for player_result in earnings_data.get('leaderboard', []):
-        golfer_id = player_result.get('playerId')
-        earnings = player_result.get('earnings', {}).get('$numberInt')
-
-        if not golfer_id or earnings is None:
-            continue
+        spec, paths = _requested_paths('genesis_invitational_2025_earnings.txt')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not paths:
+        return jsonify({"error": f"{spec} not found"}), 404
 
-        # Use 'upsert' logic: update if exists, insert if not
-        existing_result = TournamentResult.query.filter_by(
-            tournament_id=tourn_id,
-            golfer_id=golfer_id
-        ).first()
-
-        if existing_result:
-            existing_result.earnings = int(earnings)
-        else:
-            new_result = TournamentResult(
-                tournament_id=tourn_id,
-                golfer_id=golfer_id,
-                earnings=int(earnings)
-            )
-            db.session.add(new_result)
-        
-        updated_count += 1
-    
-    db.session.commit()
-    return jsonify({"message": f"Successfully loaded/updated earnings for {updated_count} golfers for tournament {tourn_id}."}), 200
+    loaded = []
+    try:
+        for path in paths:
+            try:
+                loaded.append(ingest_earnings_file(db.session, path))
+            except json.JSONDecodeError:
+                db.session.rollback()
+                return jsonify({"error": f"Failed to decode JSON from {os.path.basename(path)}"}), 500
+            except ValueError as e:
+                db.session.rollback()
+                if len(paths) == 1:
+                    return jsonify({"error": str(e)}), 400
+                app.logger.warning("Skipping %s: %s", os.path.basename(path), e) # Not an earnings payload
+    finally:
+        # Each file commits on its own, so the ones loaded before a failure stay loaded
+        if loaded:
+            earnings_archive.refresh(db.session, [tournament_id for tournament_id, _ in loaded])
+            data_versions.bump('results')
+    if not loaded:
+        return jsonify({"error": f"No earnings files found in {spec}"}), 400
+
+    if len(loaded) == 1:
+        tournament_id, updated_count = loaded[0]
+        return jsonify({"message": f"Successfully loaded/updated earnings for {updated_count} golfers for tournament {tournament_id}."}), 200
+    updated_count = sum(count for _, count in loaded)
+    tournament_ids = ', '.join(tournament_id for tournament_id, _ in loaded)
+    return jsonify({"message": f"Successfully loaded/updated earnings for {updated_count} golfers across {len(loaded)} files (tournaments {tournament_ids})."}), 200
+
+# --- Tournament Field Caching ---
+# A field is refreshed from RapidAPI at most once a day (see fields.py).
+# Serialized responses are also kept in a per-process TTL+LRU cache so hits skip
+# the ORM and JSON encoding entirely.
+golfer_field_cache = TTLCache(
+    maxsize=int(os.getenv('GOLFER_FIELD_CACHE_SIZE', 256)),
+    ttl=int(os.getenv('GOLFER_FIELD_CACHE_TTL', 300))
+)
+# Coalesces concurrent refreshes of the same field within this process. Across
+# processes, a lease on the tournament row picks a single refresher.
+golfer_field_refresh = SingleFlight()
+# memory: this process's cache; database: a fresh field read from the database;
+# stale: an old field served while another request refreshes it; refresh: RapidAPI
+field_lookups = counter('golf_field_lookups_total', "Tournament field lookups by where they were served from", ['source'])
+FIELD_REFRESH_POLL_SECONDS = 0.25
+
+def _json_body(payload):
+    return app.json.dumps_bytes(payload)
+
+def _json_response(status, body):
+    return app.response_class(body, status=status, mimetype='application/json')
+
+def _field_body(tournament):
+    rows = db.session.query(Golfer.id, Golfer.name)\
+        .join(tournament_golfers, tournament_golfers.c.golfer_id == Golfer.id)\
+        .filter(tournament_golfers.c.tournament_id == tournament.id)\
+        .order_by(Golfer.name, Golfer.id)\
+        .all()
+    return _json_body([{"id": golfer_id, "name": name} for golfer_id, name in rows])
+
+def _cache_field(tournament_id, body, last_updated):
+    # Never keep a cached field past the point where it would need a refresh
+    remaining = (last_updated + GOLFER_FIELD_MAX_AGE - datetime.utcnow()).total_seconds()
+    golfer_field_cache.set(tournament_id, body, ttl=min(golfer_field_cache.ttl, remaining))
+
+def _wait_for_field_refresh(tournament_id):
+    """Waits for another worker's refresh of a field that has never been loaded."""
+    deadline = datetime.utcnow() + FIELD_REFRESH_LEASE
+    while True:
+        time.sleep(FIELD_REFRESH_POLL_SECONDS)
+        db.session.rollback() # Make sure each poll sees the latest committed state
+        tournament = db.session.get(Tournament, tournament_id)
+        if tournament.golfers_last_updated is not None:
+            body = _field_body(tournament)
+            _cache_field(tournament_id, body, tournament.golfers_last_updated)
+            return 200, body
+        lease_until = tournament.golfers_refresh_lease_until
+        if lease_until is None or lease_until < datetime.utcnow():
+            # The other worker's refresh failed, or it died holding the lease; try it ourselves
+            return _refresh_or_wait(tournament_id, None)
+        if datetime.utcnow() >= deadline: # Renewed by someone else since we started waiting
+            return 503, _json_body({"error": "Timed out waiting for the tournament field to load"})
+
+def _refresh_or_wait(tournament_id, stale_body):
+    if claim_field_refresh(db.session, tournament_id):
+        try:
+            status, body = _refresh_tournament_field(tournament_id)
+        finally:
+            release_field_refresh(db.session, tournament_id)
+        if status == 200 or stale_body is None:
+            return status, body
+        return 200, stale_body # The refresh failed, but the old field is still usable
+    if stale_body is not None:
+        return 200, stale_body # Another worker is refreshing; serve what we have
+    return _wait_for_field_refresh(tournament_id)
 
 @app.route('/api/tournaments/<string:tournament_id>/golfers', methods=['GET'])
+# Only skip the view while the field is cached, so stale fields still get refreshed.
+# Picks are included for the per-user `available` flag.
+@conditional('tournaments', 'fields', 'picks', shortcut=lambda tournament_id: golfer_field_cache.get(tournament_id) is not None)
 def get_golfers_for_tournament(tournament_id):
+    status, body = _tournament_field(tournament_id)
+    user_id = request.args.get('user_id')
+    if user_id and status == 200:
+        body = _with_availability(body, used_golfers(user_id, tournament_season(tournament_id)), tournament_id)
+    return _json_response(status, body)
+
+def _tournament_field(tournament_id):
+    """The encoded field for a tournament as `(status, body)`, refreshing it when stale."""
     # --- Caching Logic ---
-    tournament = Tournament.query.get(tournament_id)
+    body = golfer_field_cache.get(tournament_id)
+    if body is not None:
+        field_lookups.inc('memory')
+        return 200, body
+
+    tournament = db.session.get(Tournament, tournament_id)
     if not tournament:
-        return jsonify({"error": "Tournament not found in local database"}), 404
+        return 404, _json_body({"error": "Tournament not found in local database"})
 
     # Check if the golfer list was updated in the last 24 hours
-    if tournament.golfers_last_updated and (datetime.utcnow() - tournament.golfers_last_updated) < timedelta(days=1):
-        print(f"--- Cache HIT for tournament ID: {tournament_id} ---")
-        golfers_data = [{"id": g.id, "name": g.name} for g in tournament.golfers]
-        return jsonify(golfers_data)
+    if field_is_fresh(tournament):
+        field_lookups.inc('database')
+        body = _field_body(tournament)
+        _cache_field(tournament_id, body, tournament.golfers_last_updated)
+        return 200, body
+
+    stale_body = _field_body(tournament) if tournament.golfers_last_updated else None
+    if stale_body is not None and golfer_field_refresh.in_flight(tournament_id):
+        field_lookups.inc('stale')
+        return 200, stale_body
+
+    field_lookups.inc('refresh')
+    return golfer_field_refresh.do(tournament_id, lambda: _refresh_or_wait(tournament_id, stale_body))
+
+def _with_availability(body, used, tournament_id):
+    # The shared field body stays cached as-is; the flag is merged per request
+    golfers = app.json.loads(body)
+    for golfer in golfers:
+        golfer['available'] = _is_available(used.get(golfer['id']), tournament_id)
+    return _json_body(golfers)
+
+def _refresh_tournament_field(tournament_id):
+    """Fetches a tournament's field from RapidAPI and stores it. Returns (status, body)."""
+    tournament = db.session.get(Tournament, tournament_id)
 
-    print(f"--- Cache MISS for tournament ID: {tournament_id} ---")
-    
     # --- API Fetching Logic (if cache miss) ---
-    rapidapi_key = os.getenv('RAPIDAPI_KEY')
-    rapidapi_host = os.getenv('RAPIDAPI_HOST')
-
-    if not rapidapi_key or not rapidapi_host:
-        return jsonify({"error": "RapidAPI key or host not configured in environment variables"}), 500
-
-    year = str(tournament.year)
-    org_id = "1"
-
-    url = f"https://{rapidapi_host}/tournament"
-    headers = {
-        "x-rapidapi-key": rapidapi_key,
-        "x-rapidapi-host": rapidapi_host
-    }
-    params = {
-        "orgId": org_id,
-        "tournId": tournament_id,
-        "year": year
-    }
+    if not rapidapi.configured:
+        return 500, _json_body({"error": "RapidAPI key or host not configured in environment variables"})
 
     try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        if 'players' not in data:
-            return jsonify({"error": "No players found for this tournament from external API"}), 404
-
-        # Clear old golfer associations for this tournament
-        tournament.golfers.clear()
-        
-        golfers_data = []
-        for player in data['players']:
-            golfer_id = player['playerId']
-            full_name = f"{player.get('firstName', '')} {player.get('lastName', '')}".strip()
-
-            # 'Upsert' the golfer (add if not exists)
-            existing_golfer = Golfer.query.get(golfer_id)
-            if not existing_golfer:
-                new_golfer = Golfer(id=golfer_id, name=full_name)
-                db.session.add(new_golfer)
-                tournament.golfers.append(new_golfer)
-            else:
-                tournament.golfers.append(existing_golfer)
-
-            golfers_data.append({"id": golfer_id, "name": full_name})
-        
-        # Update the cache timestamp
-        tournament.golfers_last_updated = datetime.utcnow()
-        
-        db.session.commit()
-        
-        return jsonify(golfers_data)
+        if refresh_tournament_field(db.session, rapidapi, tournament) is None:
+            return 404, _json_body({"error": "No players found for this tournament from external API"})
+        data_versions.bump('fields')
+
+        body = _field_body(tournament)
+        _cache_field(tournament_id, body, tournament.golfers_last_updated)
+        return 200, body
 
     except requests.exceptions.RequestException as e:
         db.session.rollback()
         print(f"Error fetching golfers from external API: {e}")
-        return jsonify({"error": f"Failed to fetch golfers from external API: {str(e)}"}), 500
+        return 500, _json_body({"error": f"Failed to fetch golfers from external API: {str(e)}"})
     except Exception as e:
         db.session.rollback()
         print(f"An unexpected error occurred: {e}")
-        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+        return 500, _json_body({"error": f"An unexpected error occurred: {str(e)}"})
+
+# --- Used Golfers ---
+# Each user's already used golfers in a season, {golfer_id: row(golfer_id,
+# tournament_id, golfer_name)}, kept per worker by (user_id, season). An entry is tagged with the 'picks' version it
+# was loaded at and reloaded once any pick is written, by any worker. Without
+# shared versions there is nothing to validate against, so nothing is cached.
+used_golfers_cache = TTLCache(
+    maxsize=int(os.getenv('USED_GOLFERS_CACHE_SIZE', 4096)),
+    ttl=int(os.getenv('USED_GOLFERS_CACHE_TTL', 300))
+)
+used_golfers_lookups = counter('golf_used_golfers_cache_total', "Used-golfer lookups by cache result", ['result'])
+# A tournament's year never changes, and the season in play only moves with the
+# 'results' and 'tournaments' versions, so both are kept per worker too
+tournament_seasons = TTLCache(maxsize=1024, ttl=int(os.getenv('USED_GOLFERS_CACHE_TTL', 300)))
+season_in_play_cache = TTLCache(maxsize=2, ttl=int(os.getenv('USED_GOLFERS_CACHE_TTL', 300)))
+
+def tournament_season(tournament_id):
+    """The year of a tournament, or None if it doesn't exist."""
+    season = tournament_seasons.get(tournament_id)
+    if season is None:
+        tournament = db.session.get(Tournament, tournament_id)
+        if tournament is None:
+            return None
+        season = tournament.year
+        tournament_seasons.set(tournament_id, season)
+    return season
+
+def season_in_play():
+    """The season used-golfer lookups default to; see projection.current_season."""
+    etag = data_versions.etag(('results', 'tournaments'))
+    season = season_in_play_cache.get(etag) if etag is not None else None
+    if season is None:
+        season = current_season(db.session)
+        if etag is not None and season is not None:
+            season_in_play_cache.set(etag, season)
+    return season
+
+def _is_available(use, tournament_id):
+    """Whether a golfer can be picked for `tournament_id`, given the user's season pick of them (or None).
+
+    A golfer picked for the same tournament stays available, since resubmitting
+    the tournament's picks may keep them.
+    """
+    return use is None or use.tournament_id == tournament_id
+
+def _used_golfers_query(user_id, season):
+    return db.select(Pick.golfer_id, Pick.tournament_id, Golfer.name.label('golfer_name'))\
+        .outerjoin(Golfer, Golfer.id == Pick.golfer_id)\
+        .where(Pick.user_id == user_id, Pick.season == season)
+
+def used_golfers(user_id, season):
+    """The golfers `user_id` has picked in any of `season`'s tournaments, keyed by golfer id."""
+    version = data_versions.get('picks')[0] if data_versions.enabled else None
+    if version is not None:
+        cached = used_golfers_cache.get((user_id, season))
+        if cached is not None and cached[0] == version:
+            used_golfers_lookups.inc('hit')
+            return cached[1]
+    used_golfers_lookups.inc('miss')
+
+    # Read after the version, so a pick committed in between only costs a reload
+    used = {row.golfer_id: row for row in db.session.execute(_used_golfers_query(user_id, season))}
+    if version is not None:
+        used_golfers_cache.set((user_id, season), (version, used))
+    return used
+
+@app.route('/api/users/<string:user_id>/used-golfers', methods=['GET'])
+@conditional('picks', 'fields')
+def get_used_golfers(user_id):
+    """Every golfer the user has picked in a season, with the tournament they were picked for.
+
+    The season is ?tournament_id='s, ?season= or the season in play. With
+    ?tournament_id= each row also says whether the golfer is `available` for
+    that tournament, as in its field: only golfers picked for it are.
+    """
+    tournament_id = request.args.get('tournament_id')
+    if tournament_id:
+        season = tournament_season(tournament_id)
+        if season is None:
+            return jsonify({"error": "Tournament not found"}), 404
+    elif request.args.get('season'):
+        try:
+            season = int(request.args['season'])
+        except ValueError:
+            return jsonify({"error": "season must be a year"}), 400
+    else:
+        season = season_in_play()
+
+    used = used_golfers(user_id, season)
+    if not used and not db.session.get(User, user_id):
+        return jsonify({"error": "User not found"}), 404
+
+    rows = []
+    for use in sorted(used.values(), key=lambda use: (use.golfer_name or use.golfer_id, use.golfer_id)):
+        row = {"golfer_id": use.golfer_id, "golfer_name": use.golfer_name or use.golfer_id,
+               "tournament_id": use.tournament_id}
+        if tournament_id:
+            row["available"] = _is_available(use, tournament_id)
+        rows.append(row)
+    return jsonify(rows)
 
 # --- Pick Submission Endpoint ---
 @app.route('/api/picks', methods=['POST'])
 def submit_picks():
-    print("--- Executing updated submit_picks function ---") # <--- New print statement
     data = request.get_json()
     required_fields = ['user_id', 'tournament_id', 'golfer_ids']
     if not data or not all(field in data for field in required_fields):
@@ -445,9 +787,11 @@ def submit_picks():
 
     if not isinstance(golfer_ids, list) or len(golfer_ids) != 3:
         return jsonify({"error": "Exactly 3 golfer_ids must be provided as a list"}), 400
+    if len(set(golfer_ids)) != len(golfer_ids):
+        return jsonify({"error": "The 3 golfers must be different"}), 400
 
     # 1. Check if the submission window is still open
-    tournament = Tournament.query.get(tournament_id)
+    tournament = db.session.get(Tournament, tournament_id)
     if not tournament:
         return jsonify({"error": "Tournament not found"}), 404
     
@@ -455,191 +799,659 @@ def submit_picks():
     if now > tournament.submission_end:
         return jsonify({"error": "The submission deadline has passed for this tournament."}), 403 # 403 Forbidden
 
-    # 2. Delete any existing picks for this specific tournament
-    existing_picks = Pick.query.filter_by(user_id=user_id, tournament_id=tournament_id).all()
-    if existing_picks:
-        for pick in existing_picks:
-            db.session.delete(pick)
-
-    # 3. Validate new picks against picks from OTHER tournaments
-    for golfer_id in golfer_ids:
-        # Note the addition of `Pick.tournament_id != tournament_id` to the query
-        previous_pick = Pick.query.filter(
-            Pick.user_id == user_id,
-            Pick.golfer_id == golfer_id,
-            Pick.tournament_id != tournament_id
-        ).first()
-        if previous_pick:
-            # Fetch the golfer's name for a more user-friendly error message
-            golfer = Golfer.query.get(golfer_id)
-            golfer_name = golfer.name if golfer else golfer_id
-            return jsonify({"error": f"You have already picked {golfer_name} in a previous tournament."}), 409
-
-    # 4. Save the new picks
+    # 2. Validate all new picks against the user's golfers from OTHER tournaments
+    # this season, so every conflicting golfer is reported at once
+    season = tournament.year
+    used = used_golfers(user_id, season)
+    conflicts = [used[golfer_id] for golfer_id in golfer_ids
+                 if golfer_id in used and used[golfer_id].tournament_id != tournament_id]
+    if conflicts:
+        return _picks_conflict_response(conflicts)
+
+    # 3. Replace this tournament's picks with bulk statements. The unique index on
+    # (user_id, season, golfer_id) enforces one-and-done if a concurrent request races us.
     try:
-        for golfer_id in golfer_ids:
-            new_pick = Pick(user_id=user_id, tournament_id=tournament_id, golfer_id=golfer_id)
-            db.session.add(new_pick)
+        Pick.query.filter_by(user_id=user_id, tournament_id=tournament_id).delete(synchronize_session=False)
+        db.session.execute(db.insert(Pick), [
+            {"user_id": user_id, "tournament_id": tournament_id, "season": season, "golfer_id": golfer_id}
+            for golfer_id in golfer_ids
+        ])
+        refresh_scores_for_users(db.session, [user_id])
         db.session.commit() # This atomically deletes the old picks and adds the new ones
+        data_versions.bump('picks')
         return jsonify({"message": "Picks submitted successfully"}), 201
+    except IntegrityError:
+        db.session.rollback()
+        used_golfers_cache.pop((user_id, season))
+        conflicts = db.session.query(
+            Pick.golfer_id,
+            Pick.tournament_id,
+            Golfer.name.label('golfer_name')
+        ).outerjoin(Golfer, Golfer.id == Pick.golfer_id)\
+         .filter(Pick.user_id == user_id, Pick.season == season, Pick.golfer_id.in_(golfer_ids))\
+         .all()
+        return _picks_conflict_response(conflicts)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Failed to submit picks: {str(e)}"}), 500
 
+def _picks_conflict_response(conflicts):
+    names = ', '.join(c.golfer_name or c.golfer_id for c in conflicts)
+    return jsonify({
+        "error": f"You have already picked {names} in a previous tournament.",
+        "conflicts": [{
+            "golfer_id": c.golfer_id,
+            "golfer_name": c.golfer_name or c.golfer_id,
+            "tournament_id": c.tournament_id
+        } for c in conflicts]
+    }), 409
+
 # --- Scoreboard Endpoint ---
+SCOREBOARD_KEYS = [(UserScore.total_score, True), (UserScore.user_id, False)]
+SCOREBOARD_DEFAULT_FIELDS = ("id", "displayName", "email", "score")
+SCOREBOARD_WINDOW_SIZE = 21 # Default rows around a user for ?around=
+
+def _scoreboard_ranker():
+    """Returns a function giving the competition rank of consecutive scoreboard rows.
+
+    The first row's rank comes from one count query; later rows follow from it,
+    so a page or window costs the same however far down the board it is.
+    """
+    state = {}
+    def rank(row):
+        if not state:
+            state['rank'], state['position'] = scoreboard_position(db.session, row.total_score, row.user_id)
+        else:
+            state['position'] += 1
+            if row.total_score != state['score']:
+                state['rank'] = state['position']
+        state['score'] = row.total_score
+        return state['rank']
+    return rank
+
 @app.route('/api/scoreboard', methods=['GET'])
+@conditional('users', 'picks', 'results')
 def get_scoreboard():
     try:
-        # This query joins User, Pick, and TournamentResult tables,
-        # groups by user, and sums the earnings for each user's picks.
-        scoreboard_query = db.session.query(
+        # Totals are maintained in user_score whenever earnings or picks change
+        # (see scoring.py), so every page is an ordered range read off
+        # ix_user_score_rank, streamed to the client when no limit is given.
+        results = db.session.query(
             User.id,
             User.displayName,
             User.email,
-            db.func.sum(TournamentResult.earnings).label('total_score')
-        ).join(Pick, User.id == Pick.user_id)\
-         .join(TournamentResult, (Pick.golfer_id == TournamentResult.golfer_id) & (Pick.tournament_id == TournamentResult.tournament_id))\
-         .group_by(User.id)\
-         .order_by(db.func.sum(TournamentResult.earnings).desc())
-
-        results = scoreboard_query.all()
-
-        scoreboard_data = [{
-            "id": r.id,
-            "displayName": r.displayName,
-            "email": r.email,
-            "score": r.total_score if r.total_score is not None else 0
-        } for r in results]
-        
-        # To include users who have made no picks yet (with a score of 0)
-        users_with_picks = {r['id'] for r in scoreboard_data}
-        all_users = User.query.all()
-        for user in all_users:
-            if user.id not in users_with_picks:
-                scoreboard_data.append({
-                    "id": user.id,
-                    "displayName": user.displayName,
-                    "email": user.email,
-                    "score": 0
-                })
-
-        # Re-sort to ensure correct order after adding users with 0 score
-        scoreboard_data.sort(key=lambda x: x['score'], reverse=True)
-
-        return jsonify(scoreboard_data)
+            UserScore.total_score,
+            UserScore.user_id
+        ).join(UserScore, UserScore.user_id == User.id)
+
+        fields = {
+            "id": lambda r: r.id,
+            "displayName": lambda r: r.displayName,
+            "email": lambda r: r.email,
+            "score": lambda r: r.total_score,
+            "rank": _scoreboard_ranker(),
+        }
+        around = request.args.get('around')
+        if around:
+            return _scoreboard_window(results, around, fields)
+        return _keyset_list(results, SCOREBOARD_KEYS, fields, SCOREBOARD_DEFAULT_FIELDS)
     except Exception as e:
         print(f"Error calculating scoreboard: {e}")
         return jsonify({"error": "Failed to calculate scoreboard"}), 500
 
+def _scoreboard_window(results, user_id, fields):
+    """The `limit` scoreboard rows centred on `user_id`, ranks included by default."""
+    try:
+        limit = parse_limit(request.args.get('limit')) or SCOREBOARD_WINDOW_SIZE
+        selected = parse_fields(request.args.get('fields'), fields, SCOREBOARD_DEFAULT_FIELDS + ("rank",))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    anchor = results.filter(UserScore.user_id == user_id).first()
+    if anchor is None:
+        return jsonify({"error": "User not found on the scoreboard"}), 404
+    anchor_keys = key_values(anchor, SCOREBOARD_KEYS)
+
+    # Walk up from the user in reverse order, then down. Either side may fetch up
+    # to a full window, so that near the top or bottom of the board the rows that
+    # don't exist on one side are made up from the other.
+    reverse_keys = [(column, not descending) for column, descending in SCOREBOARD_KEYS]
+    above = results.filter(before(SCOREBOARD_KEYS, anchor_keys))\
+        .order_by(*order_by(reverse_keys))\
+        .limit(limit - 1)\
+        .all()
+    below = results.filter(after(SCOREBOARD_KEYS, anchor_keys))\
+        .order_by(*order_by(SCOREBOARD_KEYS))\
+        .limit(limit)\
+        .all()
+    take_above = min(len(above), max((limit - 1) // 2, limit - 1 - len(below)))
+    take_below = limit - 1 - take_above
+
+    rows = above[:take_above][::-1] + [anchor] + below[:take_below + 1]
+    to_dict = lambda r: {field: fields[field](r) for field in selected}
+    return _page_response(rows, limit, SCOREBOARD_KEYS, to_dict)
+
 @app.route('/api/detailed-scoreboard', methods=['GET'])
+@conditional('tournaments', 'fields', 'users', 'picks', 'results')
 def get_detailed_scoreboard():
     try:
-        # Get all tournaments for which at least one pick has been made
-        # Order by submission_end date so current tournaments appear first
-        tournaments_with_picks = db.session.query(Tournament)\
-                                    .join(Pick, Tournament.id == Pick.tournament_id)\
-                                    .distinct()\
-                                    .order_by(Tournament.submission_end.desc())\
-                                    .all()
-        
-        tournaments_data = []
-        overall_scores = {} # To calculate overall leaderboard
-
-        for t in tournaments_with_picks:
-            user_scores_for_tournament = {}
-            
-            # Get all picks for this tournament, and try to join with results and golfer names
-            picks_data = db.session.query(
-                User.id,
-                User.displayName,
-                Pick.golfer_id,
-                Golfer.name.label('golfer_name'),
-                TournamentResult.earnings # This will be NULL if no result exists
-            ).join(User, User.id == Pick.user_id)\
-             .join(Golfer, Pick.golfer_id == Golfer.id)\
-             .outerjoin(TournamentResult, (Pick.golfer_id == TournamentResult.golfer_id) & (Pick.tournament_id == TournamentResult.tournament_id))\
-             .filter(Pick.tournament_id == t.id)\
-             .all()
-
-            for pick_entry in picks_data:
-                user_id = pick_entry.id
-                display_name = pick_entry.displayName
-                golfer_name = pick_entry.golfer_name
-                earnings = pick_entry.earnings if pick_entry.earnings is not None else 0 # Default to 0 if no earnings yet
-
-                # Aggregate results by user for this specific tournament
-                if user_id not in user_scores_for_tournament:
-                    user_scores_for_tournament[user_id] = {
-                        "user_id": user_id,
-                        "displayName": display_name,
-                        "total_earnings": 0,
-                        "picks": []
-                    }
-                
-                user_scores_for_tournament[user_id]['picks'].append({
-                    "golfer_name": golfer_name,
-                    "earnings": earnings
-                })
-                user_scores_for_tournament[user_id]['total_earnings'] += earnings
-
-                # Update overall score (only if earnings are available for this pick)
-                if earnings > 0: # Only add to overall score if there are actual earnings
-                    if user_id not in overall_scores:
-                        overall_scores[user_id] = {
-                            "user_id": user_id,
-                            "displayName": display_name,
-                            "total_score": 0
-                        }
-                    overall_scores[user_id]['total_score'] += earnings
-
-            tournaments_data.append({
-                "id": t.id,
-                "name": t.name,
-                "user_scores": sorted(user_scores_for_tournament.values(), key=lambda x: x['total_earnings'], reverse=True)
-            })
-
-        # Format the overall leaderboard
-        overall_leaderboard = sorted(overall_scores.values(), key=lambda x: x['total_score'], reverse=True)
-
-        # Add users who have made picks but have no overall score yet (e.g., all their picks are for pending tournaments)
-        all_users_with_picks = db.session.query(User).join(Pick).distinct().all()
-        users_in_overall_leaderboard = {u['user_id'] for u in overall_leaderboard}
-        for user in all_users_with_picks:
-            if user.id not in users_in_overall_leaderboard:
-                overall_leaderboard.append({
-                    "user_id": user.id,
-                    "displayName": user.displayName,
-                    "total_score": 0
-                })
-        
-        # Ensure all registered users are in the overall leaderboard, even if they have no picks
-        all_registered_users = User.query.all()
-        users_in_overall_leaderboard_final = {u['user_id'] for u in overall_leaderboard}
-        for user in all_registered_users:
-            if user.id not in users_in_overall_leaderboard_final:
-                overall_leaderboard.append({
-                    "user_id": user.id,
-                    "displayName": user.displayName,
-                    "total_score": 0
-                })
-        
-        # Re-sort the overall leaderboard after adding users with 0 score
-        overall_leaderboard.sort(key=lambda x: x['total_score'], reverse=True)
-
-
-        return jsonify({
-            "tournaments": tournaments_data,
-            "overall_leaderboard": overall_leaderboard
-        })
+        # Every pick with its tournament, user, golfer name and earnings (NULL if no
+        # result yet) in one query. Ordering by tournament keeps each tournament's
+        # picks contiguous, with the most recent tournaments first.
+        picks_data = db.session.query(
+            Tournament.id.label('tournament_id'),
+            Tournament.name.label('tournament_name'),
+            User.id.label('user_id'),
+            User.displayName,
+            Golfer.name.label('golfer_name'),
+            TournamentResult.earnings
+        ).select_from(Pick)\
+         .join(Tournament, Tournament.id == Pick.tournament_id)\
+         .join(User, User.id == Pick.user_id)\
+         .join(Golfer, Pick.golfer_id == Golfer.id)\
+         .outerjoin(TournamentResult, (Pick.golfer_id == TournamentResult.golfer_id) & (Pick.tournament_id == TournamentResult.tournament_id))\
+         .order_by(Tournament.submission_end.desc(), Tournament.id, Pick.id)\
+         .yield_per(STREAM_BATCH_SIZE)
+
+        # Every registered user appears in the overall leaderboard, even with no picks
+        overall_scores = {
+            u.id: {"user_id": u.id, "displayName": u.displayName, "total_score": 0}
+            for u in db.session.query(User.id, User.displayName).all()
+        }
+
+        return _json_stream(_detailed_scoreboard_chunks(iter(picks_data), overall_scores))
 
     except Exception as e:
         print(f"Error calculating detailed scoreboard: {e}")
         return jsonify({"error": "Failed to calculate detailed scoreboard"}), 500
 
+def _detailed_scoreboard_chunks(picks_data, overall_scores):
+    """Encodes the detailed scoreboard one tournament at a time.
+
+    Picks arrive grouped by tournament, so each tournament is aggregated, sorted,
+    sent and dropped before the next one is read. Only the overall totals are
+    held for the whole response, which is why the leaderboard comes last.
+    """
+    dumps = app.json.dumps_bytes
+    yield b'{"tournaments":['
+    separator = b''
+    for (tournament_id, tournament_name), rows in groupby(picks_data, key=lambda r: (r.tournament_id, r.tournament_name)):
+        user_scores_for_tournament = {}
+        for _, _, user_id, display_name, golfer_name, earnings in rows:
+            if earnings is None:
+                earnings = 0 # Default to 0 if no earnings yet
+
+            # Aggregate results by user for this specific tournament
+            user_entry = user_scores_for_tournament.get(user_id)
+            if user_entry is None:
+                user_entry = user_scores_for_tournament[user_id] = {
+                    "user_id": user_id,
+                    "displayName": display_name,
+                    "total_earnings": 0,
+                    "picks": []
+                }
+            user_entry['picks'].append({
+                "golfer_name": golfer_name,
+                "earnings": earnings
+            })
+            user_entry['total_earnings'] += earnings
+            overall_entry = overall_scores.get(user_id)
+            if overall_entry is None:
+                # Signed up after the users were read; the reads aren't one snapshot
+                overall_entry = overall_scores[user_id] = {
+                    "user_id": user_id, "displayName": display_name, "total_score": 0}
+            overall_entry['total_score'] += earnings
+
+        yield separator + dumps({
+            "id": tournament_id,
+            "name": tournament_name,
+            "user_scores": sorted(user_scores_for_tournament.values(), key=lambda x: x['total_earnings'], reverse=True)
+        })
+        separator = b','
+
+    overall_leaderboard = sorted(overall_scores.values(), key=lambda x: x['total_score'], reverse=True)
+    yield b'],"overall_leaderboard":' + dumps(overall_leaderboard) + b'}'
+
+# --- Standings Projection ---
+# Win probabilities and final-rank percentiles from a Monte Carlo run over the
+# remaining tournaments (see projection.py). A run takes tens of seconds, so no
+# request waits on one: the 'project_standings' background job runs it once for
+# every worker after each results or schedule write and stores it in
+# PROJECTION_FILE, and requests serve the stored run, stale or not, until the
+# next one lands. Picks and sign-ups made in between count from the next run.
+# The seed comes from the data versions, so a rerun gives the same projection.
+PROJECTION_SIMULATIONS = int(os.getenv('PROJECTION_SIMULATIONS', 100_000))
+PROJECTION_RANK_SIMULATIONS = int(os.getenv('PROJECTION_RANK_SIMULATIONS', 1000))
+PROJECTION_DOMAINS = ('results', 'tournaments')
+PROJECTION_JOB_KEY = 'standings'
+# Without shared versions there is nothing to tell a stale run by, so runs are redone after this long
+PROJECTION_MAX_AGE = int(os.getenv('PROJECTION_CACHE_TTL', 3600))
+PROJECTION_RETRY_AFTER = 30 # Seconds, while the first run is computed
+projection_store = open_projection_store()
+# Versions this worker has already asked the job scheduler to project, so a stale
+# run costs one job write per worker rather than one per request
+projection_requests = TTLCache(maxsize=4, ttl=60)
+projection_lookups = counter('golf_projection_cache_total', "Standings projection lookups by cache result", ['result'])
+
+def _version_seed(etag):
+    """A random seed shared by every worker at the same data versions."""
+    return int(hashlib.sha256(etag.encode()).hexdigest()[:16], 16) if etag else 0
+
+def _projection_is_current(stored, etag):
+    if stored is None:
+        return False
+    if etag is None:
+        return time.time() - stored.saved_at < PROJECTION_MAX_AGE
+    return stored.etag == etag
+
+def run_standings_projection():
+    """Runs the projection at the current data versions and stores it, unless that run is already stored."""
+    etag = data_versions.etag(PROJECTION_DOMAINS)
+    if _projection_is_current(projection_store.current(), etag):
+        return
+    try:
+        projection = project_standings(db.session, simulations=PROJECTION_SIMULATIONS,
+                                       rank_simulations=PROJECTION_RANK_SIMULATIONS, seed=_version_seed(etag))
+    except ProjectionError as e:
+        projection_store.save(etag, error=str(e))
+    else:
+        projection_store.save(etag, projection)
+
+def _request_projection_run(etag):
+    if projection_requests.get(etag) is None:
+        projection_requests.set(etag, True)
+        job_scheduler.plan([('project_standings', PROJECTION_JOB_KEY, datetime.utcnow())])
+
+@app.route('/api/projection', methods=['GET'])
+def get_projection():
+    """Projected final standings, best chances first; ?user_id= for one user, ?limit= for the top rows.
+
+    `up_to_date` is false while a run for the latest results is pending.
+    """
+    try:
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    versions = data_versions.etag(PROJECTION_DOMAINS)
+    stored = projection_store.current()
+    up_to_date = _projection_is_current(stored, versions)
+    projection_lookups.inc('current' if up_to_date else 'stale' if stored else 'missing')
+    if not up_to_date:
+        _request_projection_run(versions)
+    if stored is None:
+        response = jsonify({"error": "The projection is being computed; try again shortly"})
+        response.headers['Retry-After'] = str(PROJECTION_RETRY_AFTER)
+        return response, 503
+
+    # The stored run is the validator, along with whether it is still up to date
+    etag = f"{stored.etag}-{stored.saved_at}-{int(up_to_date)}"
+    if _etag_matches(etag):
+        return _set_validators(app.response_class(status=304), etag, None)
+    if stored.error:
+        return jsonify({"error": stored.error}), 409
+
+    projection = stored.projection
+    summary = {key: value for key, value in projection.items() if key != "users"}
+    summary["up_to_date"] = up_to_date
+    user_id = request.args.get('user_id')
+    if user_id:
+        if user_id not in stored.rows:
+            return jsonify({"error": "User not found in the projection"}), 404
+        return _set_validators(jsonify({**summary, "user": stored.rows[user_id]}), etag, None)
+    users = projection["users"] if limit is None else projection["users"][:limit]
+    return _set_validators(jsonify({**summary, "users": users}), etag, None)
+
+# --- Pick Planner ---
+# Suggests the picks for every tournament still open to picks that maximize a
+# user's expected earnings (see planner.py). Expected earnings per golfer and
+# tournament are the same for everyone: each worker works them out once per
+# results, schedule and field version. A user's plan is one assignment solve,
+# memoized until their picks change or a deadline passes.
+PLANNER_SIMULATIONS = int(os.getenv('PLANNER_SIMULATIONS', 2000)) # Per tournament
+PLANNER_DOMAINS = ('results', 'tournaments', 'fields')
+PLANNER_CACHE_TTL = int(os.getenv('PLANNER_CACHE_TTL', 3600))
+earnings_table_cache = TTLCache(maxsize=2, ttl=PLANNER_CACHE_TTL)
+earnings_table_builds = SingleFlight()
+pick_plan_cache = TTLCache(maxsize=int(os.getenv('PICK_PLAN_CACHE_SIZE', 4096)), ttl=PLANNER_CACHE_TTL)
+pick_plan_lookups = counter('golf_pick_plan_cache_total', "Pick plan lookups by cache result", ['result'])
+
+def _build_earnings_table(etag):
+    table = load_earnings_table(db.session, simulations=PLANNER_SIMULATIONS, seed=_version_seed(etag))
+    earnings_table_cache.set(etag, table)
+    return table
+
+def earnings_table():
+    """`(key, table)`: the expected earnings table for the current data versions."""
+    etag = data_versions.etag(PLANNER_DOMAINS)
+    table = earnings_table_cache.get(etag)
+    if table is None:
+        table = earnings_table_builds.do(etag, lambda: _build_earnings_table(etag))
+    return etag, table
+
+@app.route('/api/users/<string:user_id>/pick-plan', methods=['GET'])
+def get_pick_plan(user_id):
+    """The picks for every open and upcoming tournament with the most expected earnings for the user."""
+    try:
+        table_key, table = earnings_table()
+    except ProjectionError as e:
+        return jsonify({"error": str(e)}), 409
+    used = used_golfers(user_id, table.season)
+    if not used and not db.session.get(User, user_id):
+        return jsonify({"error": "User not found"}), 404
+
+    # Not conditional: which tournaments are open depends on the time as well
+    now = datetime.utcnow()
+    key = (table_key, tuple(table.open_rows(now)),
+           frozenset((use.golfer_id, use.tournament_id) for use in used.values()))
+    cached = pick_plan_cache.get(user_id)
+    if cached is not None and cached[0] == key:
+        pick_plan_lookups.inc('hit')
+        plan = cached[1]
+    else:
+        pick_plan_lookups.inc('miss')
+        plan = plan_picks(table, key[2], now)
+        pick_plan_cache.set(user_id, (key, plan))
+    return jsonify({"user_id": user_id, **plan})
+
+# --- Live Scoreboard ---
+# Clients subscribe with an EventSource instead of polling the detailed
+# scoreboard. Each results write sends one `scores` event with the users whose
+# totals changed (see live.py). Every open stream holds a server thread, so
+# streams per worker are capped (gunicorn.conf.py sizes the cap).
+LIVE_MAX_STREAMS = int(os.getenv('LIVE_MAX_STREAMS', 100))
+LIVE_HEARTBEAT_SECONDS = 15 # Keeps proxies from closing idle streams
+LIVE_RETRY_MS = 3000
+
+def _engine():
+    with app.app_context():
+        return db.engine
+
+scoreboard_feed = ScoreboardFeed(data_versions, _engine, poll_interval=float(os.getenv('LIVE_POLL_SECONDS', 0.5)))
+
+def _sse(event_id, payload):
+    return f"id: {event_id}\nevent: scores\ndata: {payload}\n\n"
+
+@app.route('/api/live/scoreboard', methods=['GET'])
+def live_scoreboard():
+    if len(scoreboard_feed) >= LIVE_MAX_STREAMS:
+        response = jsonify({"error": "Too many live scoreboard connections, try again later"})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(LIVE_RETRY_MS // 1000)
+        return response
+
+    # Browsers send Last-Event-ID on reconnect; ?last_event_id= is for other clients
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID must be an integer"}), 400
+
+    subscription = scoreboard_feed.subscribe(last_event_id)
+
+    def events():
+        try:
+            yield f"retry: {LIVE_RETRY_MS}\n\n"
+            for event_id, payload in subscription.replay:
+                yield _sse(event_id, payload)
+            while True:
+                try:
+                    event_id, payload = subscription.queue.get(timeout=LIVE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event_id, payload)
+                if subscription.overflowed and subscription.queue.empty():
+                    return # Fell too far behind; the client reconnects and replays
+        finally:
+            scoreboard_feed.unsubscribe(subscription)
+
+    response = Response(events(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # Stops nginx buffering the stream
+    return response
+
+# --- Background Jobs ---
+# Every worker runs a JobScheduler (started from gunicorn.conf.py). Jobs are
+# planned from the tournament table: each field is fetched shortly after its
+# submission window opens, so the first user doesn't wait on RapidAPI, and
+# earnings are polled after each event until the leaderboard stops changing.
+# The standings projection is rerun whenever the stored one is out of date.
+JOB_SCHEDULER_ENABLED = os.getenv('JOB_SCHEDULER', '1') not in ('0', 'false')
+FIELD_PREWARM_DELAY = timedelta(minutes=float(os.getenv('FIELD_PREWARM_DELAY_MINUTES', 10)))
+# Windows close on the Wednesday night before the event; results land on Sunday
+EARNINGS_POLL_DELAY = timedelta(hours=float(os.getenv('EARNINGS_POLL_DELAY_HOURS', 96)))
+EARNINGS_POLL_INTERVAL = timedelta(hours=float(os.getenv('EARNINGS_POLL_INTERVAL_HOURS', 3)))
+EARNINGS_STABLE_POLLS = int(os.getenv('EARNINGS_STABLE_POLLS', 2)) # Unchanged fetches in a row
+EARNINGS_POLL_WINDOW = timedelta(days=10) # Polling stops this long after it starts
+JOB_PLAN_HORIZON = timedelta(days=14)
+
+def _plan_jobs(now):
+    """The jobs the tournament table calls for, as `(kind, tournament_id, run_at)`, and a stale projection's."""
+    with app.app_context():
+        starts = db.session.query(Tournament.id, Tournament.submission_start).filter(
+            Tournament.submission_start >= now - GOLFER_FIELD_MAX_AGE,
+            Tournament.submission_start <= now + JOB_PLAN_HORIZON,
+        ).all()
+        ends = db.session.query(Tournament.id, Tournament.submission_end).filter(
+            Tournament.submission_end >= now - EARNINGS_POLL_DELAY - EARNINGS_POLL_WINDOW,
+            Tournament.submission_end <= now + JOB_PLAN_HORIZON,
+        ).all()
+        projection_is_current = _projection_is_current(projection_store.current(),
+                                                       data_versions.etag(PROJECTION_DOMAINS))
+    return [('prewarm_field', t.id, t.submission_start + FIELD_PREWARM_DELAY) for t in starts] + \
+           [('poll_earnings', t.id, t.submission_end + EARNINGS_POLL_DELAY) for t in ends] + \
+           ([] if projection_is_current else [('project_standings', PROJECTION_JOB_KEY, now)])
+
+def _project_standings_job(claimed):
+    """Stores the projection for the current data, and runs again if the data changed meanwhile."""
+    etag = data_versions.etag(PROJECTION_DOMAINS)
+    with app.app_context():
+        run_standings_projection()
+    if data_versions.etag(PROJECTION_DOMAINS) != etag:
+        return Reschedule(datetime.utcnow())
+
+def _prewarm_field_job(claimed):
+    with app.app_context():
+        tournament = db.session.get(Tournament, claimed.key)
+        if tournament is None:
+            return
+        if field_is_fresh(tournament):
+            return # A user got there first
+        status, body = golfer_field_refresh.do(claimed.key, lambda: _refresh_or_wait(claimed.key, None))
+        if status != 200:
+            raise RuntimeError(f"Field refresh for {claimed.key} failed with status {status}")
+
+def _poll_earnings_job(claimed):
+    """Stores the latest earnings, until the same leaderboard comes back EARNINGS_STABLE_POLLS times."""
+    with app.app_context():
+        tournament = db.session.get(Tournament, claimed.key)
+        if tournament is None:
+            return
+        now = datetime.utcnow()
+        give_up_at = tournament.submission_end + EARNINGS_POLL_DELAY + EARNINGS_POLL_WINDOW
+        state = claimed.state or {}
+
+        data = rapidapi.earnings(tournament.tourn_id, tournament.year, use_cache=False)
+        earnings = parse_leaderboard(data.get('leaderboard'))
+        if not earnings:
+            if now >= give_up_at:
+                print(f"No earnings for tournament {claimed.key} after {EARNINGS_POLL_WINDOW.days} days; giving up.")
+                return
+            return Reschedule(now + EARNINGS_POLL_INTERVAL, state) # Not finished yet
+
+        fingerprint = hashlib.sha1(json.dumps(sorted(earnings.items())).encode('utf-8')).hexdigest()
+        if fingerprint == state.get('fingerprint'):
+            unchanged = state.get('unchanged', 0) + 1
+            if unchanged >= EARNINGS_STABLE_POLLS or now >= give_up_at:
+                return
+            return Reschedule(now + EARNINGS_POLL_INTERVAL, {"fingerprint": fingerprint, "unchanged": unchanged})
+
+        try:
+            upsert_tournament_results(db.session, claimed.key, data['leaderboard'])
+            changes = refresh_scores_for_tournament(db.session, claimed.key)
+            record_score_changes(db.session, claimed.key, changes)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        earnings_archive.refresh(db.session, [claimed.key])
+        data_versions.bump('results')
+        print(f"Stored earnings for {len(earnings)} golfers in tournament {claimed.key}.")
+        return Reschedule(now + EARNINGS_POLL_INTERVAL, {"fingerprint": fingerprint, "unchanged": 0})
+
+job_scheduler = JobScheduler(
+    _engine,
+    {'prewarm_field': _prewarm_field_job, 'poll_earnings': _poll_earnings_job,
+     'project_standings': _project_standings_job},
+    planner=_plan_jobs,
+    concurrency=int(os.getenv('JOB_CONCURRENCY', 2)), # Per worker
+    max_running=int(os.getenv('JOB_MAX_RUNNING', 4)), # Across all workers
+    poll_interval=float(os.getenv('JOB_POLL_SECONDS', 5)),
+)
+
+def start_job_scheduler():
+    """Starts this process's job scheduler thread, unless JOB_SCHEDULER=0."""
+    if JOB_SCHEDULER_ENABLED:
+        job_scheduler.start()
+
+@app.cli.command('run-jobs')
+@click.option('--once', is_flag=True, help="Run the jobs that are due now, then exit.")
+def run_jobs_command(once):
+    """Runs background jobs in the foreground (e.g. with JOB_SCHEDULER=0 on the web workers)."""
+    while True:
+        claimed = job_scheduler.tick()
+        if once and not claimed:
+            break
+        if not once:
+            time.sleep(job_scheduler.poll_interval)
+
+@app.cli.command('jobs')
+def list_jobs_command():
+    """Lists background jobs and their state."""
+    for row in db.session.execute(db.select(job).order_by(job.c.run_at)):
+        line = f"{row.kind:14} {row.key:10} {row.status:8} run_at={row.run_at:%Y-%m-%d %H:%M} attempts={row.attempts}"
+        click.echo(line + (f" error={row.last_error}" if row.last_error else ""))
+
+# --- Scoreboard Maintenance Commands ---
+@app.cli.command('rebuild-scores')
+def rebuild_scores_command():
+    """Recomputes the user_score table from picks and tournament results."""
+    count = rebuild_user_scores(db.session)
+    db.session.commit()
+    data_versions.bump('results') # Scores are derived from results
+    click.echo(f"Rebuilt scores for {count} users.")
+
+@app.cli.command('check-scores')
+def check_scores_command():
+    """Compares user_score against the aggregate query and exits non-zero on drift."""
+    mismatches = find_score_mismatches(db.session)
+    for user_id, stored, expected in mismatches:
+        click.echo(f"{user_id}: stored={stored} expected={expected}")
+    if mismatches:
+        raise click.ClickException(f"{len(mismatches)} user score(s) out of date. Run 'flask rebuild-scores'.")
+    click.echo("User scores are consistent.")
+
+# --- Schema Commands ---
+def _upgrade_database():
+    """Creates missing tables, applies pending migrations and populates user scores, as init_db.py does.
+
+    Returns the applied migrations and the number of users scored (None if
+    the scores were already populated).
+    """
+    db.create_all()
+    applied = upgrade_schema(db.session)
+    scored = None
+    if user_scores_need_rebuild(db.session): # A database from before the user_score table
+        scored = rebuild_user_scores(db.session)
+        db.session.commit()
+    if applied or scored is not None:
+        data_versions.bump(*DOMAINS) # Migrations may rewrite any table
+    return applied, scored
+
+@app.cli.command('upgrade-db')
+@click.option('--dedupe-picks', 'dedupe', is_flag=True,
+              help="First delete picks that reuse a golfer, keeping each user's earliest one.")
+def upgrade_db_command(dedupe):
+    """Creates missing tables, applies pending schema migrations and populates user scores."""
+    if dedupe:
+        db.create_all()
+        deleted = dedupe_picks(db.session)
+        db.session.commit()
+        if deleted:
+            data_versions.bump(*DOMAINS)
+        click.echo(f"Deleted {deleted} duplicate pick(s).")
+    try:
+        applied, scored = _upgrade_database()
+    except DuplicatePicksError as e:
+        db.session.rollback()
+        raise click.ClickException(str(e))
+    click.echo(f"Applied migrations: {applied}" if applied else "Schema is up to date.")
+    if scored is not None:
+        click.echo(f"User scores populated for {scored} users.")
+
+# Hot queries and the index each one must use. Checked by tests/test_query_plans.py
+# and, against a live database, by 'flask check-query-plans'.
+def _hot_query_plans():
+    now = datetime.utcnow()
+    return [
+        ("scoreboard", db.select(UserScore.user_id).order_by(UserScore.total_score.desc(), UserScore.user_id),
+         'ix_user_score_rank'),
+        ("picks for user and tournament", db.select(Pick.id).where(Pick.user_id == 'u', Pick.tournament_id == 't'),
+         'ix_pick_tournament_user'),
+        ("picks for user and golfer", db.select(Pick.id).where(
+            Pick.user_id == 'u', Pick.season == 2026, Pick.golfer_id == 'g'),
+         'uq_pick_user_season_golfer'),
+        ("golfers used by user", _used_golfers_query('u', 2026), 'uq_pick_user_season_golfer'),
+        ("pickers in tournament", db.select(Pick.user_id).where(Pick.tournament_id == 't'),
+         'ix_pick_tournament_user'),
+        ("result for pick", db.select(TournamentResult.earnings).where(
+            TournamentResult.tournament_id == 't', TournamentResult.golfer_id == 'g'),
+         RESULT_UNIQUE_INDEX),
+        ("open submission windows", db.select(Tournament.id).where(
+            Tournament.submission_start <= now, Tournament.submission_end >= now),
+         'ix_tournament_submission_window'),
+        ("scoreboard page after cursor", db.select(UserScore.user_id)
+            .where(after(SCOREBOARD_KEYS, [100, 'u'])).order_by(*order_by(SCOREBOARD_KEYS)).limit(50),
+         'ix_user_score_rank'),
+        ("golfers page after cursor", db.select(Golfer.id)
+            .where(after(GOLFER_KEYS, ['name', 'g'])).order_by(*order_by(GOLFER_KEYS)).limit(50),
+         'ix_golfer_name'),
+        ("due jobs", db.select(job.c.id).where(job.c.status.in_(['pending', 'running']), job.c.run_at <= now)
+            .order_by(job.c.run_at).limit(8),
+         'ix_job_due'),
+        ("display name uniqueness", db.select(User.id).where(User.display_name_normalized == 'name'),
+         'ix_user_display_name_normalized'),
+        ("email uniqueness", db.select(User.id).where(User.email_normalized == 'email'),
+         'ix_user_email_normalized'),
+    ]
+
+def _query_plan(stmt):
+    """SQLite's EXPLAIN QUERY PLAN for `stmt`, one line."""
+    sql = str(stmt.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    return ' | '.join(row[-1] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")))
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Asserts via EXPLAIN QUERY PLAN that each hot query uses its index (SQLite only)."""
+    if db.engine.dialect.name != 'sqlite':
+        raise click.ClickException("check-query-plans only supports SQLite")
+    failures = 0
+    for name, stmt, index_name in _hot_query_plans():
+        plan = _query_plan(stmt)
+        ok = index_name in plan
+        failures += not ok
+        click.echo(f"{'ok  ' if ok else 'FAIL'} {name}: {plan}")
+    if failures:
+        raise click.ClickException(f"{failures} hot quer{'y does' if failures == 1 else 'ies do'} not use the expected index")
+
 # --- Main Execution ---
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all() # Create database tables if they don't exist
+        _upgrade_database()
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true': # The reloader's child, which serves requests
+        start_job_scheduler()
+        metrics_store.start()
     app.run(debug=True, port=5000)
 
 @app.route('/show-routes')
@@ -0,0 +1,174 @@
+"""Benchmark for /api/detailed-scoreboard against its previous per-tournament implementation.
+
+Usage (from the backend directory):
+    python benchmarks/bench_detailed_scoreboard.py --users 5000 --tournaments 50
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, backend_dir)
+
+
+def seed(db, models, users, tournaments, golfers, field_results, seed_value):
+    """Bulk-inserts a synthetic season. Each user picks 3 distinct golfers per tournament."""
+    User, Golfer, Tournament, Pick, TournamentResult = models
+    rng = random.Random(seed_value)
+    base = datetime(2025, 1, 5)
+
+    golfer_ids = [str(10000 + i) for i in range(golfers)]
+    db.session.execute(db.insert(Golfer), [{"id": g, "name": f"Golfer {g}"} for g in golfer_ids])
+    tournament_ids = [f"{i:03d}" for i in range(tournaments)]
+    db.session.execute(db.insert(Tournament), [{
+        "id": t,
+        "name": f"Tournament {t}",
+        "year": 2025,
+        "submission_start": base + timedelta(weeks=i),
+        "submission_end": base + timedelta(weeks=i, days=3),
+    } for i, t in enumerate(tournament_ids)])
+    db.session.execute(db.insert(User), [
+        {"id": f"user{i}", "displayName": f"User {i}", "email": f"user{i}@example.com"} for i in range(users)
+    ])
+
+    results = []
+    for t in tournament_ids:
+        for g in rng.sample(golfer_ids, min(field_results, golfers)):
+            results.append({"tournament_id": t, "golfer_id": g, "earnings": rng.randint(10000, 4000000)})
+    db.session.execute(db.insert(TournamentResult), results)
+
+    picks = []
+    for i in range(users):
+        used = rng.sample(golfer_ids, 3 * tournaments)
+        for j, t in enumerate(tournament_ids):
+            for g in used[3 * j:3 * j + 3]:
+                picks.append({"user_id": f"user{i}", "tournament_id": t, "season": 2025, "golfer_id": g})
+    db.session.execute(db.insert(Pick), picks)
+    db.session.commit()
+    return len(picks), len(results)
+
+
+def legacy_detailed_scoreboard(db, models):
+    """The per-tournament implementation this endpoint used before the single-pass rewrite."""
+    User, Golfer, Tournament, Pick, TournamentResult = models
+    tournaments_with_picks = db.session.query(Tournament)\
+                                .join(Pick, Tournament.id == Pick.tournament_id)\
+                                .distinct()\
+                                .order_by(Tournament.submission_end.desc())\
+                                .all()
+    tournaments_data = []
+    overall_scores = {}
+    for t in tournaments_with_picks:
+        user_scores_for_tournament = {}
+        picks_data = db.session.query(
+            User.id,
+            User.displayName,
+            Pick.golfer_id,
+            Golfer.name.label('golfer_name'),
+            TournamentResult.earnings
+        ).join(User, User.id == Pick.user_id)\
+         .join(Golfer, Pick.golfer_id == Golfer.id)\
+         .outerjoin(TournamentResult, (Pick.golfer_id == TournamentResult.golfer_id) & (Pick.tournament_id == TournamentResult.tournament_id))\
+         .filter(Pick.tournament_id == t.id)\
+         .all()
+        for pick_entry in picks_data:
+            user_id = pick_entry.id
+            earnings = pick_entry.earnings if pick_entry.earnings is not None else 0
+            if user_id not in user_scores_for_tournament:
+                user_scores_for_tournament[user_id] = {
+                    "user_id": user_id, "displayName": pick_entry.displayName, "total_earnings": 0, "picks": []
+                }
+            user_scores_for_tournament[user_id]['picks'].append({"golfer_name": pick_entry.golfer_name, "earnings": earnings})
+            user_scores_for_tournament[user_id]['total_earnings'] += earnings
+            if earnings > 0:
+                if user_id not in overall_scores:
+                    overall_scores[user_id] = {"user_id": user_id, "displayName": pick_entry.displayName, "total_score": 0}
+                overall_scores[user_id]['total_score'] += earnings
+        tournaments_data.append({
+            "id": t.id,
+            "name": t.name,
+            "user_scores": sorted(user_scores_for_tournament.values(), key=lambda x: x['total_earnings'], reverse=True)
+        })
+    overall_leaderboard = sorted(overall_scores.values(), key=lambda x: x['total_score'], reverse=True)
+    users_in_overall_leaderboard = {u['user_id'] for u in overall_leaderboard}
+    for user in db.session.query(User).join(Pick).distinct().all():
+        if user.id not in users_in_overall_leaderboard:
+            overall_leaderboard.append({"user_id": user.id, "displayName": user.displayName, "total_score": 0})
+    users_in_overall_leaderboard_final = {u['user_id'] for u in overall_leaderboard}
+    for user in User.query.all():
+        if user.id not in users_in_overall_leaderboard_final:
+            overall_leaderboard.append({"user_id": user.id, "displayName": user.displayName, "total_score": 0})
+    overall_leaderboard.sort(key=lambda x: x['total_score'], reverse=True)
+    return {"tournaments": tournaments_data, "overall_leaderboard": overall_leaderboard}
+
+
+def measure(label, fn, db, runs):
+    statements = []
+    listener = lambda *args: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    timings = []
+    try:
+        for _ in range(runs):
+            statements.clear()
+            db.session.expunge_all()
+            started = time.perf_counter()
+            payload = fn()
+            timings.append(time.perf_counter() - started)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    timings.sort()
+    print(f"{label:>8}: {len(statements):4d} queries, best {timings[0] * 1000:8.1f} ms, "
+          f"median {timings[len(timings) // 2] * 1000:8.1f} ms over {runs} runs")
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--tournaments', type=int, default=50)
+    parser.add_argument('--golfers', type=int, default=400)
+    parser.add_argument('--results-per-tournament', type=int, default=150)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='golf-bench-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+
+    from flask import jsonify
+    from app import app, db, User, Golfer, Tournament, Pick, TournamentResult
+    models = (User, Golfer, Tournament, Pick, TournamentResult)
+    # Serve the old implementation through the same Flask/jsonify path as the real endpoint
+    app.add_url_rule('/bench/legacy-detailed-scoreboard', 'legacy_detailed_scoreboard',
+                     lambda: jsonify(legacy_detailed_scoreboard(db, models)))
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        pick_count, result_count = seed(db, models, args.users, args.tournaments, args.golfers,
+                                        args.results_per_tournament, args.seed)
+        print(f"Seeded {args.users} users, {args.tournaments} tournaments, {pick_count} picks, "
+              f"{result_count} results in {time.perf_counter() - started:.1f}s")
+
+        client = app.test_client()
+        before = measure('before', lambda: client.get('/bench/legacy-detailed-scoreboard').get_json(), db, args.runs)
+        after = measure('after', lambda: client.get('/api/detailed-scoreboard').get_json(), db, args.runs)
+
+    # Same tournaments, per-tournament totals and overall totals
+    assert [t['id'] for t in before['tournaments']] == [t['id'] for t in after['tournaments']]
+    for b, a in zip(before['tournaments'], after['tournaments']):
+        assert {u['user_id']: u['total_earnings'] for u in b['user_scores']} == \
+               {u['user_id']: u['total_earnings'] for u in a['user_scores']}
+    assert {u['user_id']: u['total_score'] for u in before['overall_leaderboard']} == \
+           {u['user_id']: u['total_score'] for u in after['overall_leaderboard']}
+    print("Responses match.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark for the pick planner (planner.py): a checked plan per user on a synthetic season.
+
+Usage (from the backend directory):
+    python benchmarks/bench_planner.py --open-tournaments 1 --future-tournaments 49
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, backend_dir)
+
+from synthetic import generate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--tournaments', type=int, default=10, help="past tournaments, with results")
+    parser.add_argument('--open-tournaments', type=int, default=1)
+    parser.add_argument('--future-tournaments', type=int, default=49)
+    parser.add_argument('--golfers', type=int, default=400)
+    parser.add_argument('--plans', type=int, default=20, help="users to plan for")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='golf-planner-')
+    os.environ.update(
+        DATABASE_URL='sqlite:///' + os.path.join(workdir, 'bench.db'),
+        DATA_VERSIONS_FILE=os.path.join(workdir, 'data_versions'),
+        METRICS_DIR=os.path.join(workdir, 'metrics'),
+        EARNINGS_ARCHIVE_DIR=os.path.join(workdir, 'earnings_archive'),
+        PROJECTION_FILE=os.path.join(workdir, 'projection.json'),
+    )
+    from app import app, db
+    from models import Pick
+    from planner import load_earnings_table, plan_picks
+    from projection import PICKS_PER_TOURNAMENT, tournament_fields
+
+    with app.app_context():
+        db.create_all()
+        summary = generate(db, users=args.users, tournaments=args.tournaments, golfers=args.golfers, seed=args.seed,
+                           open_tournaments=args.open_tournaments, future_tournaments=args.future_tournaments)
+        started = time.perf_counter()
+        table = load_earnings_table(db.session)
+        print(f"Expected earnings of {len(table.golfers)} golfers in {len(table.tournaments)} tournaments "
+              f"in {time.perf_counter() - started:.2f}s")
+        fields = tournament_fields(db.session, [tournament_id for tournament_id, _, _ in table.tournaments])
+
+        now = datetime.utcnow()
+        timings = []
+        for user_id in summary['users'][:args.plans]:
+            picks = db.session.execute(db.select(Pick.golfer_id, Pick.tournament_id).where(Pick.user_id == user_id)).all()
+            started = time.perf_counter()
+            plan = plan_picks(table, picks, now)
+            timings.append(time.perf_counter() - started)
+
+            planned = [golfer["id"] for tournament in plan["tournaments"] for golfer in tournament["golfers"]]
+            open_ids = {tournament["id"] for tournament in plan["tournaments"]}
+            assert len(planned) == len(set(planned)), "a golfer is planned twice"
+            assert not set(planned) & {golfer_id for golfer_id, tournament_id in picks if tournament_id not in open_ids}
+            for tournament in plan["tournaments"]:
+                assert len(tournament["golfers"]) == PICKS_PER_TOURNAMENT
+                assert not fields[tournament["id"]] or {g["id"] for g in tournament["golfers"]} <= set(fields[tournament["id"]])
+
+    timings.sort()
+    print(f"Plans for {len(plan['tournaments'])} open tournaments: best {timings[0] * 1000:.1f} ms, "
+          f"median {timings[len(timings) // 2] * 1000:.1f} ms, worst {timings[-1] * 1000:.1f} ms over {len(timings)} users")
+    print("Plans are valid.")
+
+
+if __name__ == '__main__':
+    main()
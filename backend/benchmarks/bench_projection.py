@@ -0,0 +1,71 @@
+"""Benchmark for the standings projection (projection.py), run cold on a synthetic season as the projection job runs it.
+
+Usage (from the backend directory):
+    python benchmarks/bench_projection.py --users 10000 --simulations 100000
+    python benchmarks/bench_projection.py --future-tournaments 10  # early in a full season
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, backend_dir)
+
+from synthetic import generate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--tournaments', type=int, default=20, help="past tournaments, with results")
+    parser.add_argument('--open-tournaments', type=int, default=1)
+    parser.add_argument('--future-tournaments', type=int, default=2)
+    parser.add_argument('--simulations', type=int, default=100_000)
+    parser.add_argument('--rank-simulations', type=int, default=1000)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='golf-projection-')
+    os.environ.update(
+        DATABASE_URL='sqlite:///' + os.path.join(workdir, 'bench.db'),
+        DATA_VERSIONS_FILE=os.path.join(workdir, 'data_versions'),
+        METRICS_DIR=os.path.join(workdir, 'metrics'),
+        EARNINGS_ARCHIVE_DIR=os.path.join(workdir, 'earnings_archive'),
+        PROJECTION_FILE=os.path.join(workdir, 'projection.json'),
+    )
+    from app import app, db
+    from projection import project_standings
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        summary = generate(db, users=args.users, tournaments=args.tournaments, seed=args.seed,
+                           open_tournaments=args.open_tournaments, future_tournaments=args.future_tournaments)
+        print(f"Generated {args.users} users and {summary['picks']} picks in {time.perf_counter() - started:.1f}s")
+
+        timings = []
+        for run in range(args.runs):
+            db.session.expunge_all()
+            started = time.perf_counter()
+            projection = project_standings(db.session, simulations=args.simulations,
+                                           rank_simulations=args.rank_simulations, seed=run)
+            timings.append(time.perf_counter() - started)
+            db.session.rollback()
+
+    timings.sort()
+    print(f"{args.simulations} simulations of {len(projection['remaining_tournaments'])} tournaments for "
+          f"{len(projection['users'])} users: best {timings[0]:.2f}s, median {timings[len(timings) // 2]:.2f}s "
+          f"over {args.runs} runs")
+    for row in projection['users'][:5]:
+        print(f"  {row['id']}: win {row['win_probability']:.2%}, expected rank {row['expected_rank']}, "
+              f"ranks {row['rank_percentiles']}")
+    total = sum(row['win_probability'] for row in projection['users'])
+    assert not projection['users'] or abs(total - 1) < 1e-3, f"win probabilities add up to {total}"
+    print("Win probabilities add up to one.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+"""Per-route benchmarks for app.py and update_earnings.py on a synthetic season, compared with stored baselines.
+
+Usage (from the backend directory):
+    python benchmarks/bench_routes.py                    # compare with benchmarks/baselines.json
+    python benchmarks/bench_routes.py --save-baseline    # on the machine you compare on
+    python benchmarks/bench_routes.py --only scoreboard  # cases whose name contains 'scoreboard'
+    python benchmarks/bench_routes.py --users 20000 --baseline /tmp/big.json --save-baseline
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, backend_dir)
+
+from stub_rapidapi import EARNINGS_FIXTURE, TOURNAMENT_FIXTURE, start_stub_server
+from synthetic import generate
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+MIN_REGRESSION_MS = 1.0 # Sub-millisecond routes are too noisy for a percentage alone
+WARMUP_RUNS = 3
+
+
+class Case:
+    """A benchmarked request. `request(ctx, i)` returns `(method, path, json_body, headers)` for run `i`."""
+    def __init__(self, name, request, statuses=(200,), runs=None, stream=False):
+        self.name = name
+        self.request = request
+        self.statuses = statuses
+        self.runs = runs
+        self.stream = stream
+
+
+def _cycle(items, i):
+    return items[i % len(items)]
+
+
+def build_cases(ctx):
+    """Every case in run order: reads first, then the writes, then the cron script."""
+    users, past, open_ = ctx['users'], ctx['past'], ctx['open'][0]
+    return [
+        Case("GET / (health)", lambda c, i: ('GET', '/', None, {})),
+        Case("GET /golfers", lambda c, i: ('GET', '/golfers', None, {})),
+        Case("GET /golfers?limit=100", lambda c, i: ('GET', '/golfers?limit=100', None, {})),
+        Case("GET /api/tournaments", lambda c, i: ('GET', '/api/tournaments', None, {})),
+        Case("GET /api/available-tournaments", lambda c, i: ('GET', '/api/available-tournaments', None, {})),
+        Case("GET field (cached)", lambda c, i: ('GET', f'/api/tournaments/{open_}/golfers', None, {})),
+        Case("GET field ?user_id", lambda c, i: ('GET', f'/api/tournaments/{open_}/golfers?user_id={_cycle(users, i)}', None, {})),
+        Case("GET field (RapidAPI fetch)", lambda c, i: ('GET', f"/api/tournaments/{c['cold'][i]}/golfers", None, {})),
+        Case("GET used-golfers", lambda c, i: ('GET', f'/api/users/{_cycle(users, i)}/used-golfers', None, {})),
+        # A different user each run, so each request solves a plan (the earnings table is built in the warm-up)
+        Case("GET pick-plan", lambda c, i: ('GET', f'/api/users/{_cycle(users, i)}/pick-plan', None, {})),
+        Case("GET /api/scoreboard", lambda c, i: ('GET', '/api/scoreboard', None, {}), runs=10),
+        Case("GET /api/scoreboard?limit=50", lambda c, i: ('GET', '/api/scoreboard?limit=50', None, {})),
+        Case("GET /api/scoreboard deep page", lambda c, i: ('GET', f"/api/scoreboard?limit=50&cursor={c['deep_cursor']}", None, {})),
+        Case("GET /api/scoreboard?around", lambda c, i: ('GET', f'/api/scoreboard?around={_cycle(users, i * 7)}', None, {})),
+        Case("GET /api/scoreboard (304)", lambda c, i: ('GET', '/api/scoreboard', None, {'If-None-Match': c['scoreboard_etag']}),
+             statuses=(304,)),
+        Case("GET /api/detailed-scoreboard", lambda c, i: ('GET', '/api/detailed-scoreboard', None, {}), runs=5),
+        # Served from the run stored in prepare(), as the background job leaves it
+        Case("GET /api/projection?limit=50", lambda c, i: ('GET', '/api/projection?limit=50', None, {})),
+        Case("GET /api/projection?user_id", lambda c, i: ('GET', f'/api/projection?user_id={_cycle(users, i)}', None, {})),
+        # The warm-up builds the earnings archive; the field case is the pick screen's 144 golfers in one call
+        Case("GET golfer stats", lambda c, i: ('GET', f"/api/golfers/{_cycle(c['golfers'], i)}/stats", None, {})),
+        Case("GET field stats", lambda c, i: ('GET', f'/api/tournaments/{open_}/golfer-stats', None, {})),
+        Case("GET /show-routes", lambda c, i: ('GET', '/show-routes', None, {})),
+        Case("GET /metrics", lambda c, i: ('GET', '/metrics', None, {})),
+        Case("POST /api/users", lambda c, i: ('POST', '/api/users', {
+            "id": f"bench{i}", "displayName": f"Bench {i}", "email": f"bench{i}@example.com"}, {}), statuses=(201,)),
+        Case("POST /golfers", lambda c, i: ('POST', '/golfers', {"id": f"B{i}", "name": f"Bench Golfer {i}"}, {}),
+             statuses=(201,)),
+        Case("POST /api/tournaments", lambda c, i: ('POST', '/api/tournaments', {
+            "id": f"BT{i}", "name": f"Bench {i}", "year": 2030,
+            "submission_start": "2030-01-01T00:00:00Z", "submission_end": "2030-01-04T00:00:00Z"}, {}),
+             statuses=(201,)),
+        Case("POST /api/picks", lambda c, i: ('POST', '/api/picks', {
+            "user_id": c['pickers'][i % len(c['pickers'])][0], "tournament_id": open_,
+            "golfer_ids": c['pickers'][i % len(c['pickers'])][1]}, {}), statuses=(201,)),
+        Case("POST /api/picks (409 conflict)", lambda c, i: ('POST', '/api/picks', {
+            "user_id": c['conflicts'][i % len(c['conflicts'])][0], "tournament_id": open_,
+            "golfer_ids": c['conflicts'][i % len(c['conflicts'])][1]}, {}), statuses=(409,)),
+        Case("POST /api/load-tournaments", lambda c, i: ('POST', '/api/load-tournaments',
+                                                         {"path": "schedule_2025.txt", "events": "all"}, {}),
+             statuses=(200, 201), runs=10),
+        Case("POST /api/load-earnings", lambda c, i: ('POST', '/api/load-earnings', {}, {}), statuses=(200, 201), runs=10),
+        Case("POST update-earnings", lambda c, i: ('POST', f'/api/tournaments/{_cycle(past, i)}/update-earnings?refresh=1', None, {}),
+             runs=10),
+        Case("GET /api/live/scoreboard (replay)", lambda c, i: ('GET', '/api/live/scoreboard?last_event_id=0', None, {}),
+             stream=True),
+    ]
+
+
+def prepare(db, app, summary, cases_needing_cold):
+    """Extra fixtures for requests: unopened tournaments, cursors, ETags and pick payloads."""
+    from app import Pick, Tournament, run_standings_projection
+
+    ctx = dict(summary)
+    now = datetime.utcnow()
+    # Tournaments with no field yet, one per fetch, so each request goes to RapidAPI
+    ctx['cold'] = [f"C{i:05d}" for i in range(cases_needing_cold)]
+    db.session.execute(db.insert(Tournament), [{
+        "id": t, "name": f"Cold {t}", "year": now.year,
+        "submission_start": now, "submission_end": now + timedelta(days=3),
+    } for t in ctx['cold']])
+    db.session.commit()
+
+    open_ = summary['open'][0]
+    picks = {}
+    for user_id, tournament_id, golfer_id in db.session.query(Pick.user_id, Pick.tournament_id, Pick.golfer_id):
+        picks.setdefault(user_id, {}).setdefault(tournament_id, []).append(golfer_id)
+    # Resubmitting a user's current picks is always accepted; picking a golfer
+    # they used in an earlier tournament always conflicts
+    ctx['pickers'] = [(u, by_t[open_]) for u, by_t in sorted(picks.items()) if len(by_t.get(open_, [])) == 3]
+    ctx['conflicts'] = [(u, [by_t[summary['past'][0]][0]] + by_t[open_][1:]) for u, by_t in sorted(picks.items())
+                        if len(by_t.get(open_, [])) == 3 and summary['past'][0] in by_t]
+
+    client = app.test_client()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cursor = None
+        for _ in range(5):
+            response = client.get('/api/scoreboard?limit=50' + (f'&cursor={cursor}' if cursor else ''))
+            cursor = response.headers['X-Next-Cursor']
+        ctx['deep_cursor'] = cursor
+        response = client.get('/api/scoreboard')
+        response.get_data()
+        ctx['scoreboard_etag'] = response.headers['ETag']
+        run_standings_projection()
+    return ctx
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def run_case(client, case, ctx, runs, statements):
+    timings, queries, wrong = [], [], []
+    total = WARMUP_RUNS + runs
+    for i in range(total):
+        method, path, body, headers = case.request(ctx, i)
+        statements[0] = 0
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()): # The app logs to stdout on several paths
+            response = client.open(path, method=method, json=body, headers=headers, buffered=not case.stream)
+            if case.stream:
+                # A live stream never ends: stop at the first replayed event
+                for chunk in response.response:
+                    if b'\nevent:' in chunk:
+                        break
+                response.close()
+            else:
+                response.get_data()
+        elapsed = time.perf_counter() - started
+        if response.status_code not in case.statuses:
+            wrong.append(response.status_code)
+        if i >= WARMUP_RUNS:
+            timings.append(elapsed)
+            queries.append(statements[0])
+    timings.sort()
+    queries.sort()
+    return {
+        "p50_ms": round(percentile(timings, 0.5) * 1000, 3),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 3),
+        "rps": round(len(timings) / sum(timings), 1),
+        "queries": percentile(queries, 0.5),
+    }, wrong
+
+
+def run_update_earnings(season, runs, statements):
+    """One `update_recent_tournament_earnings` pass per run, over every past tournament of `season`."""
+    from update_earnings import update_recent_tournament_earnings
+    timings, queries = [], []
+    for i in range(1 + runs):
+        statements[0] = 0
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            update_recent_tournament_earnings(season=season, force=True)
+        if i:
+            timings.append(time.perf_counter() - started)
+            queries.append(statements[0])
+    timings.sort()
+    return {
+        "p50_ms": round(percentile(timings, 0.5) * 1000, 3),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 3),
+        "rps": round(len(timings) / sum(timings), 1),
+        "queries": sorted(queries)[len(queries) // 2],
+    }
+
+
+def uncovered_routes(app, cases, ctx):
+    """Endpoints of the app that no case requests."""
+    adapter = app.url_map.bind('localhost')
+    covered = set()
+    for case in cases:
+        method, path, _, _ = case.request(ctx, 0)
+        covered.add(adapter.match(path.split('?')[0], method=method)[0])
+    return sorted(rule.endpoint for rule in app.url_map.iter_rules()
+                  if rule.endpoint != 'static' and rule.endpoint not in covered)
+
+
+# A case regresses when its p50 is both `threshold` and MIN_REGRESSION_MS slower
+# than the baseline, or when it runs more queries per request
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        slower = result['p50_ms'] - base['p50_ms']
+        if slower > MIN_REGRESSION_MS and result['p50_ms'] > base['p50_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p50 {base['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms")
+        if result['queries'] > base['queries']:
+            regressions.append(f"{name}: {base['queries']} -> {result['queries']} queries per request")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--tournaments', type=int, default=20)
+    parser.add_argument('--golfers', type=int, default=400)
+    parser.add_argument('--field-size', type=int, default=144)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--runs', type=int, default=30, help="Measured runs per case (some cases use fewer)")
+    parser.add_argument('--only', help="Run only the cases whose name contains this")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.25, help="Allowed p50 slowdown, as a fraction")
+    args = parser.parse_args()
+    scale = {"users": args.users, "tournaments": args.tournaments, "golfers": args.golfers,
+             "field_size": args.field_size, "seed": args.seed}
+
+    stub = start_stub_server()
+    workdir = tempfile.mkdtemp(prefix='golf-routes-')
+    os.environ.update(
+        DATABASE_URL='sqlite:///' + os.path.join(workdir, 'bench.db'),
+        DATA_VERSIONS_FILE=os.path.join(workdir, 'data_versions'),
+        METRICS_DIR=os.path.join(workdir, 'metrics'),
+        EARNINGS_ARCHIVE_DIR=os.path.join(workdir, 'earnings_archive'),
+        PROJECTION_FILE=os.path.join(workdir, 'projection.json'),
+        RAPIDAPI_BASE_URL=stub.base_url,
+        RAPIDAPI_KEY='stub',
+        RAPIDAPI_HOST='stub',
+        RAPIDAPI_MODE='live',
+        RAPIDAPI_CACHE_DIR='', # Every fetch goes to the (stub) API
+    )
+    from app import app, db
+    from migrations import upgrade
+
+    # Golfers with the fixtures' player ids, so update-earnings rescores picks and
+    # writes the scoreboard events replayed by the live case
+    fixture_ids = []
+    for filename, key in ((EARNINGS_FIXTURE, 'leaderboard'), (TOURNAMENT_FIXTURE, 'players')):
+        with open(os.path.join(backend_dir, filename)) as f:
+            fixture_ids.extend(player['playerId'] for player in json.load(f)[key])
+
+    statements = [0]
+    event.listen(Engine, 'before_cursor_execute', lambda *a: statements.__setitem__(0, statements[0] + 1))
+
+    with app.app_context():
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.create_all()
+            upgrade(db.session)
+        started = time.perf_counter()
+        summary = generate(db, users=args.users, tournaments=args.tournaments, golfers=args.golfers,
+                           field_size=args.field_size, seed=args.seed, golfer_ids=fixture_ids)
+        print(f"Generated {args.users} users, {args.tournaments} past tournaments and {summary['picks']} picks "
+              f"in {time.perf_counter() - started:.1f}s; {platform.python_version()} on {platform.machine()}")
+        ctx = prepare(db, app, summary, WARMUP_RUNS + args.runs)
+
+    cases = build_cases(ctx)
+    missing = uncovered_routes(app, cases, ctx)
+    if args.only:
+        cases = [case for case in cases if args.only in case.name]
+
+    client = app.test_client()
+    results, failures = {}, []
+    print(f"{'case':40} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8} {'queries':>8}")
+    for case in cases:
+        result, wrong = run_case(client, case, ctx, min(case.runs or args.runs, args.runs), statements)
+        results[case.name] = result
+        if wrong:
+            failures.append(f"{case.name}: unexpected status {sorted(set(wrong))}")
+        print(f"{case.name:40} {result['p50_ms']:9.2f} {result['p99_ms']:9.2f} {result['rps']:8.1f} {result['queries']:8}")
+
+    if not args.only or args.only in 'update_earnings.py':
+        from app import Tournament
+        with app.app_context():
+            season = db.session.get(Tournament, ctx['past'][-1]).year
+        result = run_update_earnings(season, min(3, args.runs), statements)
+        results['update_earnings.py'] = result
+        print(f"{'update_earnings.py':40} {result['p50_ms']:9.2f} {result['p99_ms']:9.2f} {result['rps']:8.1f} {result['queries']:8}")
+    stub.shutdown()
+
+    if missing:
+        failures.append(f"routes without a benchmark: {', '.join(missing)}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({"scale": scale, "python": platform.python_version(), "machine": platform.machine(),
+                       "cases": results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('scale') != scale:
+            print(f"Baseline was recorded at {baseline.get('scale')}; not comparing.")
+        else:
+            regressions = compare(results, baseline['cases'], args.threshold)
+            for line in regressions:
+                print(f"REGRESSION {line}")
+            failures.extend(regressions)
+            if not regressions:
+                print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%}).")
+
+    for line in failures:
+        print(f"FAIL {line}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
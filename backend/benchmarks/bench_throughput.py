@@ -0,0 +1,176 @@
+"""Throughput benchmark for the gunicorn serving profile, with RapidAPI stubbed at a set latency.
+
+Profiles:
+    baseline  gunicorn --bind ... app:app        (one sync worker, the old CMD)
+    tuned     gunicorn --config gunicorn.conf.py (the shipped profile)
+
+Usage (from the backend directory):
+    python benchmarks/bench_throughput.py --duration 10 --concurrency 32 --latency-ms 200
+"""
+import argparse
+import http.client
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, backend_dir)
+
+from stub_rapidapi import start_stub_server
+
+# gunicorn picks up ./gunicorn.conf.py on its own, so servers are started from
+# the scratch directory with --chdir pointing at the backend
+PROFILES = {
+    'baseline': [],
+    'tuned': ['--config', os.path.join(backend_dir, 'gunicorn.conf.py')],
+}
+
+
+def seed_database(url, users, tournaments):
+    """Creates the schema with users, their scores and tournaments with no fields yet."""
+    env = dict(os.environ, DATABASE_URL=url)
+    script = f"""
+from datetime import datetime, timedelta
+from app import app, db, User, UserScore, Tournament
+from migrations import upgrade
+with app.app_context():
+    db.create_all()
+    upgrade(db.session)
+    db.session.execute(db.insert(User), [
+        {{"id": f"user{{i}}", "displayName": f"User {{i}}", "email": f"user{{i}}@example.com"}} for i in range({users})
+    ])
+    db.session.execute(db.insert(UserScore), [
+        {{"user_id": f"user{{i}}", "total_score": (i * 7919) % 5000000}} for i in range({users})
+    ])
+    start = datetime.utcnow()
+    db.session.execute(db.insert(Tournament), [
+        {{"id": f"T{{i:05d}}", "name": f"Tournament {{i}}", "year": 2025,
+          "submission_start": start, "submission_end": start + timedelta(days=3)}} for i in range({tournaments})
+    ])
+    db.session.commit()
+"""
+    subprocess.run([sys.executable, '-c', script], cwd=backend_dir, env=env, check=True)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"gunicorn did not come up on port {port}")
+
+
+def drive(port, paths, duration, concurrency):
+    """Issues GETs for `paths` (an iterator) from `concurrency` threads for `duration` seconds."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        mine = []
+        while time.monotonic() < deadline:
+            with lock:
+                path = next(paths)
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                ok = False
+            if ok:
+                mine.append(time.perf_counter() - started)
+            else:
+                with lock:
+                    errors[0] += 1
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000 if latencies else 0
+    return len(latencies) / elapsed, pick(0.5), pick(0.99), errors[0]
+
+
+def run_profile(name, args, stub):
+    workdir = tempfile.mkdtemp(prefix=f'golf-throughput-{name}-')
+    url = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    seed_database(url, args.users, args.tournaments)
+
+    port = free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=url,
+        RAPIDAPI_BASE_URL=stub.base_url,
+        RAPIDAPI_KEY='stub',
+        RAPIDAPI_HOST='stub',
+        RAPIDAPI_MODE='live',
+        RAPIDAPI_CACHE_DIR='', # Every new field goes to the (stub) API
+    )
+    command = [sys.executable, '-m', 'gunicorn', *PROFILES[name], '--chdir', backend_dir,
+               '--bind', f'127.0.0.1:{port}', 'app:app']
+    server = subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server(port)
+        scoreboard = drive(port, itertools.repeat('/api/scoreboard'), args.duration, args.concurrency)
+        # A tournament no earlier request has opened, so each one fetches from RapidAPI and writes the field
+        fields = drive(port, (f'/api/tournaments/T{i:05d}/golfers' for i in itertools.count()),
+                       args.duration, args.concurrency)
+    finally:
+        server.terminate()
+        server.wait()
+
+    for label, (rps, p50, p99, errors) in (('scoreboard', scoreboard), ('golfers', fields)):
+        print(f"{name:>8} {label:>10}: {rps:8.1f} req/s, p50 {p50:7.1f} ms, p99 {p99:7.1f} ms, {errors} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', default='baseline,tuned')
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--tournaments', type=int, default=20000)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--latency-ms', type=float, default=200)
+    args = parser.parse_args()
+
+    stub = start_stub_server(latency=args.latency_ms / 1000)
+    print(f"{os.cpu_count()} CPU(s), {args.concurrency} clients, {args.duration:.0f}s per endpoint, "
+          f"stub RapidAPI latency {args.latency_ms:.0f} ms")
+    try:
+        for name in args.profiles.split(','):
+            run_profile(name, args, stub)
+    finally:
+        stub.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Local stub of the RapidAPI golf endpoints, serving the payload files checked into the backend directory.
+
+Run it standalone (from the backend directory), then point the app or update_earnings.py at it:
+    python benchmarks/stub_rapidapi.py --port 8099 --latency-ms 200 --fail-rate 0.1
+    RAPIDAPI_BASE_URL=http://127.0.0.1:8099 RAPIDAPI_KEY=stub RAPIDAPI_HOST=stub python update_earnings.py
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+EARNINGS_FIXTURE = 'genesis_invitational_2025_earnings.txt'
+TOURNAMENT_FIXTURE = 'this_one.txt'
+
+
+def _load(filename):
+    with open(os.path.join(backend_dir, filename), 'r') as f:
+        return json.load(f)
+
+
+class StubRapidAPI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, fail_rate=0.0, seed=None):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests_by_path = {}
+        self.failures = 0
+        self.earnings = _load(EARNINGS_FIXTURE)
+        self.tournament = _load(TOURNAMENT_FIXTURE)
+        self.schedules = {}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def schedule(self, year):
+        if year not in self.schedules:
+            try:
+                self.schedules[year] = _load(f'schedule_{year}.txt')
+            except FileNotFoundError:
+                self.schedules[year] = None
+        return self.schedules[year]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload, extra_headers=()):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in extra_headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with server.lock:
+            server.requests_by_path[url.path] = server.requests_by_path.get(url.path, 0) + 1
+            fail = server.rng.random() < server.fail_rate
+            if fail:
+                server.failures += 1
+        if server.latency:
+            time.sleep(server.latency)
+        if fail:
+            if server.rng.random() < 0.5:
+                return self._send(429, {"message": "Too many requests"}, [('Retry-After', '0')])
+            return self._send(503, {"message": "Service unavailable"})
+
+        tourn_id = params.get('tournId')
+        year = params.get('year')
+        if url.path == '/earnings':
+            payload = dict(server.earnings, tournId=tourn_id or server.earnings['tournId'], year=year or server.earnings['year'])
+            return self._send(200, payload)
+        if url.path == '/tournament':
+            payload = dict(server.tournament, tournId=tourn_id or server.tournament['tournId'], year=year or server.tournament['year'])
+            return self._send(200, payload)
+        if url.path == '/schedule':
+            payload = server.schedule(year or '2026')
+            if payload is None:
+                return self._send(404, {"message": f"No schedule for {year}"})
+            return self._send(200, payload)
+        return self._send(404, {"message": f"Unknown endpoint {url.path}"})
+
+
+def start_stub_server(host='127.0.0.1', port=0, latency=0.0, fail_rate=0.0, seed=None):
+    """Starts the stub on a daemon thread and returns the server; call `shutdown()` to stop it."""
+    server = StubRapidAPI((host, port), latency=latency, fail_rate=fail_rate, seed=seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    server = StubRapidAPI((args.host, args.port), latency=args.latency_ms / 1000, fail_rate=args.fail_rate, seed=args.seed)
+    print(f"Stub RapidAPI listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Served {server.requests_by_path}, injected {server.failures} failure(s)")
+
+
+if __name__ == '__main__':
+    main()
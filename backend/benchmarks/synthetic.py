@@ -0,0 +1,159 @@
+"""Seeded, scalable synthetic data for benchmarks, shaped like a real season.
+
+Run standalone to build a database (from the backend directory):
+    python benchmarks/synthetic.py --database-url sqlite:////tmp/golf.db --users 10000 --tournaments 40
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, backend_dir)
+
+# Share of the purse by finishing position for the first few places, then a
+# long tail; close enough to a PGA Tour payout table for realistic totals
+_TOP_SHARES = [0.18, 0.109, 0.069, 0.049, 0.041, 0.036, 0.0335, 0.031, 0.029, 0.027]
+INSERT_BATCH_SIZE = 10000
+
+
+def payout_shares(places):
+    shares = _TOP_SHARES[:places]
+    share = _TOP_SHARES[-1]
+    while len(shares) < places:
+        share *= 0.96
+        shares.append(share)
+    return shares
+
+
+def _insert(db, table, rows):
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.session.execute(db.insert(table), rows[start:start + INSERT_BATCH_SIZE])
+
+
+def generate(db, users=1000, tournaments=20, golfers=400, field_size=144, results_per_tournament=70,
+             open_tournaments=1, future_tournaments=2, participation=0.9, purse=20000000, seed=42, now=None,
+             golfer_ids=()):
+    """Writes a synthetic season through the app's models and commits it.
+
+    Weekly tournaments whose windows have closed get a field, every user's three
+    picks and a leaderboard; the open ones a field and picks; the future ones
+    nothing yet. The same arguments always produce the same data.
+
+    Call inside an app context on an empty database. `golfer_ids` are used as the
+    first golfers' ids, e.g. the player ids in the API fixtures, so that fetched
+    payloads match picked golfers. Returns a dict with the row counts and the
+    generated ids (users, past/open/future tournament ids) that benchmarks need
+    to build requests.
+    """
+    from models import Golfer, Pick, Tournament, TournamentResult, User, tournament_golfers
+    from scoring import rebuild_user_scores
+
+    if field_size > golfers:
+        raise ValueError("field_size can't exceed the number of golfers")
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+
+    golfer_ids = list(dict.fromkeys(golfer_ids))[:golfers]
+    golfer_ids += [str(20000 + i) for i in range(golfers - len(golfer_ids))]
+    _insert(db, Golfer, [{"id": g, "name": f"Golfer {g}"} for g in golfer_ids])
+
+    user_ids = [f"user{i:06d}" for i in range(users)]
+    _insert(db, User, [{
+        "id": u, "displayName": f"User {i}", "email": f"{u}@example.com",
+        "display_name_normalized": f"user {i}", "email_normalized": f"{u}@example.com",
+    } for i, u in enumerate(user_ids)])
+
+    # One event a week with a three day submission window. The open tournaments'
+    # windows contain `now`; past and future ones are whole weeks either side.
+    this_week = (now - timedelta(days=1)).replace(microsecond=0)
+    schedule = []
+    for offset in range(-tournaments, open_tournaments + future_tournaments):
+        if offset < 0:
+            kind, weeks = 'past', offset
+        elif offset < open_tournaments:
+            kind, weeks = 'open', 0
+        else:
+            kind, weeks = 'future', offset - open_tournaments + 1
+        start = this_week + timedelta(weeks=weeks)
+        schedule.append((f"S{offset + tournaments:04d}", kind, start, start + timedelta(days=3)))
+    _insert(db, Tournament, [{
+        "id": t, "name": f"Synthetic Open {t}", "year": start.year,
+        "submission_start": start, "submission_end": end,
+        "golfers_last_updated": now if kind != 'future' else None,
+        "purse": purse, "winners_share": int(purse * _TOP_SHARES[0]),
+    } for t, kind, start, end in schedule])
+
+    fields = {}
+    for t, kind, _, _ in schedule:
+        if kind != 'future':
+            fields[t] = rng.sample(golfer_ids, field_size)
+    _insert(db, tournament_golfers, [
+        {"tournament_id": t, "golfer_id": g} for t, field in fields.items() for g in field
+    ])
+
+    results = []
+    shares = payout_shares(min(results_per_tournament, field_size))
+    for t, kind, _, _ in schedule:
+        if kind == 'past':
+            finishers = rng.sample(fields[t], len(shares))
+            results.extend({"tournament_id": t, "golfer_id": g, "earnings": int(purse * share)}
+                           for g, share in zip(finishers, shares))
+    _insert(db, TournamentResult, results)
+
+    picks = []
+    for u in user_ids:
+        used = set()
+        for t, kind, start, _ in schedule:
+            if kind == 'future' or rng.random() >= participation:
+                continue
+            choices = [g for g in rng.sample(fields[t], min(12, field_size)) if g not in used][:3]
+            if len(choices) < 3:
+                continue
+            used.update(choices)
+            picks.extend({"user_id": u, "tournament_id": t, "season": start.year, "golfer_id": g} for g in choices)
+    _insert(db, Pick, picks)
+
+    rebuild_user_scores(db.session)
+    db.session.commit()
+    return {
+        "users": user_ids,
+        "golfers": golfer_ids,
+        "past": [t for t, kind, _, _ in schedule if kind == 'past'],
+        "open": [t for t, kind, _, _ in schedule if kind == 'open'],
+        "future": [t for t, kind, _, _ in schedule if kind == 'future'],
+        "picks": len(picks),
+        "results": len(results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', required=True)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tournaments', type=int, default=20, help="Past tournaments")
+    parser.add_argument('--golfers', type=int, default=400)
+    parser.add_argument('--field-size', type=int, default=144)
+    parser.add_argument('--results-per-tournament', type=int, default=70)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url
+    from app import app, db
+    from migrations import upgrade
+    with app.app_context():
+        db.create_all()
+        upgrade(db.session)
+        started = time.perf_counter()
+        summary = generate(db, users=args.users, tournaments=args.tournaments, golfers=args.golfers,
+                           field_size=args.field_size, results_per_tournament=args.results_per_tournament,
+                           seed=args.seed)
+    print(f"Generated {args.users} users, {len(summary['past'])} past / {len(summary['open'])} open / "
+          f"{len(summary['future'])} future tournaments, {summary['picks']} picks and {summary['results']} "
+          f"results in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""Command line tools for cron jobs and deploys, without the Flask app.
+
+    python cli.py init-db                         create tables, apply migrations, populate scores
+    python cli.py load-schedule schedule_2026.txt [--events all]
+    python cli.py backfill-earnings [--season 2025 | --lookback-days 7] [--force]
+    python cli.py prewarm-fields [TOURNAMENT_ID ...] [--days 7] [--force]
+    python cli.py build-archive                   rebuild the golfer earnings archive
+"""
+import argparse
+import os
+import sys
+
+
+# Each command imports what it uses inside the command, so a cron run doesn't pay
+# for Flask or for the other commands' dependencies
+def init_db(args):
+    from init_db import main
+    main()
+
+
+def load_schedule(args):
+    from sqlalchemy.orm import Session
+
+    from database import create_engine
+    from jsonstream import expand_paths
+    from schedule import DEFAULT_EVENTS, EventSelector, read_schedule_events, tournament_rows, upsert_tournaments
+    from versions import open_versions
+
+    select_event = EventSelector(args.events or os.getenv('SCHEDULE_EVENTS', DEFAULT_EVENTS))
+    rows = []
+    for spec in args.paths:
+        paths = expand_paths(os.path.abspath(spec), os.sep) # Relative to the current directory
+        if not paths:
+            print(f"{spec} not found")
+            return 1
+        for path in paths:
+            try:
+                year, events = read_schedule_events(path, select_event)
+            except ValueError as e:
+                print(f"Skipping {path}: {e}") # Not a schedule payload
+                continue
+            rows.extend(tournament_rows(year, events))
+
+    # Every selected event from every file is written in one transaction
+    engine = create_engine()
+    try:
+        with Session(engine) as session:
+            loaded_count, updated_count = upsert_tournaments(session, rows)
+            session.commit()
+    finally:
+        engine.dispose()
+    open_versions().bump('tournaments')
+    print(f"Loaded {loaded_count} new tournaments and updated {updated_count} existing ones.")
+
+
+def backfill_earnings(args):
+    from update_earnings import update_recent_tournament_earnings
+    options = {name: getattr(args, name) for name in ('lookback_days', 'season') if getattr(args, name) is not None}
+    if args.workers is not None:
+        options['workers'] = max(1, args.workers)
+    update_recent_tournament_earnings(force=args.force, **options)
+
+
+def prewarm_fields(args):
+    from datetime import datetime, timedelta
+
+    import requests
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+
+    from database import create_engine
+    from fields import claim_field_refresh, field_is_fresh, refresh_tournament_field, release_field_refresh
+    from models import Tournament
+    from rapidapi import RapidAPIClient
+    from versions import open_versions
+
+    client = RapidAPIClient.from_env()
+    if not client.configured:
+        print("Error: RapidAPI key or host not configured in environment variables.")
+        return 1
+
+    now = datetime.utcnow()
+    query = select(Tournament).order_by(Tournament.submission_start)
+    if args.tournament_ids:
+        query = query.where(Tournament.id.in_(args.tournament_ids))
+    else:
+        # Open for picks now, or opening within --days
+        query = query.where(Tournament.submission_end >= now,
+                            Tournament.submission_start <= now + timedelta(days=args.days))
+
+    engine = create_engine()
+    refreshed, failed = 0, 0
+    try:
+        with Session(engine) as session, client:
+            for tournament in session.scalars(query).all():
+                if not args.force and field_is_fresh(tournament, now):
+                    print(f"Field for {tournament.name} ({tournament.id}) is up to date.")
+                    continue
+                if not claim_field_refresh(session, tournament.id):
+                    print(f"Field for {tournament.id} is being refreshed by another process. Skipping.")
+                    continue
+                try:
+                    count = refresh_tournament_field(session, client, tournament)
+                except requests.exceptions.RequestException as e:
+                    session.rollback()
+                    print(f"Error fetching the field for tournament {tournament.id}: {e}")
+                    failed += 1
+                    continue
+                finally:
+                    release_field_refresh(session, tournament.id)
+                if count is None:
+                    print(f"Warning: No players found for tournament {tournament.id} from external API.")
+                    continue
+                refreshed += 1
+                print(f"Stored a field of {count} golfers for {tournament.name} ({tournament.id}).")
+    finally:
+        engine.dispose()
+    if refreshed:
+        open_versions().bump('fields')
+    return 1 if failed else 0
+
+
+def build_archive(args):
+    from sqlalchemy.orm import Session
+
+    from database import create_engine
+    from earnings_archive import open_earnings_archive
+    from versions import open_versions
+
+    archive = open_earnings_archive()
+    engine = create_engine()
+    try:
+        with Session(engine) as session:
+            built = archive.refresh(session) # Every tournament, from scratch
+    finally:
+        engine.dispose()
+    if not built:
+        return 1
+    open_versions().bump('results')
+    generation = archive.current()
+    print(f"Archived {len(generation.tournaments)} tournaments and {len(generation.golfer_ids)} golfers "
+          f"in {archive.directory}.")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('init-db', help="create tables, apply migrations and populate user scores")
+    command.set_defaults(run=init_db)
+
+    command = commands.add_parser('load-schedule', help="load /schedule payload files into tournaments")
+    command.add_argument('paths', nargs='+', help="schedule files, globs or directories")
+    command.add_argument('--events', help="which events become tournaments: majors, all, stroke or a list "
+                                          "of names/ids (default: SCHEDULE_EVENTS, else majors)")
+    command.set_defaults(run=load_schedule)
+
+    # Defaults live in update_earnings.py; they are read there, lazily
+    command = commands.add_parser('backfill-earnings', help="fetch and store earnings for ended tournaments")
+    command.add_argument('--lookback-days', type=int, help="how far back to look for ended tournaments "
+                                                           "(default: EARNINGS_LOOKBACK_DAYS, else 7)")
+    command.add_argument('--season', type=int, help="every ended tournament of this year instead")
+    command.add_argument('--workers', type=int, help="maximum concurrent API requests "
+                                                     "(default: EARNINGS_FETCH_WORKERS, else 8)")
+    command.add_argument('--force', action='store_true', help="refetch tournaments that already have results")
+    command.set_defaults(run=backfill_earnings)
+
+    command = commands.add_parser('prewarm-fields', help="fetch the fields of open and upcoming tournaments")
+    command.add_argument('tournament_ids', nargs='*', metavar='TOURNAMENT_ID',
+                         help="only these tournaments (default: open now or opening within --days)")
+    command.add_argument('--days', type=int, default=7)
+    command.add_argument('--force', action='store_true', help="refetch fields that are still fresh")
+    command.set_defaults(run=prewarm_fields)
+
+    command = commands.add_parser('build-archive', help="rebuild the golfer earnings archive from the database")
+    command.set_defaults(run=build_archive)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    from dotenv import load_dotenv
+    load_dotenv()
+    return args.run(args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Engine profiles shared by the Flask app and the cron scripts: WAL pragmas for SQLite, pooling for PostgreSQL."""
+import os
+
+import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from metrics import track_queries
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+DEFAULT_DATABASE_URL = 'sqlite:///' + os.path.join(basedir, 'golf_app.db')
+
+
+def database_url():
+    return os.getenv('DATABASE_URL', DEFAULT_DATABASE_URL)
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def sqlite_pragmas():
+    """The PRAGMA statements run on every new SQLite connection, in order."""
+    # WAL keeps readers from waiting behind the writer, and synchronous=NORMAL is
+    # safe under it; a busy timeout replaces an immediate "database is locked"
+    pragmas = []
+    if os.getenv('SQLITE_WAL', '1') not in ('0', 'false'):
+        pragmas.append("PRAGMA journal_mode=WAL")
+    pragmas += [
+        f"PRAGMA synchronous={os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')}",
+        f"PRAGMA busy_timeout={_env_int('SQLITE_BUSY_TIMEOUT_MS', 5000)}",
+        f"PRAGMA mmap_size={_env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)}",
+        f"PRAGMA cache_size={_env_int('SQLITE_CACHE_SIZE', -64 * 1024)}",
+    ]
+    return pragmas
+
+
+def engine_options(url=None):
+    """Keyword arguments for `create_engine` (or SQLALCHEMY_ENGINE_OPTIONS) for `url`."""
+    url = make_url(url or database_url())
+    if url.get_backend_name() == 'sqlite':
+        # pysqlite's own lock wait; matches the busy_timeout pragma
+        return {"connect_args": {"timeout": _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000}}
+    # A pool per process for PostgreSQL (needs a driver such as psycopg2)
+    return {
+        "pool_size": _env_int('DB_POOL_SIZE', 5),
+        "max_overflow": _env_int('DB_MAX_OVERFLOW', 10),
+        "pool_timeout": _env_int('DB_POOL_TIMEOUT', 30),
+        "pool_recycle": _env_int('DB_POOL_RECYCLE', 1800),
+        "pool_pre_ping": True,
+    }
+
+
+def configure_engine(engine):
+    """Attaches query metrics and the per-connection setup for the engine's dialect. Returns the engine."""
+    track_queries(engine)
+    if engine.dialect.name == 'sqlite':
+        pragmas = sqlite_pragmas()
+
+        @event.listens_for(engine, 'connect')
+        def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+    return engine
+
+
+def create_engine(url=None, **overrides):
+    """A configured engine for `url` (default: DATABASE_URL)."""
+    url = url or database_url()
+    options = dict(engine_options(url), **overrides)
+    return configure_engine(sqlalchemy.create_engine(url, **options))
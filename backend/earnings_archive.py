@@ -0,0 +1,224 @@
+"""Golfer earnings, starts and made cuts as memory-mapped running totals, for constant-time statistics."""
+import fcntl
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+from sqlalchemy import select
+
+from models import Tournament, TournamentResult, tournament_golfers
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+FORM_TOURNAMENTS = 8 # The most recent tournaments with results, for form
+# Tournaments are rows, in the order played, and golfers are columns; row t holds
+# the totals over the tournaments before it. A start is a result or a place in
+# the field, and a made cut is a start that paid.
+_COLUMNS = {'earnings': np.int64, 'starts': np.int32, 'cuts': np.int32}
+_MANIFEST = 'manifest.json'
+
+
+class _Generation:
+    """One consistent version of the archive, memory-mapped."""
+
+    def __init__(self, directory, manifest):
+        self.number = manifest['generation']
+        self.tournaments = manifest['tournaments'] # [id, year, submission_end] in the order played
+        self.golfer_ids = manifest['golfers']
+        self.golfer_index = {golfer_id: g for g, golfer_id in enumerate(self.golfer_ids)}
+        path = os.path.join(directory, f"gen-{self.number}")
+        self.totals = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in _COLUMNS}
+        # Rows of each season, first and last + 1
+        self.seasons = {}
+        for row, (_, year, _) in enumerate(self.tournaments):
+            self.seasons[year] = (self.seasons.get(year, (row,))[0], row + 1)
+
+    def stats(self, golfer_ids, season=None):
+        """Season, form and career statistics per golfer, in the order of `golfer_ids`.
+
+        The season defaults to the latest one with results. Golfers who aren't
+        in the archive have no starts.
+        """
+        if season is None:
+            season = max(self.seasons, default=None)
+        rows = len(self.tournaments)
+        windows = {
+            "season": self.seasons.get(season, (0, 0)),
+            "form": (max(rows - FORM_TOURNAMENTS, 0), rows),
+            "career": (0, rows),
+        }
+        columns = np.array([self.golfer_index.get(golfer_id, -1) for golfer_id in golfer_ids], dtype=np.intp)
+        known = columns >= 0
+        columns = np.where(known, columns, 0)
+        sums = {}
+        for window, (first, last) in windows.items():
+            for name, totals in self.totals.items():
+                if len(self.golfer_ids):
+                    sums[window, name] = np.where(known, totals[last, columns] - totals[first, columns], 0).tolist()
+                else:
+                    sums[window, name] = [0] * len(golfer_ids)
+
+        def summary(window, i):
+            earnings, starts, cuts = (sums[window, name][i] for name in _COLUMNS)
+            return {
+                "earnings": earnings,
+                "starts": starts,
+                "cuts_made": cuts,
+                "average_earnings": round(earnings / starts) if starts else None,
+                "made_cut_rate": round(cuts / starts, 3) if starts else None,
+            }
+        return [{
+            "golfer_id": golfer_id,
+            "season": {"year": season, **summary("season", i)},
+            "form": {"tournaments": windows["form"][1] - windows["form"][0], **summary("form", i)},
+            "career": summary("career", i),
+        } for i, golfer_id in enumerate(golfer_ids)]
+
+
+class EarningsArchive:
+    """The archive in `directory`, one generation of files per refresh.
+
+    A refresh re-reads only the tournaments it is given and recomputes the
+    running totals from the first changed row. It writes the new generation
+    under a file lock, then swaps the manifest, so readers move over on their
+    next `current()`.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self._generation = None
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """The latest generation, or None if the archive hasn't been built yet."""
+        path = os.path.join(self.directory, _MANIFEST)
+        for _ in range(2): # A generation may be removed between reading the manifest and mapping it
+            try:
+                stat = os.stat(path)
+                stamp = (stat.st_ino, stat.st_mtime_ns)
+                if stamp == self._stamp:
+                    return self._generation
+                with self._lock:
+                    if stamp != self._stamp:
+                        with open(path) as f:
+                            self._generation = _Generation(self.directory, json.load(f))
+                        self._stamp = stamp
+                return self._generation
+            except FileNotFoundError:
+                continue
+        return None
+
+    def refresh(self, session, tournament_ids=None):
+        """Brings the archive up to date with the results of `tournament_ids`, or rebuilds it.
+
+        Call after committing the results. Returns False, with a warning, if the
+        archive couldn't be written; statistics are then served from the
+        previous generation until a later refresh succeeds.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd = os.open(os.path.join(self.directory, '.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX)
+                previous = self.current()
+                if previous is None:
+                    tournament_ids = None # Nothing to update; build it all
+                self._write(session, previous, tournament_ids)
+            finally:
+                os.close(fd) # Releases the lock
+        except (OSError, ValueError) as e:
+            print(f"Warning: earnings archive not updated in {self.directory}: {e}")
+            return False
+        self.current()
+        return True
+
+    def _write(self, session, previous, tournament_ids):
+        connection = session.connection() # Core rows; a full build reads every result
+        changed = None if tournament_ids is None else set(tournament_ids)
+        scored = select(TournamentResult.tournament_id).distinct()
+        query = select(Tournament.id, Tournament.year, Tournament.submission_end).where(Tournament.id.in_(scored))
+        if changed is not None:
+            query = query.where(Tournament.id.in_(list(changed)))
+        entries = [[tournament_id, year, submission_end.isoformat()]
+                   for tournament_id, year, submission_end in connection.execute(query)]
+
+        # Earnings and starts of the changed tournaments (all of them for a full build)
+        rows = {tournament_id: ({}, set()) for tournament_id, _, _ in entries}
+        if rows:
+            results = select(TournamentResult.tournament_id, TournamentResult.golfer_id, TournamentResult.earnings)
+            field = select(tournament_golfers.c.tournament_id, tournament_golfers.c.golfer_id)
+            if changed is not None:
+                results = results.where(TournamentResult.tournament_id.in_(list(rows)))
+                field = field.where(tournament_golfers.c.tournament_id.in_(list(rows)))
+            for tournament_id, golfer_id, earnings in connection.execute(results):
+                rows[tournament_id][0][golfer_id] = earnings or 0
+            for tournament_id, golfer_id in connection.execute(field):
+                if tournament_id in rows:
+                    rows[tournament_id][1].add(golfer_id)
+
+        kept = [entry for entry in previous.tournaments if entry[0] not in changed] if changed is not None else []
+        tournaments = sorted(kept + entries, key=lambda entry: (entry[2], entry[0]))
+        old_ids = [entry[0] for entry in previous.tournaments] if previous else []
+        new_ids = [entry[0] for entry in tournaments]
+        first = 0 # Rows before this one are the same tournaments with the same results
+        if changed is not None:
+            while first < min(len(old_ids), len(new_ids)) and old_ids[first] == new_ids[first] \
+                    and new_ids[first] not in changed:
+                first += 1
+
+        # Columns stay in golfer id order, so a refresh writes the same files a full build would
+        old_golfers = previous.golfer_ids if changed is not None else []
+        golfer_ids = sorted(set(old_golfers).union(
+            golfer_id for earnings, started in rows.values() for golfer_id in (*earnings, *started)))
+        golfer_index = {golfer_id: g for g, golfer_id in enumerate(golfer_ids)}
+        old_columns = np.array([golfer_index[golfer_id] for golfer_id in old_golfers], dtype=np.intp)
+        old_row = {tournament_id: row for row, tournament_id in enumerate(old_ids)}
+
+        totals = {}
+        for name, dtype in _COLUMNS.items():
+            array = np.zeros((len(tournaments) + 1, len(golfer_ids)), dtype=dtype)
+            if first:
+                old = previous.totals[name]
+                array[:first + 1, old_columns] = old[:first + 1]
+            totals[name] = array
+        for row in range(first, len(tournaments)):
+            tournament_id = new_ids[row]
+            deltas = {name: totals[name][row + 1] for name in _COLUMNS} # Filled in, then accumulated
+            if tournament_id in rows:
+                earnings, started = rows[tournament_id]
+                if earnings:
+                    paid = np.array([golfer_index[g] for g in earnings], dtype=np.intp)
+                    amounts = np.fromiter(earnings.values(), dtype=np.int64, count=len(earnings))
+                    deltas['earnings'][paid] = amounts
+                    deltas['cuts'][paid] = amounts > 0
+                played = started.union(earnings)
+                if played:
+                    deltas['starts'][[golfer_index[g] for g in played]] = 1
+            else:
+                old = old_row[tournament_id]
+                for name in _COLUMNS:
+                    deltas[name][old_columns] = previous.totals[name][old + 1] - previous.totals[name][old]
+            for name in _COLUMNS:
+                deltas[name] += totals[name][row]
+
+        number = previous.number + 1 if previous else 1
+        path = os.path.join(self.directory, f"gen-{number}")
+        shutil.rmtree(path, ignore_errors=True) # Left by a refresh that failed part way
+        os.makedirs(path)
+        for name, array in totals.items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+        manifest = os.path.join(self.directory, _MANIFEST)
+        with open(manifest + '.tmp', 'w') as f:
+            json.dump({"generation": number, "tournaments": tournaments, "golfers": golfer_ids}, f)
+        os.replace(manifest + '.tmp', manifest)
+
+        # The previous generation stays for readers that are still switching over
+        for entry in os.listdir(self.directory):
+            if entry.startswith('gen-') and entry not in (f"gen-{number}", f"gen-{number - 1}"):
+                shutil.rmtree(os.path.join(self.directory, entry), ignore_errors=True)
+
+
+def open_earnings_archive(directory=None):
+    return EarningsArchive(directory or os.getenv('EARNINGS_ARCHIVE_DIR', os.path.join(basedir, '.earnings_archive')))
@@ -0,0 +1,94 @@
+"""Tournament fields: fetching and storing them, and the lease that lets one process refresh a field at a time."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from ingest import dialect_insert
+from models import Golfer, Tournament, tournament_golfers
+
+# A field is refreshed from RapidAPI at most once a day (golfers_last_updated)
+GOLFER_FIELD_MAX_AGE = timedelta(days=1)
+FIELD_REFRESH_LEASE = timedelta(seconds=60)
+
+
+def field_is_fresh(tournament, now=None):
+    updated = tournament.golfers_last_updated
+    return updated is not None and (now or datetime.utcnow()) - updated < GOLFER_FIELD_MAX_AGE
+
+
+def claim_field_refresh(session, tournament_id):
+    """Atomically takes the refresh lease for a tournament field. True if we got it."""
+    now = datetime.utcnow()
+    claimed = session.execute(
+        update(Tournament)
+          .where(Tournament.id == tournament_id)
+          .where(Tournament.golfers_refresh_lease_until.is_(None) | (Tournament.golfers_refresh_lease_until < now))
+          .values(golfers_refresh_lease_until=now + FIELD_REFRESH_LEASE)
+    ).rowcount == 1
+    session.commit()
+    return claimed
+
+
+def release_field_refresh(session, tournament_id):
+    session.execute(
+        update(Tournament).where(Tournament.id == tournament_id).values(golfers_refresh_lease_until=None)
+    )
+    session.commit()
+
+
+def field_players(payload):
+    """{golfer_id: name} from a `/tournament` payload, or None if it lists no players."""
+    if 'players' not in payload:
+        return None
+    players = {}
+    for player in payload['players']:
+        full_name = f"{player.get('firstName', '')} {player.get('lastName', '')}".strip()
+        players[player['playerId']] = full_name
+    return players
+
+
+def store_tournament_field(session, tournament_id, players):
+    """Makes tournament_golfers match `players` ({golfer_id: name}) with set-based writes.
+
+    Unknown golfers are bulk-inserted, and only the association rows that were
+    added or dropped since the last refresh are written.
+    """
+    if players:
+        known = {golfer_id for (golfer_id,) in session.execute(
+            select(Golfer.id).where(Golfer.id.in_(list(players)))
+        )}
+        missing = [{"id": golfer_id, "name": name} for golfer_id, name in players.items() if golfer_id not in known]
+        if missing:
+            # Another process refreshing a different tournament may insert the same golfer
+            session.execute(dialect_insert(session)(Golfer).values(missing).on_conflict_do_nothing())
+
+    current = {golfer_id for (golfer_id,) in session.execute(
+        select(tournament_golfers.c.golfer_id).where(tournament_golfers.c.tournament_id == tournament_id)
+    )}
+    dropped = current - players.keys()
+    added = players.keys() - current
+    if dropped:
+        session.execute(tournament_golfers.delete().where(
+            tournament_golfers.c.tournament_id == tournament_id,
+            tournament_golfers.c.golfer_id.in_(dropped)
+        ))
+    if added:
+        session.execute(tournament_golfers.insert(), [
+            {"tournament_id": tournament_id, "golfer_id": golfer_id} for golfer_id in added
+        ])
+
+
+def refresh_tournament_field(session, client, tournament):
+    """Fetches `tournament`'s field with the RapidAPI `client`, stores it and commits.
+
+    Returns the number of players, or None when the API lists none (nothing is
+    written then). Errors from the API propagate; the caller rolls back and
+    bumps the 'fields' version after a successful refresh.
+    """
+    players = field_players(client.tournament(tournament.tourn_id, tournament.year))
+    if players is None:
+        return None
+    store_tournament_field(session, tournament.id, players)
+    tournament.golfers_last_updated = datetime.utcnow()
+    session.commit()
+    return len(players)
@@ -0,0 +1,89 @@
+"""Gunicorn settings for the backend (`gunicorn -c gunicorn.conf.py app:app`).
+
+Environment overrides:
+    PORT / GUNICORN_BIND     default 0.0.0.0:5000
+    GUNICORN_WORKERS         default (2 x CPUs) + 1
+    GUNICORN_THREADS         default 4 request threads (used by gthread)
+    GUNICORN_WORKER_CLASS    gthread (default), sync, or gevent for the
+                             I/O-bound RapidAPI endpoints (needs `pip install gevent`)
+    GUNICORN_WORKER_CONNECTIONS  default 100 (gevent)
+    GUNICORN_MAX_REQUESTS    default 1000, 0 disables recycling
+    GUNICORN_TIMEOUT         default 30 seconds
+    GUNICORN_PRELOAD         set to 0 to import the app in each worker instead
+    JOB_SCHEDULER            set to 0 to keep background jobs out of the workers
+                             (then run them with `flask run-jobs`)
+    LIVE_STREAM_THREADS      default 64 extra gthread threads per worker, for live
+                             scoreboard streams only
+    LIVE_MAX_STREAMS         live scoreboard streams per worker; defaults to
+                             LIVE_STREAM_THREADS (gthread), half the connections
+                             (gevent) or 0 (sync, which can't hold a stream)
+    METRICS_DIR              where workers share their metrics, default backend/.metrics
+    PROJECTION_FILE          where the projection job leaves the standings projection
+                             for every worker, default backend/.projection.json
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+
+# Threads per worker, so requests waiting on RapidAPI or a database lock don't hold up the worker
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 100))
+
+# Restart each worker after roughly this many requests; the jitter keeps them
+# from all restarting at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Imported once in the master, then forked
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') not in ('0', 'false')
+
+# Each live scoreboard stream (/api/live/scoreboard) holds a thread for as long
+# as the client stays connected. Under gthread, streams get their own thread
+# budget on top of the request threads, and the cap keeps them from taking the
+# request threads. An idle stream thread costs memory (its stack) rather than
+# CPU, so the budget is a memory trade-off: 64 streams per worker, times the
+# workers, per host. For thousands of streams per host use gevent, where a
+# stream is a greenlet. A sync worker serves one request at a time, so a stream
+# would block it; the live endpoint answers 503 there. Read by app.py at import.
+stream_threads = int(os.getenv('LIVE_STREAM_THREADS', 64))
+if worker_class == 'gevent':
+    os.environ.setdefault('LIVE_MAX_STREAMS', str(worker_connections // 2))
+elif worker_class == 'gthread':
+    threads += stream_threads
+    worker_connections = max(worker_connections, threads) # gthread caps open connections with it
+    os.environ.setdefault('LIVE_MAX_STREAMS', str(stream_threads))
+else:
+    os.environ.setdefault('LIVE_MAX_STREAMS', '0')
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') # e.g. '-' for stdout; off by default
+errorlog = '-'
+
+if worker_class == 'gevent':
+    # Patch before the app (and requests/urllib3) is preloaded in the master,
+    # otherwise RapidAPI calls would still block the whole worker
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def post_fork(server, worker):
+    # Connections opened in the master while preloading must not be shared
+    # between workers; drop them so each worker opens its own
+    if preload_app:
+        from app import app, db
+        with app.app_context():
+            db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    # Threads don't survive fork, so each worker starts its own job scheduler
+    # and the thread that shares its metrics with the others
+    from app import metrics_store, start_job_scheduler
+    start_job_scheduler()
+    metrics_store.start()
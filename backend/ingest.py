@@ -0,0 +1,153 @@
+"""Set-based upserts of leaderboards into `tournament_result`, shared by app.py, update_earnings.py and cli.py."""
+import os
+
+from sqlalchemy import column, table, text
+
+from jsonstream import FIELD, ITEM, iter_members
+from live import record_score_changes
+from schedule import find_tournament_id
+from scoring import refresh_scores_for_tournament
+
+# Lightweight table construct so this module works with either set of models
+tournament_result = table(
+    'tournament_result',
+    column('tournament_id'),
+    column('golfer_id'),
+    column('earnings'),
+)
+
+RESULT_UNIQUE_INDEX = 'uq_tournament_result_tournament_golfer'
+
+# Three bound parameters per row keeps each statement well under SQLite's limit
+UPSERT_CHUNK_SIZE = 500
+
+# Leaderboard rows held in memory before they are written, when streaming earnings files
+INGEST_BATCH_SIZE = 1000
+
+
+def parse_leaderboard(leaderboard):
+    """Extracts `{golfer_id: earnings}` from a RapidAPI `/earnings` leaderboard.
+
+    Rows without a player ID or earnings are skipped. If a golfer appears more
+    than once, the last row wins.
+    """
+    earnings_by_golfer = {}
+    for player_result in leaderboard or []:
+        golfer_id = player_result.get('playerId')
+        # The earnings are nested, so we need to be careful
+        earnings = (player_result.get('earnings') or {}).get('$numberInt')
+        if not golfer_id or earnings is None:
+            continue
+        earnings_by_golfer[golfer_id] = int(earnings)
+    return earnings_by_golfer
+
+
+def dialect_insert(session):
+    """The dialect-specific `insert` construct that supports ON CONFLICT clauses."""
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Bulk upsert is not supported for the '{dialect}' dialect")
+    return insert
+
+
+def upsert_tournament_results(session, tournament_id, leaderboard):
+    """Writes a tournament's leaderboard in set-based upsert statements.
+
+    Returns the number of golfers written. The caller is responsible for
+    committing.
+    """
+    earnings_by_golfer = parse_leaderboard(leaderboard)
+    rows = [
+        {"tournament_id": tournament_id, "golfer_id": golfer_id, "earnings": earnings}
+        for golfer_id, earnings in earnings_by_golfer.items()
+    ]
+    if not rows:
+        return 0
+
+    insert = dialect_insert(session)
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = insert(tournament_result).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['tournament_id', 'golfer_id'],
+            set_={"earnings": stmt.excluded.earnings},
+        )
+        session.execute(stmt)
+    return len(rows)
+
+
+def ensure_tournament_result_unique_index(session):
+    """Adds the (tournament_id, golfer_id) unique index to an existing database.
+
+    Duplicate rows left behind by the old per-row upsert are removed first,
+    keeping the most recently inserted one. Safe to run repeatedly.
+    """
+    session.execute(text("""
+        DELETE FROM tournament_result
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM tournament_result GROUP BY tournament_id, golfer_id
+        )
+    """))
+    session.execute(text(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {RESULT_UNIQUE_INDEX} "
+        "ON tournament_result (tournament_id, golfer_id)"
+    ))
+
+
+def ingest_earnings_file(session, path, batch_size=INGEST_BATCH_SIZE):
+    """Streams an `/earnings` payload file into `tournament_result`.
+
+    The leaderboard is parsed incrementally and written in batches of
+    `batch_size` rows, so memory stays flat regardless of file size. The whole
+    file is one transaction, committed with the user score refresh once the
+    last batch is written: a file that fails partway writes nothing. The file's
+    `tournId` and `year` pick the stored tournament.
+
+    Returns `(tournament_id, golfers_written)`. Raises ValueError if the file
+    has no `tournId` or its tournament hasn't been loaded.
+    """
+    tourn_id = None
+    year = None
+    tournament_id = None
+    pending = []
+    written = 0
+
+    def flush():
+        nonlocal tournament_id, written
+        if tournament_id is None:
+            tournament_id = find_tournament_id(session, tourn_id, year)
+            if tournament_id is None:
+                raise ValueError(f"Tournament {tourn_id} ({year or 'any season'}) from "
+                                 f"{os.path.basename(path)} has not been loaded; load its schedule first")
+        written += upsert_tournament_results(session, tournament_id, pending)
+        pending.clear()
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for kind, key, value in iter_members(f, {'leaderboard'}):
+                if kind == FIELD and key == 'tournId':
+                    tourn_id = value
+                elif kind == FIELD and key == 'year':
+                    year = value
+                elif kind == ITEM:
+                    pending.append(value)
+                    # Rows seen before the tournId are held until it turns up
+                    if tourn_id is not None and len(pending) >= batch_size:
+                        flush()
+
+        if tourn_id is None:
+            raise ValueError(f"Tournament ID not found in earnings file {os.path.basename(path)}")
+        if pending:
+            flush()
+        elif not written:
+            raise ValueError(f"No leaderboard found in earnings file {os.path.basename(path)}")
+        changes = refresh_scores_for_tournament(session, tournament_id)
+        record_score_changes(session, tournament_id, changes)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return tournament_id, written
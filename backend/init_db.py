@@ -1,6 +1,66 @@
-from app import app, db
+"""Brings the database up to the current schema; run by docker-entrypoint.sh on every container start."""
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
 
-with app.app_context():
-    print("Creating all database tables...")
-    db.create_all()
-    print("All database tables created successfully.")
\ No newline at end of file
+from database import create_engine
+from migrations import schema_is_current
+from scoring import user_scores_need_rebuild
+
+load_dotenv()
+
+
+def database_is_ready():
+    engine = create_engine()
+    try:
+        with Session(engine) as session:
+            return schema_is_current(session) and not user_scores_need_rebuild(session)
+    finally:
+        engine.dispose()
+
+
+def initialize():
+    # Only imported when database_is_ready() says there is work to do, so the
+    # usual start, on a current database, never loads the models
+    from migrations import upgrade
+    from models import metadata
+    from scoring import rebuild_user_scores
+    from versions import DOMAINS, open_versions
+
+    engine = create_engine()
+    try:
+        print("Creating all database tables...")
+        metadata.create_all(engine)
+        print("All database tables created successfully.")
+
+        with Session(engine) as session:
+            # Bring databases created by older versions up to the current schema
+            applied = upgrade(session)
+            session.commit()
+            print(f"Applied migrations: {applied}" if applied else "Schema is up to date.")
+
+            if user_scores_need_rebuild(session):
+                print("Populating user scores...")
+                count = rebuild_user_scores(session)
+                session.commit()
+                print(f"User scores populated for {count} users.")
+    finally:
+        engine.dispose()
+
+    # Anything above may have rewritten data that clients hold cached copies of
+    open_versions().bump(*DOMAINS)
+
+
+def main():
+    from migrations import DuplicatePicksError
+
+    if database_is_ready():
+        print("Database schema is up to date.")
+        return
+    try:
+        initialize()
+    except DuplicatePicksError as e:
+        raise SystemExit(f"Error: {e}")
+
+
+if __name__ == '__main__':
+    main()
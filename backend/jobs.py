@@ -0,0 +1,249 @@
+"""Persistent background jobs in the `job` table, leased to and run by the app's own processes."""
+import json
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text, bindparam, text
+
+from metrics import begin_scope, counter, end_scope, histogram
+
+metadata = MetaData()
+
+job = Table(
+    'job', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('kind', String, nullable=False),
+    Column('key', String, nullable=False),
+    Column('status', String, nullable=False, default='pending'), # pending, running, done or failed
+    Column('run_at', DateTime, nullable=False),
+    Column('attempts', Integer, nullable=False, default=0), # Failures in a row, counting a running attempt
+    Column('lease_until', DateTime),
+    Column('leased_by', String),
+    Column('state', Text), # JSON kept between runs of a rescheduled job
+    Column('last_error', Text),
+    Column('updated_at', DateTime),
+    Index('uq_job_kind_key', 'kind', 'key', unique=True),
+    Index('ix_job_due', 'status', 'run_at'),
+)
+
+
+job_runs = counter('golf_job_runs_total', "Background job runs by outcome", ['kind', 'outcome'])
+job_run_seconds = histogram('golf_job_run_duration_seconds', "Background job run time", ['kind'])
+
+
+def _datetimes(*names):
+    # Bind datetimes the way the DateTime columns store them
+    return [bindparam(name, type_=DateTime) for name in names]
+
+
+# New jobs are added as pending; a job that is still pending and has never
+# failed follows its planned time (e.g. when a tournament is moved). A finished
+# job's run_at is when it finished, so planning it for later than that (the
+# event was moved, or its key came round again) starts it afresh.
+_PLAN_SQL = text("""
+    INSERT INTO job (kind, key, status, run_at, attempts, updated_at)
+    VALUES (:kind, :key, 'pending', :run_at, 0, :now)
+    ON CONFLICT (kind, key) DO UPDATE SET
+        status = 'pending', run_at = excluded.run_at, attempts = 0, state = NULL, last_error = NULL,
+        updated_at = excluded.updated_at
+    WHERE (job.status = 'pending' AND job.attempts = 0 AND job.state IS NULL AND job.run_at != excluded.run_at)
+       OR (job.status IN ('done', 'failed') AND job.run_at < excluded.run_at)
+""").bindparams(*_datetimes('run_at', 'now'))
+
+_DUE_SQL = text("""
+    SELECT id FROM job
+    WHERE status IN ('pending', 'running') AND run_at <= :now
+    ORDER BY run_at
+    LIMIT :limit
+""").bindparams(*_datetimes('now'))
+
+# Claims one job, unless someone holds its lease or max_running jobs are running
+_CLAIM_SQL = text("""
+    UPDATE job
+    SET status = 'running', lease_until = :lease_until, leased_by = :worker,
+        attempts = attempts + 1, updated_at = :now
+    WHERE id = :id AND run_at <= :now
+      AND (status = 'pending' OR (status = 'running' AND lease_until < :now))
+      AND (SELECT COUNT(*) FROM job WHERE status = 'running' AND lease_until >= :now) < :max_running
+""").bindparams(*_datetimes('now', 'lease_until'))
+
+# Only the lease holder may record the outcome of a run
+_FINISH_SQL = text("""
+    UPDATE job
+    SET status = :status, run_at = :run_at, attempts = :attempts, state = :state,
+        last_error = :last_error, lease_until = NULL, leased_by = NULL, updated_at = :now
+    WHERE id = :id AND leased_by = :worker
+""").bindparams(*_datetimes('run_at', 'now'))
+
+
+class Reschedule:
+    """Returned by a handler to run the job again at `run_at`, keeping `state`."""
+    def __init__(self, run_at, state=None):
+        self.run_at = run_at
+        self.state = state
+
+
+class Job:
+    def __init__(self, row):
+        self.id = row.id
+        self.kind = row.kind
+        self.key = row.key
+        self.attempts = row.attempts
+        self.state = json.loads(row.state) if row.state else None
+
+
+class JobScheduler:
+    """Claims and runs due jobs on a background thread in each process.
+
+    `engine` is a callable returning the SQLAlchemy engine. `planner`, if given,
+    is called every `plan_interval` seconds with the current time and returns
+    `(kind, key, run_at)` tuples for jobs that should exist; it is how jobs get
+    created from the data (see `plan`).
+
+    `handlers` maps each kind to `handler(job)`. Returning None completes the
+    job, returning `Reschedule` runs it again later, and raising retries it with
+    backoff until `max_attempts` failures in a row mark it failed.
+    """
+    def __init__(self, engine, handlers, planner=None, concurrency=2, max_running=4,
+                 poll_interval=5.0, plan_interval=300.0, lease=timedelta(minutes=10),
+                 max_attempts=6, backoff_base=60.0, backoff_max=6 * 3600.0):
+        self.engine = engine
+        self.handlers = handlers
+        self.planner = planner
+        self.concurrency = concurrency
+        self.max_running = max_running
+        self.poll_interval = poll_interval
+        self.plan_interval = plan_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._pool = None
+        self._pid = None
+        self._planned_at = None
+
+    @property
+    def worker(self):
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self):
+        """Starts the scheduler thread in this process, once. Call it after forking."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job')
+        threading.Thread(target=self._loop, name='job-scheduler', daemon=True).start()
+
+    def _loop(self):
+        while True:
+            try:
+                self.tick(wait=False)
+            except Exception as e:
+                print(f"Job scheduler error: {e}")
+            time.sleep(self.poll_interval)
+
+    def plan(self, jobs):
+        """Makes sure each `(kind, key, run_at)` job exists. Returns how many rows were written."""
+        now = datetime.utcnow()
+        rows = [{"kind": kind, "key": key, "run_at": run_at, "now": now} for kind, key, run_at in jobs]
+        if not rows:
+            return 0
+        with self.engine().begin() as connection:
+            return connection.execute(_PLAN_SQL, rows).rowcount
+
+    def tick(self, wait=True):
+        """Plans if it is time to, then claims and runs as many due jobs as there are free slots.
+
+        With `wait`, runs them on the calling thread and returns once they finish.
+        Returns the number of jobs claimed.
+        """
+        now = datetime.utcnow()
+        if self.planner and (self._planned_at is None or (now - self._planned_at).total_seconds() >= self.plan_interval):
+            self.plan(self.planner(now))
+            self._planned_at = now
+
+        with self._lock:
+            free = self.concurrency - self._in_flight
+        claimed = self._claim(free) if free > 0 else []
+        for claimed_job in claimed:
+            if wait:
+                self._run(claimed_job)
+            else:
+                with self._lock:
+                    self._in_flight += 1
+                self._pool.submit(self._run_in_pool, claimed_job)
+        return len(claimed)
+
+    def _claim(self, limit):
+        now = datetime.utcnow()
+        with self.engine().connect() as connection:
+            due = [job_id for (job_id,) in connection.execute(_DUE_SQL, {"now": now, "limit": limit * 4})]
+        claimed = []
+        for job_id in due:
+            # One short write transaction per claim, starting with the UPDATE so
+            # SQLite takes the write lock up front instead of upgrading a read
+            with self.engine().begin() as connection:
+                won = connection.execute(_CLAIM_SQL, {
+                    "id": job_id, "now": now, "lease_until": now + self.lease,
+                    "worker": self.worker, "max_running": self.max_running,
+                }).rowcount == 1
+                if won:
+                    claimed.append(Job(connection.execute(job.select().where(job.c.id == job_id)).one()))
+            if len(claimed) == limit:
+                break
+        return claimed
+
+    def _run_in_pool(self, claimed_job):
+        try:
+            self._run(claimed_job)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _run(self, claimed_job):
+        handler = self.handlers.get(claimed_job.kind)
+        outcome = {"status": 'done', "run_at": datetime.utcnow(), "attempts": 0,
+                   "state": claimed_job.state, "last_error": None}
+        begin_scope(f"job:{claimed_job.kind}")
+        started = time.perf_counter()
+        try:
+            if handler is None:
+                raise LookupError(f"No handler for job kind '{claimed_job.kind}'")
+            result = handler(claimed_job)
+            if isinstance(result, Reschedule):
+                outcome.update(status='pending', run_at=result.run_at, state=result.state)
+        except Exception as e:
+            attempts = claimed_job.attempts
+            print(f"Job {claimed_job.kind} {claimed_job.key} failed (attempt {attempts}): {e}")
+            outcome.update(attempts=attempts, last_error=str(e))
+            if attempts >= self.max_attempts:
+                outcome.update(status='failed')
+            else:
+                outcome.update(status='pending', run_at=datetime.utcnow() + self.backoff(attempts))
+        finally:
+            end_scope()
+        job_run_seconds.observe(time.perf_counter() - started, claimed_job.kind)
+        if outcome["last_error"] is not None:
+            job_runs.inc(claimed_job.kind, 'error')
+        else:
+            job_runs.inc(claimed_job.kind, 'rescheduled' if outcome["status"] == 'pending' else 'done')
+
+        with self.engine().begin() as connection:
+            connection.execute(_FINISH_SQL, {
+                **outcome,
+                "state": json.dumps(outcome["state"]) if outcome["state"] is not None else None,
+                "id": claimed_job.id, "worker": self.worker, "now": datetime.utcnow(),
+            })
+
+    def backoff(self, attempts):
+        """Delay before retrying after `attempts` failures: exponential, capped, with jitter."""
+        delay = min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+        return timedelta(seconds=delay * random.uniform(0.5, 1.0))
@@ -0,0 +1,134 @@
+"""Incremental parsing of large RapidAPI payload files, one array element at a time."""
+import glob
+import json
+import os
+
+CHUNK_SIZE = 64 * 1024
+
+# Events yielded by iter_members
+FIELD = 'field'
+ITEM = 'item'
+
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = ',]}' + _WHITESPACE
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what has already been consumed so the buffer stays small
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars):
+        c = self.peek()
+        if c == '' or c not in chars:
+            raise json.JSONDecodeError(f"Expecting one of {chars!r}", self.buf, self.pos)
+        self.pos += 1
+        return c
+
+    def value(self):
+        """Decodes the next complete JSON value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A value that runs to the end of the buffer, or a number cut off mid
+            # fraction/exponent, may continue in the next chunk
+            truncated = end == len(self.buf) or (
+                isinstance(value, (int, float)) and not isinstance(value, bool)
+                and self.buf[end] not in _DELIMITERS
+            )
+            if truncated and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_members(fp, stream_keys, chunk_size=CHUNK_SIZE):
+    """Walks the top-level JSON object in `fp`.
+
+    Yields `(ITEM, key, element)` for each element of an array whose key is in
+    `stream_keys`, and `(FIELD, key, value)` for every other member, in file
+    order. Non-array values under a streamed key are yielded as fields.
+    """
+    reader = _Reader(fp, chunk_size)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key in stream_keys and reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.expect(']')
+            else:
+                while True:
+                    yield ITEM, key, reader.value()
+                    if reader.expect(',]') == ']':
+                        break
+        else:
+            yield FIELD, key, reader.value()
+        if reader.expect(',}') == '}':
+            return
+
+
+def _looks_like_json_object(path):
+    with open(path, 'rb') as f:
+        return f.read(64).lstrip()[:1] == b'{'
+
+
+def expand_paths(spec, root):
+    """Resolves a file path, glob or directory (relative to `root`) to a sorted list of files.
+
+    Directories and globs only match files that start with a JSON object, so
+    things like requirements.txt next to the payloads are skipped. Raises
+    ValueError if any match lies outside `root`.
+    """
+    root = os.path.realpath(root)
+    pattern = os.path.join(root, spec)
+    if os.path.isdir(pattern):
+        candidates = [p for ext in ('*.txt', '*.json') for p in glob.glob(os.path.join(pattern, ext))]
+    elif glob.has_magic(spec):
+        candidates = glob.glob(pattern, recursive=True)
+    else:
+        candidates = [pattern] if os.path.exists(pattern) else []
+    sniff = len(candidates) > 1 or pattern not in candidates
+
+    paths = []
+    for path in candidates:
+        real = os.path.realpath(path)
+        if os.path.commonpath([root, real]) != root:
+            raise ValueError(f"{spec} is outside the data directory")
+        if os.path.isfile(real) and (not sniff or _looks_like_json_object(real)):
+            paths.append(real)
+    return sorted(set(paths))
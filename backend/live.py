@@ -0,0 +1,185 @@
+"""Live scoreboard deltas, stored with each results write and pushed to clients as server-sent events."""
+import json
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table, Text, delete, func, insert, select, text,
+)
+
+# The most recent events kept for clients catching up after a reconnect
+EVENT_RETENTION = int(os.getenv('LIVE_EVENT_RETENTION', 1000))
+
+metadata = MetaData()
+
+scoreboard_event = Table(
+    'scoreboard_event', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('created_at', DateTime, nullable=False),
+    Column('tournament_id', String, nullable=False),
+    Column('payload', Text, nullable=False), # The event's JSON, sent to clients as-is
+)
+
+# Everyone with picks in the tournament, with their picks' golfers and earnings
+_TOURNAMENT_PICKS = """
+    SELECT p.user_id, u."displayName", p.golfer_id, g.name, tr.earnings
+    FROM pick p
+    JOIN "user" u ON u.id = p.user_id
+    LEFT JOIN golfer g ON g.id = p.golfer_id
+    LEFT JOIN tournament_result tr
+      ON tr.tournament_id = p.tournament_id AND tr.golfer_id = p.golfer_id
+    WHERE p.tournament_id = :tournament_id
+    ORDER BY p.user_id, p.id
+"""
+
+
+def record_score_changes(session, tournament_id, changes):
+    """Stores the scoreboard delta for `changes`, as returned by refresh_scores_for_tournament.
+
+    Call it in the transaction that wrote the results, and bump the 'results'
+    version after committing. Returns the event id, or None when no total changed.
+    """
+    if not changes:
+        return None
+
+    # Competition rank: one more than the number of strictly higher totals
+    descending = [-score for (score,) in session.execute(text(
+        "SELECT total_score FROM user_score ORDER BY total_score DESC"
+    ))]
+    users = {}
+    for user_id, display_name, golfer_id, golfer_name, earnings in session.execute(
+        text(_TOURNAMENT_PICKS), {"tournament_id": tournament_id}
+    ):
+        if user_id not in changes:
+            continue
+        if user_id not in users:
+            previous, total = changes[user_id]
+            users[user_id] = {
+                "id": user_id,
+                "displayName": display_name,
+                "score": total,
+                "previous_score": previous,
+                "rank": bisect_left(descending, -total) + 1,
+                "picks": [],
+            }
+        users[user_id]["picks"].append({
+            "golfer_id": golfer_id,
+            "golfer_name": golfer_name or golfer_id,
+            "earnings": earnings,
+        })
+
+    payload = json.dumps({
+        "tournament_id": tournament_id,
+        "users": sorted(users.values(), key=lambda u: (u["rank"], u["id"])),
+    }, separators=(',', ':'))
+    event_id = session.execute(insert(scoreboard_event).values(
+        created_at=datetime.utcnow(), tournament_id=tournament_id, payload=payload
+    )).inserted_primary_key[0]
+    session.execute(delete(scoreboard_event).where(scoreboard_event.c.id <= event_id - EVENT_RETENTION))
+    return event_id
+
+
+def read_events(connection, after_id, up_to=None):
+    """`(id, payload)` of the stored events after `after_id` (and up to `up_to`), oldest first."""
+    query = select(scoreboard_event.c.id, scoreboard_event.c.payload)\
+        .where(scoreboard_event.c.id > after_id)\
+        .order_by(scoreboard_event.c.id)
+    if up_to is not None:
+        query = query.where(scoreboard_event.c.id <= up_to)
+    return connection.execute(query).all()
+
+
+def latest_event_id(connection):
+    return connection.execute(select(func.max(scoreboard_event.c.id))).scalar() or 0
+
+
+class Subscription:
+    def __init__(self, queue_size):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.replay = []
+        self.overflowed = False
+
+
+class ScoreboardFeed:
+    """Delivers new scoreboard events to the clients connected to this process.
+
+    One watcher thread polls the 'results' version and reads each batch of new
+    events once for every client, so events written by any process reach every
+    client without a broker. `engine` is a callable returning the SQLAlchemy
+    engine. The watcher thread is started by the first subscriber in each
+    process, so it is never forked.
+    """
+    def __init__(self, versions, engine, poll_interval=0.5, queue_size=64):
+        self.versions = versions
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._last_id = None
+        self._pid = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def subscribe(self, last_event_id=None):
+        """Registers a client. Events after `last_event_id` that are already stored go in `replay`."""
+        self._ensure_watcher()
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+            up_to = self._last_id
+        # Everything newer than up_to reaches the queue through the watcher
+        if last_event_id is not None and last_event_id < up_to:
+            with self.engine().connect() as connection:
+                subscription.replay = read_events(connection, last_event_id, up_to)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _ensure_watcher(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            with self.engine().connect() as connection:
+                self._last_id = latest_event_id(connection)
+            self._pid = os.getpid()
+        threading.Thread(target=self._watch, name='scoreboard-feed', daemon=True).start()
+
+    def _watch(self):
+        seen = None
+        while True:
+            time.sleep(self.poll_interval)
+            # Without shared versions, fall back to asking the database every time
+            version = self.versions.get('results')[0] if self.versions.enabled else None
+            if version is not None and version == seen:
+                continue
+            try:
+                with self.engine().connect() as connection:
+                    events = read_events(connection, self._last_id)
+            except Exception as e:
+                print(f"Error reading scoreboard events: {e}")
+                continue
+            seen = version
+            if events:
+                self._publish(events)
+
+    def _publish(self, events):
+        with self._lock:
+            self._last_id = events[-1][0]
+            for subscription in self._subscribers:
+                if subscription.overflowed:
+                    continue
+                try:
+                    for event in events:
+                        subscription.queue.put_nowait(event)
+                except queue.Full:
+                    # A client this far behind is cut off; it catches up from the table on reconnect
+                    subscription.overflowed = True
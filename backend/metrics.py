@@ -0,0 +1,418 @@
+"""Prometheus metrics for the app, its background jobs and the cron scripts."""
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+# Upper bounds, in seconds, for request and query latency histograms
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+SLOW_QUERY_SECONDS = float(os.getenv('SLOW_QUERY_MS', 250)) / 1000 # 0 disables the slow query log
+
+_ARCHIVE = 'archive.json'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        with self._lock:
+            return {"type": self.kind, "help": self.help, "labels": self.labels,
+                    "samples": [[list(key), value] for key, value in self._values.items()]}
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    """A last-seen value. Across processes the most recently set one wins."""
+    kind = 'gauge'
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = [value, time.time()]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        # Per-bucket (not cumulative) counts, then the sum; rendering accumulates
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot["buckets"] = self.buckets
+        for sample in snapshot["samples"]:
+            sample[1] = list(sample[1])
+        return snapshot
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing # Re-imported module; keep counting into the same series
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def snapshot(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+# --- Merging and exposition ---
+def merge(snapshots):
+    """Adds up snapshots from several processes: counters and histograms sum, gauges keep the newest value."""
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, dict(metric, samples={}))
+            samples = target["samples"]
+            for key, value in metric["samples"]:
+                key = tuple(key)
+                current = samples.get(key)
+                if current is None:
+                    samples[key] = value
+                elif metric["type"] == 'counter':
+                    samples[key] = current + value
+                elif metric["type"] == 'gauge':
+                    samples[key] = max(current, value, key=lambda v: v[1])
+                elif len(current) == len(value): # Histograms, unless their buckets changed
+                    samples[key] = [a + b for a, b in zip(current, value)]
+    for metric in merged.values():
+        metric["samples"] = [[list(key), value] for key, value in metric["samples"].items()]
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(snapshot):
+    """The Prometheus text exposition format (version 0.0.4) of a snapshot."""
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labels = metric["labels"]
+        for key, value in sorted(metric["samples"], key=lambda sample: sample[0]):
+            if metric["type"] == 'counter':
+                lines.append(f"{name}{_label_text(labels, key)} {_number(value)}")
+            elif metric["type"] == 'gauge':
+                lines.append(f"{name}{_label_text(labels, key)} {_number(value[0])}")
+            else:
+                cumulative = 0
+                for bound, count in zip(list(metric["buckets"]) + ['+Inf'], value[:-1]):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _number(float(bound))
+                    lines.append(f"{name}_bucket{_label_text(labels, key, [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_label_text(labels, key)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_label_text(labels, key)} {cumulative}")
+    return '\n'.join(lines) + '\n'
+
+
+# --- Sharing between processes ---
+# Each process writes its numbers to its own file in METRICS_DIR, so /metrics in
+# any worker reports the sum over every worker and cron run. Files of exited
+# processes are folded into an archive, so counters survive worker recycling.
+class MetricsStore:
+    def __init__(self, directory, registry=REGISTRY, flush_interval=10.0):
+        self.directory = directory
+        self.registry = registry
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pid = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            print(f"Warning: metrics from other processes disabled, could not use {directory}: {e}")
+            self.directory = None
+
+    @property
+    def enabled(self):
+        return self.directory is not None
+
+    def start(self):
+        """Starts flushing this process's metrics in the background, once per process."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        atexit.register(self.flush)
+        threading.Thread(target=self._loop, name='metrics-flush', daemon=True).start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Writes this process's metrics to its file in the directory."""
+        if not self.enabled:
+            return
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        try:
+            self._write(path, self.registry.snapshot())
+        except OSError as e:
+            print(f"Warning: could not write metrics to {path}: {e}")
+
+    def _write(self, path, snapshot):
+        # Write then rename so a reader never sees a partial file
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """The merged snapshot of every process: this one's live numbers plus the others' files."""
+        snapshots = [self.registry.snapshot()]
+        if not self.enabled:
+            return merge(snapshots)
+        with open(os.path.join(self.directory, '.lock'), 'a') as lock:
+            fcntl.lockf(lock, fcntl.LOCK_EX)
+            try:
+                snapshots.extend(self._read_others())
+            finally:
+                fcntl.lockf(lock, fcntl.LOCK_UN)
+        return merge(snapshots)
+
+    def _read_others(self):
+        archive_path = os.path.join(self.directory, _ARCHIVE)
+        archive, exited, live = _read(archive_path), [], []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json') or name == _ARCHIVE or name == f"{os.getpid()}.json":
+                continue
+            path = os.path.join(self.directory, name)
+            snapshot = _read(path)
+            if snapshot is None:
+                continue
+            if _alive(int(name[:-len('.json')])):
+                live.append(snapshot)
+            else:
+                exited.append((path, snapshot))
+        if exited:
+            archive = merge(([archive] if archive else []) + [snapshot for _, snapshot in exited])
+            self._write(archive_path, archive)
+            for path, _ in exited:
+                os.remove(path)
+        return ([archive] if archive else []) + live
+
+    def render(self):
+        return render(self.collect())
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def open_metrics_store(directory=None):
+    return MetricsStore(directory or os.getenv('METRICS_DIR', os.path.join(basedir, '.metrics')),
+                        flush_interval=float(os.getenv('METRICS_FLUSH_SECONDS', 10)))
+
+
+# --- SQL statements ---
+db_queries = counter('golf_db_queries_total', "SQL statements executed", ['scope'])
+db_query_seconds = histogram('golf_db_query_duration_seconds', "SQL statement latency", ['scope'])
+db_slow_queries = counter('golf_db_slow_queries_total', "SQL statements slower than SLOW_QUERY_MS", ['scope'])
+
+_local = threading.local()
+
+
+class Scope:
+    """What the current thread is working on, and the SQL it has run for it so far."""
+    def __init__(self, name):
+        self.name = name
+        self.queries = 0
+        self.seconds = 0.0
+
+
+def begin_scope(name):
+    """Charges this thread's SQL statements to `name` until `end_scope`. Returns the scope."""
+    scope = _local.scope = Scope(name)
+    return scope
+
+
+def end_scope():
+    _local.scope = None
+
+
+def current_scope():
+    return getattr(_local, 'scope', None)
+
+
+def track_queries(engine, slow_query_seconds=SLOW_QUERY_SECONDS):
+    """Counts and times every statement `engine` runs, and logs the slow ones."""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_metrics_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        scope = current_scope()
+        name = scope.name if scope else 'other'
+        if scope:
+            scope.queries += 1
+            scope.seconds += elapsed
+        db_queries.inc(name)
+        db_query_seconds.observe(elapsed, name)
+        if slow_query_seconds and elapsed >= slow_query_seconds:
+            db_slow_queries.inc(name)
+            print(f"Slow query ({elapsed * 1000:.0f} ms) in {name}: {' '.join(statement.split())[:500]}")
+    return engine
+
+
+# --- HTTP requests ---
+http_requests = counter('golf_http_requests_total', "HTTP requests by route and status", ['route', 'method', 'status'])
+http_request_seconds = histogram('golf_http_request_duration_seconds',
+                                 "Request latency, until the whole body is sent", ['route', 'method'])
+http_request_queries = histogram('golf_http_request_queries', "SQL statements per request", ['route'],
+                                 buckets=COUNT_BUCKETS)
+http_request_db_seconds = histogram('golf_http_request_db_seconds', "Time spent in SQL per request", ['route'])
+
+ROUTE_ENVIRON_KEY = 'golf.route'
+
+
+def name_request(environ, route):
+    """Labels the request's metrics, and the SQL it runs from now on, with `route`."""
+    environ[ROUTE_ENVIRON_KEY] = route
+    scope = current_scope()
+    if scope is not None:
+        scope.name = route
+
+
+class _Body:
+    """Wraps a response body to record the request once the server closes it."""
+    def __init__(self, body, finish):
+        self._body = body
+        self._finish = finish
+
+    def __iter__(self):
+        return iter(self._body)
+
+    def close(self):
+        try:
+            if hasattr(self._body, 'close'):
+                self._body.close()
+        finally:
+            self._finish()
+
+
+class RequestMetrics:
+    """WSGI middleware recording every request.
+
+    The app names each request with `name_request`, passing its URL rule (e.g.
+    '/api/tournaments/<string:tournament_id>/golfers') so paths with ids don't
+    each become a series; requests that match no rule stay 'unmatched'.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        scope = begin_scope('unmatched')
+        status = []
+
+        def _start_response(status_line, headers, exc_info=None):
+            status[:] = [status_line.split(' ', 1)[0]]
+            return start_response(status_line, headers, exc_info)
+
+        def finish():
+            route = environ.get(ROUTE_ENVIRON_KEY, 'unmatched')
+            method = environ.get('REQUEST_METHOD', '')
+            http_requests.inc(route, method, status[0] if status else '500')
+            http_request_seconds.observe(time.perf_counter() - started, route, method)
+            http_request_queries.observe(scope.queries, route)
+            http_request_db_seconds.observe(scope.seconds, route)
+            if current_scope() is scope:
+                end_scope()
+
+        try:
+            body = self.app(environ, _start_response)
+        except BaseException:
+            finish()
+            raise
+        return _Body(body, finish)
@@ -0,0 +1,218 @@
+"""Versioned, idempotent in-place schema migrations, tracked in the `schema_version` table."""
+from sqlalchemy import inspect, text
+
+from ingest import ensure_tournament_result_unique_index
+from jobs import job
+from live import scoreboard_event
+from scoring import rebuild_user_scores
+
+
+def normalize_key(value):
+    """Case-folded form of a display name or email used for uniqueness checks."""
+    return value.casefold() if value is not None else None
+
+
+def _has_column(session, table_name, column_name):
+    columns = inspect(session.connection()).get_columns(table_name)
+    return any(c['name'] == column_name for c in columns)
+
+
+def _create_index(session, name, table_name, columns, unique=False):
+    session.execute(text(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table_name} ({columns})"
+    ))
+
+
+def _unique_tournament_results(session):
+    ensure_tournament_result_unique_index(session)
+
+
+def _hot_path_indexes(session):
+    # Superseded by the unique uq_pick_user_golfer in migration 4, and that by
+    # uq_pick_user_season_golfer in migration 10
+    _create_index(session, 'ix_pick_user_golfer', 'pick', 'user_id, golfer_id')
+    _create_index(session, 'ix_pick_tournament_user', 'pick', 'tournament_id, user_id')
+    _create_index(session, 'ix_tournament_submission_window', 'tournament', 'submission_end, submission_start')
+
+
+def _normalized_user_keys(session):
+    for column in ('display_name_normalized', 'email_normalized'):
+        if not _has_column(session, 'user', column):
+            session.execute(text(f'ALTER TABLE "user" ADD COLUMN {column} VARCHAR'))
+
+    # Python's casefold handles non-ASCII names, unlike SQLite's lower()
+    seen = {'display_name_normalized': set(), 'email_normalized': set()}
+    updates = []
+    users = session.execute(text('SELECT id, "displayName", email FROM "user" ORDER BY id')).all()
+    for user_id, display_name, email in users:
+        row = {"id": user_id}
+        for column, value in (('display_name_normalized', display_name), ('email_normalized', email)):
+            key = normalize_key(value)
+            if key in seen[column]:
+                # Can't enforce uniqueness retroactively; leave the later account unkeyed
+                print(f"Warning: user {user_id} duplicates an existing {column.split('_normalized')[0]} '{value}'")
+                key = None
+            elif key is not None:
+                seen[column].add(key)
+            row[column] = key
+        updates.append(row)
+    if updates:
+        session.execute(text(
+            'UPDATE "user" SET display_name_normalized = :display_name_normalized, '
+            'email_normalized = :email_normalized WHERE id = :id'
+        ), updates)
+
+    _create_index(session, 'ix_user_display_name_normalized', '"user"', 'display_name_normalized', unique=True)
+    _create_index(session, 'ix_user_email_normalized', '"user"', 'email_normalized', unique=True)
+
+
+def _pick_rule_columns(session):
+    # The one-and-done rule is per season once migration 10 has added the column
+    return 'user_id, season, golfer_id' if _has_column(session, 'pick', 'season') else 'user_id, golfer_id'
+
+
+def duplicate_picks(session):
+    """`(user_id, golfer_id, [tournament_id, ...])` for each golfer a user has picked more than once."""
+    columns = _pick_rule_columns(session)
+    rows = session.execute(text(f"""
+        SELECT user_id, golfer_id, tournament_id FROM pick
+        WHERE ({columns}) IN (SELECT {columns} FROM pick GROUP BY {columns} HAVING COUNT(*) > 1)
+        ORDER BY user_id, golfer_id, id
+    """)).all()
+    duplicates = {}
+    for user_id, golfer_id, tournament_id in rows:
+        duplicates.setdefault((user_id, golfer_id), []).append(tournament_id)
+    return [(user_id, golfer_id, tournaments) for (user_id, golfer_id), tournaments in duplicates.items()]
+
+
+def dedupe_picks(session):
+    """Deletes picks that reuse a golfer, keeping each user's earliest one, and rebuilds user scores.
+
+    Only run on request (`flask upgrade-db --dedupe-picks`). Returns the number
+    of picks deleted; the caller commits.
+    """
+    columns = _pick_rule_columns(session)
+    deleted = session.execute(text(f"""
+        DELETE FROM pick
+        WHERE id NOT IN (SELECT MIN(id) FROM pick GROUP BY {columns})
+    """)).rowcount
+    if deleted:
+        rebuild_user_scores(session)
+    return deleted
+
+
+class DuplicatePicksError(RuntimeError):
+    """Existing picks break the one-and-done rule, so its unique index can't be created."""
+
+
+def _one_and_done_constraint(session):
+    # Picks are never deleted here, since this runs on every container start
+    duplicates = duplicate_picks(session)
+    if duplicates:
+        listed = '; '.join(f"{user_id} picked {golfer_id} in {', '.join(tournaments)}"
+                           for user_id, golfer_id, tournaments in duplicates)
+        raise DuplicatePicksError(
+            f"{len(duplicates)} golfer(s) picked more than once by the same user: {listed}. "
+            "Fix these picks, or run 'flask upgrade-db --dedupe-picks' to keep each user's earliest one."
+        )
+    session.execute(text("DROP INDEX IF EXISTS ix_pick_user_golfer"))
+    _create_index(session, 'uq_pick_user_golfer', 'pick', 'user_id, golfer_id', unique=True)
+
+
+def _field_refresh_lease(session):
+    if not _has_column(session, 'tournament', 'golfers_refresh_lease_until'):
+        session.execute(text("ALTER TABLE tournament ADD COLUMN golfers_refresh_lease_until TIMESTAMP"))
+
+
+def _list_order_indexes(session):
+    _create_index(session, 'ix_golfer_name', 'golfer', 'name, id')
+
+
+def _scoreboard_events(session):
+    scoreboard_event.create(session.connection(), checkfirst=True)
+
+
+def _job_table(session):
+    job.create(session.connection(), checkfirst=True)
+
+
+def _tournament_prize_money(session):
+    for column in ('purse', 'winners_share'):
+        if not _has_column(session, 'tournament', column):
+            session.execute(text(f"ALTER TABLE tournament ADD COLUMN {column} INTEGER"))
+
+
+def _season_keys(session):
+    # Existing rows were keyed by the bare tournId, so it doubles as their tourn_id
+    if not _has_column(session, 'tournament', 'tourn_id'):
+        session.execute(text("ALTER TABLE tournament ADD COLUMN tourn_id VARCHAR"))
+    session.execute(text("UPDATE tournament SET tourn_id = id WHERE tourn_id IS NULL"))
+    _create_index(session, 'uq_tournament_tourn_id_year', 'tournament', 'tourn_id, year', unique=True)
+
+    if not _has_column(session, 'pick', 'season'):
+        session.execute(text("ALTER TABLE pick ADD COLUMN season INTEGER"))
+    session.execute(text("""
+        UPDATE pick SET season = (SELECT year FROM tournament WHERE tournament.id = pick.tournament_id)
+        WHERE season IS NULL
+    """))
+    _create_index(session, 'uq_pick_user_season_golfer', 'pick', 'user_id, season, golfer_id', unique=True)
+    session.execute(text("DROP INDEX IF EXISTS uq_pick_user_golfer"))
+
+
+# (version, description, upgrade function), applied in order. create_all() never
+# alters an existing table, so each step upgrades an older database; a new one
+# already has the latest schema and only gets its version stamped.
+MIGRATIONS = [
+    (1, "unique (tournament_id, golfer_id) on tournament_result", _unique_tournament_results),
+    (2, "indexes for pick lookups and open submission windows", _hot_path_indexes),
+    (3, "case-folded, uniquely indexed display name and email", _normalized_user_keys),
+    (4, "unique (user_id, golfer_id) on pick for the one-and-done rule", _one_and_done_constraint),
+    (5, "refresh lease column for tournament fields", _field_refresh_lease),
+    (6, "(name, id) index for paging golfers", _list_order_indexes),
+    (7, "scoreboard_event table for the live scoreboard feed", _scoreboard_events),
+    (8, "job table for the background job scheduler", _job_table),
+    (9, "purse and winner's share columns on tournament", _tournament_prize_money),
+    (10, "tournaments keyed by (tourn_id, year) and picks unique per season", _season_keys),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Every table the models define; a database missing any of them needs create_all
+TABLES = ('user', 'golfer', 'tournament', 'tournament_golfers', 'pick', 'tournament_result', 'user_score',
+          'scoreboard_event', 'job')
+
+
+def current_version(session):
+    session.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    version = session.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+    return version or 0
+
+
+def schema_is_current(session):
+    """True when every table exists and every migration has been applied.
+
+    Read-only, so it is cheap enough to run on every container start.
+    """
+    tables = set(inspect(session.connection()).get_table_names())
+    if not tables.issuperset(TABLES) or 'schema_version' not in tables:
+        return False
+    return session.execute(text("SELECT MAX(version) FROM schema_version")).scalar() == LATEST_VERSION
+
+
+def upgrade(session):
+    """Applies every pending migration, committing after each one.
+
+    Returns the list of versions that were applied.
+    """
+    applied = []
+    version = current_version(session)
+    for target, description, migrate in MIGRATIONS:
+        if target <= version:
+            continue
+        print(f"Applying migration {target}: {description}")
+        migrate(session)
+        session.execute(text("DELETE FROM schema_version"))
+        session.execute(text("INSERT INTO schema_version (version) VALUES (:version)"), {"version": target})
+        session.commit()
+        applied.append(target)
+    return applied
@@ -0,0 +1,117 @@
+"""The database models as plain SQLAlchemy classes, shared by the app and the Flask-free scripts."""
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Table
+from sqlalchemy.orm import declarative_base, relationship, validates
+
+from ingest import RESULT_UNIQUE_INDEX
+from jobs import job
+from live import scoreboard_event
+from migrations import normalize_key
+
+# The app hands Base to Flask-SQLAlchemy as its model class; everything else uses a plain Session
+Base = declarative_base()
+metadata = Base.metadata
+
+# --- Association Table for Tournament Golfers ---
+tournament_golfers = Table('tournament_golfers', metadata,
+    Column('tournament_id', String, ForeignKey('tournament.id'), primary_key=True),
+    Column('golfer_id', String, ForeignKey('golfer.id'), primary_key=True)
+)
+
+# --- Database Models ---
+class User(Base):
+    __tablename__ = 'user'
+    id = Column(String, primary_key=True) # Firebase UID
+    displayName = Column(String)
+    email = Column(String)
+    # Case-folded copies backing the case-insensitive uniqueness checks in add_user
+    display_name_normalized = Column(String, index=True, unique=True)
+    email_normalized = Column(String, index=True, unique=True)
+    picks = relationship('Pick', backref='user', lazy=True)
+
+    @validates('displayName', 'email')
+    def _normalize(self, key, value):
+        if key == 'displayName':
+            self.display_name_normalized = normalize_key(value)
+        else:
+            self.email_normalized = normalize_key(value)
+        return value
+
+class Golfer(Base):
+    __tablename__ = 'golfer'
+    id = Column(String, primary_key=True)
+    name = Column(String, nullable=False)
+    # The 'tournaments' backref is created automatically by the relationship in the Tournament model
+
+    # Sort key for paging /golfers and ordering tournament fields
+    __table_args__ = (Index('ix_golfer_name', 'name', 'id'),)
+
+def _own_id(context):
+    return context.get_current_parameters()['id']
+
+class Tournament(Base):
+    __tablename__ = 'tournament'
+    id = Column(String, primary_key=True)
+    # RapidAPI's tournId, which the tour reuses every season; defaults to the id
+    # for tournaments created by hand
+    tourn_id = Column(String, nullable=False, default=_own_id)
+    name = Column(String, nullable=False)
+    year = Column(Integer, nullable=False)
+    submission_start = Column(DateTime, nullable=False)
+    submission_end = Column(DateTime, nullable=False)
+    golfers_last_updated = Column(DateTime, nullable=True) # For caching
+    golfers_refresh_lease_until = Column(DateTime, nullable=True) # Held by the process refreshing the field
+    # Prize money from the schedule files, in dollars; NULL until announced
+    purse = Column(Integer, nullable=True)
+    winners_share = Column(Integer, nullable=True)
+
+    # Loaded on access only; the field endpoint reads tournament_golfers directly
+    golfers = relationship('Golfer', secondary=tournament_golfers, lazy='select',
+        backref='tournaments')
+
+    __table_args__ = (
+        # Serves the open-window filter in get_available_tournaments and ordering by deadline
+        Index('ix_tournament_submission_window', 'submission_end', 'submission_start'),
+        # One row per event per season
+        Index('uq_tournament_tourn_id_year', 'tourn_id', 'year', unique=True),
+    )
+
+class Pick(Base):
+    __tablename__ = 'pick'
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String, ForeignKey('user.id'), nullable=False)
+    golfer_id = Column(String, ForeignKey('golfer.id'), nullable=False)
+    tournament_id = Column(String, ForeignKey('tournament.id'), nullable=False)
+    season = Column(Integer, nullable=False) # The tournament's year
+
+    # (tournament_id, user_id) also serves lookups by user within a tournament,
+    # and (user_id, season, golfer_id) serves lookups by user alone. The latter is
+    # unique: it enforces the one-and-done rule across a season's tournaments.
+    __table_args__ = (
+        Index('uq_pick_user_season_golfer', 'user_id', 'season', 'golfer_id', unique=True),
+        Index('ix_pick_tournament_user', 'tournament_id', 'user_id'),
+    )
+
+class TournamentResult(Base):
+    __tablename__ = 'tournament_result'
+    id = Column(Integer, primary_key=True)
+    tournament_id = Column(String, ForeignKey('tournament.id'), nullable=False)
+    golfer_id = Column(String, ForeignKey('golfer.id'), nullable=False)
+    earnings = Column(Integer)
+
+    # One result per golfer per tournament; also the conflict target for bulk upserts
+    __table_args__ = (Index(RESULT_UNIQUE_INDEX, 'tournament_id', 'golfer_id', unique=True),)
+
+class UserScore(Base):
+    __tablename__ = 'user_score'
+    # Materialized total per user, maintained by the helpers in scoring.py
+    user_id = Column(String, ForeignKey('user.id'), primary_key=True)
+    total_score = Column(Integer, nullable=False, default=0)
+
+# Lets the scoreboard read users in rank order straight off the index
+Index('ix_user_score_rank', UserScore.total_score.desc(), UserScore.user_id)
+
+# Scoreboard deltas for the live feed and the background job queue. They are
+# defined in live.py and jobs.py, which work on bare connections; copied here
+# so create_all() creates them.
+scoreboard_event.to_metadata(metadata)
+job.to_metadata(metadata)
@@ -0,0 +1,101 @@
+"""Keyset (cursor) pagination and field projection for list endpoints."""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, or_
+
+# A page is the rows after the cursor in sort key order, not an OFFSET, so deep
+# pages cost the same as the first. The cursor is opaque to clients.
+MAX_PAGE_SIZE = 1000
+
+
+def parse_limit(value):
+    """The page size from a `limit` parameter, or None for the whole list."""
+    if value in (None, ''):
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_fields(value, available, default):
+    """The field names selected by a `fields` parameter, in the requested order."""
+    if not value:
+        return tuple(default)
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in available]
+    if unknown or not fields:
+        raise ValueError(f"Unknown fields {', '.join(unknown)}; choose from {', '.join(available)}")
+    return fields
+
+
+def order_by(keys):
+    """ORDER BY clauses for `keys`, a sequence of (column, descending) pairs."""
+    return [column.desc() if descending else column for column, descending in keys]
+
+
+def after(keys, values):
+    """A filter matching the rows that come strictly after `values` in `keys` order.
+
+    Expanded into OR'ed prefixes rather than a row-value comparison so that mixed
+    directions work. The redundant inclusive bound on the first key is what lets
+    SQLite seek into the index instead of scanning it from the start.
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal = [keys[j][0] == values[j] for j in range(i)]
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, beyond))
+    first, descending = keys[0]
+    bound = first <= values[0] if descending else first >= values[0]
+    return and_(bound, or_(*clauses))
+
+
+def before(keys, values):
+    """A filter matching the rows that come strictly before `values` in `keys` order."""
+    return after([(column, not descending) for column, descending in keys], values)
+
+
+def key_values(row, keys):
+    return [row._mapping[column] for column, _ in keys]
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values):
+    payload = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, keys):
+    """The key values in a cursor, converted back to the key columns' types."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError("Invalid cursor")
+
+    decoded = []
+    for value, (column, _) in zip(values, keys):
+        python_type = column.type.python_type
+        try:
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif not isinstance(value, python_type):
+                raise TypeError
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        decoded.append(value)
+    return decoded
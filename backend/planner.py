@@ -0,0 +1,171 @@
+"""Pick planner: the one-and-done picks for the open tournaments that earn a user the most expected prize money."""
+import numpy as np
+from sqlalchemy import select
+
+from models import Golfer
+from projection import (
+    PICKS_PER_TOURNAMENT,
+    UNPUBLISHED_FIELD_SIZE,
+    current_season,
+    expected_earnings,
+    golfer_strengths,
+    payouts,
+    remaining_tournaments,
+    tournament_fields,
+)
+
+EXPECTED_EARNINGS_SIMULATIONS = 2000
+
+
+class EarningsTable:
+    """Expected earnings of every golfer (columns, strongest first) in every remaining tournament (rows)."""
+
+    def __init__(self, season, tournaments, golfers, earnings, playing):
+        self.season = season
+        self.tournaments = tournaments # [(id, name, submission_end)] by deadline
+        self.golfers = golfers # [(id, name)]
+        self.earnings = earnings # Dollars, float
+        self.playing = playing # Whether each golfer may be picked in each tournament
+
+    def open_rows(self, now):
+        """The rows of the tournaments whose picks can still be submitted or changed at `now`."""
+        return [e for e, (_, _, submission_end) in enumerate(self.tournaments) if submission_end >= now]
+
+
+def load_earnings_table(session, simulations=EXPECTED_EARNINGS_SIMULATIONS, seed=0):
+    """Builds the EarningsTable for the current season's tournaments without results.
+
+    Raises ProjectionError if their prize money is unknown. While a field is
+    unpublished, earnings are expected as if the strongest golfers who have
+    played make up the field, as in the projection, but anyone may be picked.
+    """
+    season = current_season(session)
+    remaining = sorted(remaining_tournaments(session, season), key=lambda entry: (entry[0].submission_end, entry[0].id))
+    fields = tournament_fields(session, [t.id for t, _ in remaining])
+    strengths = golfer_strengths(session)
+    floor = min(strengths.values(), default=1.0)
+    golfer_ids = sorted(set(strengths).union(*fields.values()), key=lambda g: (-strengths.get(g, floor), g))
+    golfer_index = {golfer_id: g for g, golfer_id in enumerate(golfer_ids)}
+    strength = np.array([strengths.get(g, floor) for g in golfer_ids])
+    names = dict(session.connection().execute(select(Golfer.id, Golfer.name)).all())
+
+    rng = np.random.default_rng(seed)
+    expected_field = np.arange(min(len(strengths) or len(golfer_ids), UNPUBLISHED_FIELD_SIZE))
+    earnings = np.zeros((len(remaining), len(golfer_ids)))
+    playing = np.zeros((len(remaining), len(golfer_ids)), dtype=bool)
+    for e, (tournament, share) in enumerate(remaining):
+        if fields[tournament.id]:
+            field = np.array([golfer_index[g] for g in fields[tournament.id]], dtype=np.intp)
+            playing[e, field] = True
+        else:
+            field = expected_field
+            playing[e] = True
+        earnings[e, field] = expected_earnings(rng, strength[field], payouts(share, len(field)), simulations)
+    return EarningsTable(
+        season,
+        [(t.id, t.name, t.submission_end) for t, _ in remaining],
+        [(golfer_id, names.get(golfer_id, golfer_id)) for golfer_id in golfer_ids],
+        earnings,
+        playing,
+    )
+
+
+def plan_picks(table, picks, now):
+    """The picks with the most expected earnings in every tournament open at `now`.
+
+    `picks` are the user's current (golfer_id, tournament_id) pairs. Golfers
+    picked in a tournament whose deadline has passed are used up; picks in open
+    tournaments can still be changed, so those are planned again. Every
+    tournament gets three golfers unless too few eligible ones are left.
+    Returns a dict with the total and the tournaments in deadline order.
+    """
+    rows = table.open_rows(now)
+    open_ids = {table.tournaments[e][0] for e in rows}
+    locked = {golfer_id for golfer_id, tournament_id in picks if tournament_id not in open_ids}
+    available = np.array([golfer_id not in locked for golfer_id, _ in table.golfers], dtype=bool)
+    slot_count = len(rows) * PICKS_PER_TOURNAMENT
+
+    # Only a tournament's best `slot_count` eligible golfers can be in an optimal
+    # plan: other slots can't take them all, so one would be left to swap in.
+    eligible = table.playing[rows] & available
+    values = np.where(eligible, table.earnings[rows], -np.inf)
+    best = np.argsort(-values, axis=1, kind='stable')[:, :slot_count]
+    candidates = np.unique(best[np.take_along_axis(eligible, best, axis=1)])
+
+    # Slots are rows, golfers then one "no pick" per slot are columns. Leaving a
+    # slot empty costs more than all the earnings on the table, so slots are
+    # filled whenever they can be, and an ineligible golfer costs more still.
+    values = table.earnings[np.ix_(rows, candidates)]
+    empty = values.sum() * PICKS_PER_TOURNAMENT + 1
+    cost = np.full((slot_count, len(candidates) + slot_count), empty)
+    cost[:, :len(candidates)] = np.where(table.playing[np.ix_(rows, candidates)], -values, 2 * empty).repeat(
+        PICKS_PER_TOURNAMENT, axis=0)
+    assignment = _min_cost_assignment(cost)
+
+    tournaments = []
+    for i, e in enumerate(rows):
+        tournament_id, name, submission_end = table.tournaments[e]
+        chosen = [candidates[c] for c in assignment[i * PICKS_PER_TOURNAMENT:(i + 1) * PICKS_PER_TOURNAMENT]
+                  if c < len(candidates)]
+        golfers = sorted((
+            {"id": table.golfers[g][0], "name": table.golfers[g][1], "expected_earnings": round(table.earnings[e, g])}
+            for g in chosen
+        ), key=lambda golfer: (-golfer["expected_earnings"], golfer["id"]))
+        tournaments.append({
+            "id": tournament_id,
+            "name": name,
+            "submission_end": submission_end.isoformat(),
+            "golfers": golfers,
+            "expected_earnings": sum(golfer["expected_earnings"] for golfer in golfers),
+        })
+    return {
+        "expected_earnings": sum(tournament["expected_earnings"] for tournament in tournaments),
+        "tournaments": tournaments,
+    }
+
+
+def _min_cost_assignment(cost):
+    """Column of each row in a minimum cost assignment of every row (rows <= columns).
+
+    The Hungarian algorithm in its shortest augmenting path form: each row is
+    added with one Dijkstra-like search over reduced costs, which are kept
+    non-negative by row and column potentials. The inner step is vectorized
+    over the columns.
+    """
+    rows, columns = cost.shape
+    # Index 0 is a virtual column holding the row being added
+    row_potential = np.zeros(rows + 1)
+    column_potential = np.zeros(columns + 1)
+    row_of = np.zeros(columns + 1, dtype=np.intp) # 1-based row per column; 0 when free
+    previous = np.zeros(columns + 1, dtype=np.intp)
+    for row in range(1, rows + 1):
+        row_of[0] = row
+        column = 0
+        distance = np.full(columns + 1, np.inf)
+        visited = np.zeros(columns + 1, dtype=bool)
+        while True:
+            visited[column] = True
+            current = row_of[column]
+            reduced = cost[current - 1] - row_potential[current] - column_potential[1:]
+            closer = ~visited[1:] & (reduced < distance[1:])
+            distance[1:][closer] = reduced[closer]
+            previous[1:][closer] = column
+            pending = np.where(visited[1:], np.inf, distance[1:])
+            nearest = int(pending.argmin()) + 1
+            delta = pending[nearest - 1]
+            done = np.flatnonzero(visited)
+            row_potential[row_of[done]] += delta
+            column_potential[done] -= delta
+            distance[1:][~visited[1:]] -= delta
+            column = nearest
+            if row_of[column] == 0:
+                break
+        # Flip the matching along the path back to the virtual column
+        while column:
+            row_of[column] = row_of[previous[column]]
+            column = previous[column]
+
+    assignment = np.full(rows, -1, dtype=np.intp)
+    matched = np.flatnonzero(row_of[1:])
+    assignment[row_of[1:][matched] - 1] = matched
+    return assignment
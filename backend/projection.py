@@ -0,0 +1,502 @@
+"""Monte Carlo projection of the final standings: each user's chance of winning and likely final rank."""
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import func, select
+
+from models import Pick, Tournament, TournamentResult, User, UserScore, tournament_golfers
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+SIMULATIONS = 100_000
+RANK_SIMULATIONS = 1000
+CHUNK_SIZE = 1000 # Simulations per block; bounds the size of the arrays
+PICKS_PER_TOURNAMENT = 3 # As submit_picks requires
+UNPUBLISHED_FIELD_SIZE = 144
+RANK_PERCENTILES = (10, 50, 90)
+
+# PGA Tour share of the purse by finishing position; players outside the top
+# 65 (or who miss the cut) are paid nothing here
+PAYOUT_SHARES = (
+    0.18, 0.109, 0.069, 0.049, 0.041, 0.03625, 0.03375, 0.03125, 0.02925, 0.02725,
+    0.02525, 0.02325, 0.02125, 0.01925, 0.01825, 0.01725, 0.01625, 0.01525, 0.01425, 0.01325,
+    0.01225, 0.01125, 0.01045, 0.00965, 0.00885, 0.00805, 0.00775, 0.00745, 0.00715, 0.00685,
+    0.00655, 0.00625, 0.00595, 0.0057, 0.00545, 0.0052, 0.00495, 0.00475, 0.00455, 0.00435,
+    0.00415, 0.00395, 0.00375, 0.00355, 0.00335, 0.00315, 0.00295, 0.00279, 0.00265, 0.00257,
+    0.00251, 0.00245, 0.00241, 0.00237, 0.00235, 0.00233, 0.00231, 0.00229, 0.00227, 0.00225,
+    0.00223, 0.00221, 0.00219, 0.00217, 0.00215,
+)
+
+# Starts of an average golfer mixed into every golfer's record
+STRENGTH_PRIOR_STARTS = 5
+
+# Joins a user's golfer ids into one string, so picks are read a row per user
+_ID_SEPARATOR = '\x1f'
+
+
+class ProjectionError(ValueError):
+    """The data can't support a projection (e.g. no prize money is known)."""
+
+
+def winners_share(tournament):
+    """The winner's prize for a tournament from its schedule data, or None if unknown."""
+    if tournament.winners_share:
+        return tournament.winners_share
+    if tournament.purse:
+        return round(tournament.purse * PAYOUT_SHARES[0])
+    return None
+
+
+def payouts(winners_share_amount, field_size):
+    """Whole-dollar prize by finishing position for a field of `field_size`."""
+    shares = np.array(PAYOUT_SHARES[:field_size]) / PAYOUT_SHARES[0]
+    return np.rint(shares * winners_share_amount).astype(np.int64)
+
+
+def current_season(session):
+    """The earliest season with tournaments still to score, else the latest; None before any is loaded.
+
+    Only the data decides it, not the clock, so it changes with the 'results' and
+    'tournaments' versions that cached projections and plans are keyed on.
+    """
+    scored = select(TournamentResult.tournament_id).distinct()
+    return session.scalar(select(func.min(Tournament.year)).where(Tournament.id.not_in(scored))) \
+        or session.scalar(select(func.max(Tournament.year)))
+
+
+def remaining_tournaments(session, season):
+    """`season`'s tournaments without results, with the winner's prize for each; richest first."""
+    scored = select(TournamentResult.tournament_id).distinct()
+    tournaments = session.scalars(
+        select(Tournament).where(Tournament.year == season, Tournament.id.not_in(scored))
+        .order_by(Tournament.submission_end, Tournament.id)
+    ).all()
+    if not tournaments:
+        return []
+
+    shares = {t.id: winners_share(t) for t in tournaments}
+    known = [share for share in shares.values() if share]
+    if not known:
+        known = [share for share in map(winners_share, session.scalars(select(Tournament))) if share]
+    if not known:
+        raise ProjectionError("No prize money is known for the remaining tournaments; load the schedule files again")
+    fallback = int(np.median(known)) # Announced later in the season; assume a typical event
+    remaining = [(t, shares[t.id] or fallback) for t in tournaments]
+    return sorted(remaining, key=lambda entry: -entry[1])
+
+
+def golfer_strengths(session):
+    """{golfer_id: strength} for every golfer who has played, from their past results."""
+    connection = session.connection() # Core rows; these reads are large
+    winning = dict(connection.execute(
+        select(TournamentResult.tournament_id, func.max(TournamentResult.earnings))
+        .group_by(TournamentResult.tournament_id)
+    ).all())
+    shares, starts = {}, {}
+    for tournament_id, golfer_id, earnings in connection.execute(
+        select(TournamentResult.tournament_id, TournamentResult.golfer_id, TournamentResult.earnings)
+    ):
+        if winning[tournament_id]:
+            shares[golfer_id] = shares.get(golfer_id, 0.0) + (earnings or 0) / winning[tournament_id]
+        starts[golfer_id] = starts.get(golfer_id, 0) + 1
+
+    # Golfers in a finished tournament's field who earned nothing also played
+    for golfer_id, count in connection.execute(
+        select(tournament_golfers.c.golfer_id, func.count())
+        .where(tournament_golfers.c.tournament_id.in_(list(winning)))
+        .group_by(tournament_golfers.c.golfer_id)
+    ):
+        starts[golfer_id] = max(starts.get(golfer_id, 0), count)
+
+    if not starts:
+        return {}
+    average = sum(shares.values()) / sum(starts.values()) or 1.0 # Nobody has earned anything yet
+    return {
+        golfer_id: (shares.get(golfer_id, 0.0) + STRENGTH_PRIOR_STARTS * average) / (count + STRENGTH_PRIOR_STARTS)
+        for golfer_id, count in starts.items()
+    }
+
+
+def tournament_fields(session, tournament_ids):
+    """{tournament_id: [golfer_id, ...]}; the list is empty while a field is unpublished."""
+    fields = {tournament_id: [] for tournament_id in tournament_ids}
+    if tournament_ids:
+        for tournament_id, golfer_id in session.connection().execute(
+            select(tournament_golfers.c.tournament_id, tournament_golfers.c.golfer_id)
+            .where(tournament_golfers.c.tournament_id.in_(tournament_ids))
+        ):
+            fields[tournament_id].append(golfer_id)
+    return fields
+
+
+class _Season:
+    """Everything a projection needs, as arrays indexed by user, golfer and remaining tournament."""
+
+    def __init__(self, session):
+        self.season = current_season(session)
+        self.tournaments = remaining_tournaments(session, self.season)
+        tournament_ids = [t.id for t, _ in self.tournaments]
+        tournament_index = {tournament_id: e for e, tournament_id in enumerate(tournament_ids)}
+
+        connection = session.connection() # Core rows; these reads are large
+        users = connection.execute(
+            select(User.id, func.coalesce(UserScore.total_score, 0))
+            .outerjoin(UserScore, UserScore.user_id == User.id)
+            .order_by(User.id)
+        ).all()
+        self.user_ids = [user_id for user_id, _ in users]
+        self.scores = np.array([score for _, score in users], dtype=np.int64)
+        user_index = {user_id: u for u, user_id in enumerate(self.user_ids)}
+
+        # Every golfer each user has used this season, one row per user rather than per pick
+        used = [
+            (user_id, golfers.split(_ID_SEPARATOR)) for user_id, golfers in connection.execute(
+                select(Pick.user_id, func.aggregate_strings(Pick.golfer_id, _ID_SEPARATOR))
+                .join(User, User.id == Pick.user_id) # Picks may name users that don't exist
+                .where(Pick.season == self.season)
+                .group_by(Pick.user_id)
+            )
+        ]
+        fields = tournament_fields(session, tournament_ids)
+        picks = []
+        if tournament_ids:
+            picks = connection.execute(
+                select(Pick.user_id, Pick.golfer_id, Pick.tournament_id)
+                .join(User, User.id == Pick.user_id)
+                .where(Pick.tournament_id.in_(tournament_ids))
+            ).all()
+
+        # Golfers are numbered strongest first, so the first golfer a user can
+        # still pick is also their best one. Unproven golfers rank last.
+        strengths = golfer_strengths(session)
+        floor = min(strengths.values(), default=1.0)
+        golfer_ids = set(strengths).union(*fields.values(), *(golfers for _, golfers in used))
+        self.golfer_ids = sorted(golfer_ids, key=lambda g: (-strengths.get(g, floor), g))
+        golfer_index = {golfer_id: g for g, golfer_id in enumerate(self.golfer_ids)}
+        self.strengths = np.array([strengths.get(g, floor) for g in self.golfer_ids])
+
+        # A field that hasn't been published yet is taken to be the strongest
+        # golfers who have played, as many as in a typical full-field event
+        expected_field = np.arange(min(len(strengths) or len(self.golfer_ids), UNPUBLISHED_FIELD_SIZE))
+        self.fields = [
+            np.array(sorted(golfer_index[g] for g in fields[tournament_id]), dtype=np.intp) if fields[tournament_id]
+            else expected_field
+            for tournament_id in tournament_ids
+        ]
+
+        self.used = np.zeros((len(self.user_ids), len(self.golfer_ids)), dtype=bool)
+        if used:
+            self.used[
+                np.repeat([user_index[user_id] for user_id, _ in used], [len(golfers) for _, golfers in used]),
+                [golfer_index[golfer_id] for _, golfers in used for golfer_id in golfers]
+            ] = True
+        self.plans = np.full((len(self.user_ids), len(tournament_ids), PICKS_PER_TOURNAMENT), -1, dtype=np.intp)
+        filled = {}
+        for user_id, golfer_id, tournament_id in picks:
+            e = tournament_index[tournament_id]
+            u = user_index[user_id]
+            slot = filled[u, e] = filled.get((u, e), -1) + 1
+            if slot < PICKS_PER_TOURNAMENT:
+                self.plans[u, e, slot] = golfer_index[golfer_id]
+
+    def plan_future_picks(self):
+        """Fills each user's empty pick slots with the best golfers they can still use."""
+        used = self.used.copy()
+        for e, field in enumerate(self.fields):
+            playing = np.zeros(len(self.golfer_ids), dtype=bool)
+            playing[field] = True
+            slots = self.plans[:, e]
+            for slot in range(PICKS_PER_TOURNAMENT):
+                need = np.flatnonzero(slots[:, slot] < 0)
+                if not len(need):
+                    continue
+                available = playing & ~used[need]
+                best = available.argmax(axis=1)
+                found = available[np.arange(len(need)), best]
+                slots[need[found], slot] = best[found]
+                used[need[found], best[found]] = True
+
+
+class _PlanSums:
+    """Sums the simulated earnings of a set of plans.
+
+    Tournaments where many plans pick the same golfers are gathered into
+    blocks. A block's sum is taken once per distinct combination of picks and
+    then copied out to the plans, so a tournament joins a block when that adds
+    less work than copying its own sum out would.
+    The result is written to a buffer that the next call reuses.
+    """
+
+    def __init__(self, picks, rows):
+        self.rows = rows
+        self.separate = [] # (tournament, picks) summed pick by pick
+        self.blocks = [] # (tournaments, distinct picks of each, inverse)
+        block, block_cost = [], 0
+        for e, picked in enumerate(picks):
+            # Cost in rows of simulated earnings read or written
+            alone = len(np.unique(picked, axis=0)) * picked.shape[1] + rows
+            if alone >= 2 * rows:
+                self.separate.append((e, picked))
+                continue
+            if block:
+                merged = len(np.unique(np.hstack([picks[b] for b in block + [e]]), axis=0)) \
+                    * picked.shape[1] * (len(block) + 1) + rows
+                if merged < block_cost + alone:
+                    block, block_cost = block + [e], merged
+                    continue
+                self._add_block(picks, block)
+            block, block_cost = [e], alone
+        if block:
+            self._add_block(picks, block)
+        self._buffers = None
+
+    def _add_block(self, picks, block):
+        combinations, inverse = np.unique(np.hstack([picks[e] for e in block]), axis=0, return_inverse=True)
+        width = picks[block[0]].shape[1]
+        self.blocks.append((block, [combinations[:, b * width:(b + 1) * width] for b in range(len(block))],
+                            inverse.reshape(-1)))
+
+    def __call__(self, earnings, simulations, dtype):
+        if self._buffers is None or self._buffers[0].shape[1] != simulations:
+            self._buffers = (np.empty((self.rows, simulations), dtype=dtype),
+                             np.empty((self.rows, simulations), dtype=dtype))
+        total, scratch = self._buffers
+        total.fill(0)
+        for e, picked in self.separate:
+            for slot in range(picked.shape[1]):
+                total += np.take(earnings[e], picked[:, slot], axis=0, out=scratch)
+        for block, golfers, inverse in self.blocks:
+            block_total = np.zeros((len(golfers[0]), simulations), dtype=dtype)
+            for e, picked in zip(block, golfers):
+                for slot in range(picked.shape[1]):
+                    block_total += earnings[e][picked[:, slot]]
+            total += np.take(block_total, inverse, axis=0, out=scratch)
+        return total
+
+
+def _contenders(picks, leader_score, best_case):
+    """The plans whose leaders can finish first in at least one simulation.
+
+    Earnings are never negative, so a plan is out when its leader trails the
+    best score by more than its golfers could earn by taking the top places of
+    every tournament (`best_case`). Plans that pick alike in the tournaments
+    where most plans do (typically those not picked for yet, where everyone
+    takes the best golfers left) only differ in the others, so a plan is also
+    out when it trails the best of its group by more than it could earn there.
+    """
+    if not len(leader_score):
+        return np.zeros(0, dtype=np.intp)
+    alike = [e for e, picked in enumerate(picks) if 2 * len(np.unique(picked, axis=0)) < len(picked)]
+    group = np.unique(np.hstack([picks[e] for e in alike]), axis=0, return_inverse=True)[1].reshape(-1) if alike \
+        else np.zeros(len(leader_score), dtype=np.intp)
+    group_best = np.full(group.max() + 1, np.iinfo(np.int64).min)
+    np.maximum.at(group_best, group, leader_score)
+    best_total = best_case.sum(axis=1)
+    best_differing = best_total - best_case[:, alike].sum(axis=1)
+    return np.flatnonzero((leader_score + best_total >= leader_score.max())
+                          & (leader_score + best_differing >= group_best[group]))
+
+
+def _competition_ranks(totals):
+    """Rank of every user (rows) in every simulation (columns); equal totals share a rank."""
+    by_simulation = np.ascontiguousarray(totals.T)
+    order = np.argsort(by_simulation, axis=1)
+    ordered = np.take_along_axis(by_simulation, order, axis=1)
+    users = ordered.shape[1]
+    # Ascending, so a user's rank is one plus the number of users after the last of their equals
+    last_equal = np.where(np.diff(ordered, axis=1, append=np.iinfo(ordered.dtype).max) != 0,
+                          np.arange(users), users)
+    last_equal = np.minimum.accumulate(last_equal[:, ::-1], axis=1)[:, ::-1]
+    ranks = np.empty_like(order, dtype=np.int32)
+    np.put_along_axis(ranks, order, (users - last_equal).astype(np.int32), axis=1)
+    return ranks.T
+
+
+def project_standings(session, simulations=SIMULATIONS, rank_simulations=RANK_SIMULATIONS, seed=0,
+                      chunk_size=CHUNK_SIZE):
+    """Simulates the rest of the season; the same data and seed give the same projection.
+
+    Each remaining tournament is a Plackett-Luce race over its field, with
+    strengths from past results, paying PGA Tour shares of its winner's prize.
+    Open picks are kept, and empty slots get the strongest golfers each user can
+    still use. Win probabilities use every simulation; ranks need every user,
+    so they use the first `rank_simulations` only.
+
+    Returns a dict with the remaining tournaments, the number of simulations and
+    a row per user (best chances first) with their current score, expected final
+    score, win probability, expected rank and rank percentiles. Raises
+    ProjectionError if the remaining tournaments' prize money is unknown.
+    """
+    season = _Season(session)
+    season.plan_future_picks()
+    rng = np.random.default_rng(seed)
+    user_count = len(season.user_ids)
+    if not season.tournaments:
+        simulations = rank_simulations = 1 # Nothing left to play; the standings are final
+    rank_simulations = min(rank_simulations, simulations)
+
+    plans, user_plan = np.unique(season.plans.reshape(user_count, len(season.tournaments) * PICKS_PER_TOURNAMENT), axis=0, return_inverse=True)
+    user_plan = user_plan.reshape(-1)
+    plans = plans.reshape(len(plans), len(season.tournaments), PICKS_PER_TOURNAMENT)
+
+    # Each plan's picks by golfer number within the field, where the row after
+    # the field (earning nothing) stands for an empty or ineligible pick. The
+    # order of a user's picks doesn't matter, so they are sorted.
+    prizes, picks = [], []
+    best_case = np.zeros((len(plans), len(season.tournaments)), dtype=np.int64)
+    for e, ((tournament, share), field) in enumerate(zip(season.tournaments, season.fields)):
+        prizes.append(payouts(share, len(field)))
+        local = np.full(len(season.golfer_ids) + 1, len(field), dtype=np.intp)
+        local[field] = np.arange(len(field))
+        picks.append(np.sort(local[plans[:, e]], axis=1))
+        # Every golfer picked taking the top places
+        best_case[:, e] = np.concatenate(([0], np.cumsum(prizes[-1])))[
+            np.minimum(np.count_nonzero(picks[-1] < len(field), axis=1), len(field))]
+
+    # Each plan's best placed users; nobody else on the plan can finish above them
+    leader_score = np.full(len(plans), np.iinfo(np.int64).min)
+    np.maximum.at(leader_score, user_plan, season.scores)
+    co_leaders = season.scores == leader_score[user_plan]
+    leader_count = np.bincount(user_plan[co_leaders], minlength=len(plans))
+    contenders = _contenders(picks, leader_score, best_case)
+
+    upper_bound = int(season.scores.max(initial=0)) + int(best_case.sum(axis=1).max(initial=0))
+    dtype = np.int32 if upper_bound < np.iinfo(np.int32).max else np.int64
+    all_plans = _PlanSums(picks, len(plans))
+    contender_plans = _PlanSums([picked[contenders] for picked in picks], len(contenders))
+    contender_scores = leader_score[contenders].astype(dtype)[:, None]
+    contender_weights = leader_count[contenders]
+
+    wins = np.zeros(len(contenders))
+    score_sum = np.zeros(user_count)
+    ranks = np.empty((user_count, rank_simulations), dtype=np.int32)
+    done = 0
+    while done < simulations:
+        size = min(chunk_size, simulations - done)
+        if done < rank_simulations:
+            size = min(size, rank_simulations - done)
+        earnings = [_simulate_tournament(rng, season.strengths[field], prize, size, dtype)
+                    for field, prize in zip(season.fields, prizes)]
+
+        if done < rank_simulations:
+            futures = all_plans(earnings, size, dtype)
+            totals = futures[user_plan] + season.scores.astype(dtype)[:, None]
+            ranks[:, done:done + size] = _competition_ranks(totals)
+            score_sum += totals.sum(axis=1)
+            leader_totals = futures[contenders] + contender_scores
+        else:
+            leader_totals = contender_plans(earnings, size, dtype)
+            leader_totals += contender_scores
+
+        # Ties for first split the win between everyone on the winning total.
+        # Relative to the best total, only rows that reach it are searched.
+        leader_totals -= leader_totals.max(axis=0, initial=np.iinfo(dtype).min)
+        reached = np.flatnonzero(leader_totals.max(axis=1, initial=-1) == 0)
+        rows, columns = np.nonzero(leader_totals[reached] == 0)
+        rows = reached[rows]
+        winners = np.bincount(columns, weights=contender_weights[rows], minlength=size)
+        wins += np.bincount(rows, weights=1 / winners[columns], minlength=len(contenders))
+        done += size
+
+    win_probability = np.zeros(len(plans))
+    win_probability[contenders] = wins / simulations
+    expected_rank = ranks.mean(axis=1)
+    percentiles = np.percentile(ranks, RANK_PERCENTILES, axis=1, method='nearest')
+
+    users = [{
+        "id": user_id,
+        "score": int(season.scores[u]),
+        "expected_score": int(round(score_sum[u] / rank_simulations)),
+        "win_probability": round(float(win_probability[user_plan[u]]), 6) if co_leaders[u] else 0.0,
+        "expected_rank": round(float(expected_rank[u]), 2),
+        "rank_percentiles": {f"p{q}": int(percentiles[i, u]) for i, q in enumerate(RANK_PERCENTILES)},
+    } for u, user_id in enumerate(season.user_ids)]
+    users.sort(key=lambda row: (-row["win_probability"], row["expected_rank"], row["id"]))
+    return {
+        "season": season.season,
+        "simulations": simulations,
+        "rank_simulations": rank_simulations,
+        "remaining_tournaments": [
+            {"id": t.id, "name": t.name, "winners_share": share} for t, share in
+            sorted(season.tournaments, key=lambda entry: (entry[0].submission_end, entry[0].id))
+        ],
+        "users": users,
+    }
+
+
+def expected_earnings(rng, strengths, prizes, simulations):
+    """Mean simulated earnings of every golfer in a field, under the same race as the projection."""
+    return _simulate_tournament(rng, strengths, prizes, simulations, np.int64)[:-1].mean(axis=1)
+
+
+def _simulate_tournament(rng, strengths, prizes, simulations, dtype):
+    """Earnings of every golfer in a field (rows, plus an empty last row) in each simulation (columns).
+
+    Golfers finish in the order of exponential times with rates equal to their
+    strengths, which is a Plackett-Luce draw; only the paid places are sorted.
+    """
+    field_size, places = len(strengths), len(prizes)
+    times = rng.standard_exponential((simulations, field_size), dtype=np.float32)
+    times /= strengths.astype(np.float32)
+    paid = np.argpartition(times, places - 1, axis=1)[:, :places] if places < field_size else \
+        np.broadcast_to(np.arange(field_size), times.shape)
+    paid = np.take_along_axis(paid, np.argsort(np.take_along_axis(times, paid, axis=1), axis=1), axis=1)
+    earned = np.zeros((field_size + 1, simulations), dtype=dtype)
+    earned.reshape(-1)[paid * simulations + np.arange(simulations)[:, None]] = prizes
+    return earned
+
+
+class StoredProjection:
+    """A projection run as stored: the data versions it was run at, when, and its result or error."""
+
+    def __init__(self, etag, saved_at, projection=None, error=None):
+        self.etag = etag
+        self.saved_at = saved_at
+        self.projection = projection
+        self.error = error
+        self.rows = {row["id"]: row for row in projection["users"]} if projection else {}
+
+
+class ProjectionStore:
+    """The latest projection run, shared by every worker through one JSON file.
+
+    `save` writes a new file and renames it over the old one, so readers see
+    one run or the other whole; `current` re-reads the file only once it changes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._stored = None
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """The stored run, or None if there isn't one yet."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    with open(self.path) as f:
+                        self._stored = StoredProjection(**json.load(f))
+                    self._stamp = stamp
+        return self._stored
+
+    def save(self, etag, projection=None, error=None):
+        """Stores a run made at the data versions `etag`: its projection, or the ProjectionError message."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump({"etag": etag, "saved_at": time.time(), "projection": projection, "error": error}, f)
+        os.replace(temporary, self.path)
+        return self.current()
+
+
+def open_projection_store(path=None):
+    return ProjectionStore(path or os.getenv('PROJECTION_FILE', os.path.join(basedir, '.projection.json')))
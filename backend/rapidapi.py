@@ -0,0 +1,273 @@
+"""Shared RapidAPI golf client: pooled, retrying HTTP with an on-disk response cache and a replay mode."""
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import counter, gauge, histogram
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+# Statuses worth retrying: rate limiting and transient upstream failures
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# How long a cached payload stays fresh in live mode, in seconds. Schedules
+# rarely change, fields change with withdrawals, earnings change while an event
+# is being finalized.
+DEFAULT_TTLS = {
+    'schedule': 7 * 24 * 3600,
+    'tournament': 12 * 3600,
+    'earnings': 3600,
+}
+
+# Top-level key that identifies each endpoint's payload in a local fixture file
+FIXTURE_MARKERS = {
+    'earnings': 'leaderboard',
+    'tournament': 'players',
+    'schedule': 'schedule',
+}
+
+
+# Served from: cache, replay (cache or fixture in replay mode), api, or error
+rapidapi_requests = counter('golf_rapidapi_requests_total', "RapidAPI lookups by where they were served from",
+                            ['endpoint', 'source'])
+rapidapi_calls = counter('golf_rapidapi_calls_total', "Calls that reached the API, by final HTTP status",
+                         ['endpoint', 'status'])
+rapidapi_call_seconds = histogram('golf_rapidapi_call_duration_seconds', "API call latency, retries included",
+                                  ['endpoint'])
+# RapidAPI reports the plan's request quota on every response
+QUOTA_HEADERS = {
+    'limit': 'X-RateLimit-Requests-Limit',
+    'remaining': 'X-RateLimit-Requests-Remaining',
+}
+rapidapi_quota = gauge('golf_rapidapi_quota_requests', "Request quota of the RapidAPI plan, as last reported",
+                       ['kind'])
+
+
+class RapidAPIError(requests.exceptions.RequestException):
+    """Raised for any failure to get a payload, so callers can keep catching RequestException."""
+
+
+class RapidAPINotConfigured(RapidAPIError):
+    pass
+
+
+class ReplayMiss(RapidAPIError):
+    pass
+
+
+def cache_key(endpoint, params):
+    """Content address of a request: a hash of the endpoint and its sorted parameters."""
+    canonical = json.dumps({"endpoint": endpoint, "params": {k: str(v) for k, v in params.items()}}, sort_keys=True)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class RapidAPIClient:
+    """Calls `/tournament`, `/earnings` and `/schedule`, keeping raw payloads in `cache_dir`.
+
+    In 'live' mode fresh cache entries are served and the API is called for the
+    rest. 'replay' mode never touches the network: it serves cached entries of
+    any age, then local payload files such as genesis_invitational_2025_earnings.txt.
+    """
+    def __init__(self, key=None, host=None, base_url=None, mode='live', cache_dir=None, fixtures_dir=None,
+                 ttls=None, pool_size=10, connect_timeout=3.05, read_timeout=20, retries=5, backoff_factor=0.5):
+        if mode not in ('live', 'replay'):
+            raise ValueError(f"Unknown RapidAPI mode '{mode}'")
+        self.key = key
+        self.host = host
+        self.base_url = (base_url or (f"https://{host}" if host else '')).rstrip('/')
+        self.mode = mode
+        self.cache_dir = cache_dir
+        self.fixtures_dir = fixtures_dir
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.http = requests.Session()
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+
+        self._fixtures = None
+        self._fixtures_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """
+        Builds a client from RAPIDAPI_KEY, RAPIDAPI_HOST, RAPIDAPI_BASE_URL,
+        RAPIDAPI_MODE, RAPIDAPI_CACHE_DIR (empty string disables the cache),
+        RAPIDAPI_FIXTURES_DIR, RAPIDAPI_TTL_<ENDPOINT>, RAPIDAPI_POOL_SIZE,
+        RAPIDAPI_CONNECT_TIMEOUT and RAPIDAPI_READ_TIMEOUT.
+        """
+        ttls = {
+            endpoint: int(os.environ[f'RAPIDAPI_TTL_{endpoint.upper()}'])
+            for endpoint in DEFAULT_TTLS if f'RAPIDAPI_TTL_{endpoint.upper()}' in os.environ
+        }
+        options = dict(
+            key=os.getenv('RAPIDAPI_KEY'),
+            host=os.getenv('RAPIDAPI_HOST'),
+            base_url=os.getenv('RAPIDAPI_BASE_URL'),
+            mode=os.getenv('RAPIDAPI_MODE', 'live'),
+            cache_dir=os.getenv('RAPIDAPI_CACHE_DIR', os.path.join(basedir, '.rapidapi_cache')) or None,
+            fixtures_dir=os.getenv('RAPIDAPI_FIXTURES_DIR', basedir),
+            ttls=ttls,
+            pool_size=int(os.getenv('RAPIDAPI_POOL_SIZE', 10)),
+            connect_timeout=float(os.getenv('RAPIDAPI_CONNECT_TIMEOUT', 3.05)),
+            read_timeout=float(os.getenv('RAPIDAPI_READ_TIMEOUT', 20)),
+        )
+        options.update(overrides)
+        return cls(**options)
+
+    @property
+    def configured(self):
+        return self.mode == 'replay' or bool(self.key and self.host)
+
+    def close(self):
+        self.http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Endpoints ---
+    def tournament(self, tourn_id, year, org_id="1", use_cache=True):
+        return self.get('tournament', {"orgId": org_id, "tournId": tourn_id, "year": str(year)}, use_cache)
+
+    def earnings(self, tourn_id, year, use_cache=True):
+        return self.get('earnings', {"tournId": tourn_id, "year": str(year)}, use_cache)
+
+    def schedule(self, year, org_id="1", use_cache=True):
+        return self.get('schedule', {"orgId": org_id, "year": str(year)}, use_cache)
+
+    def get(self, endpoint, params, use_cache=True):
+        """Returns the decoded JSON payload for an endpoint, from the cache when possible."""
+        key = cache_key(endpoint, params)
+
+        if self.mode == 'replay':
+            body = self._read_cache(endpoint, key, max_age=None)
+            if body is None:
+                body = self._read_fixture(endpoint, params)
+            if body is None:
+                rapidapi_requests.inc(endpoint, 'error')
+                raise ReplayMiss(f"No cached or fixture payload for /{endpoint} {params}")
+            rapidapi_requests.inc(endpoint, 'replay')
+            return json.loads(body)
+
+        if use_cache:
+            body = self._read_cache(endpoint, key, max_age=self.ttls.get(endpoint, 0))
+            if body is not None:
+                rapidapi_requests.inc(endpoint, 'cache')
+                return json.loads(body)
+
+        if not self.configured:
+            rapidapi_requests.inc(endpoint, 'error')
+            raise RapidAPINotConfigured("RapidAPI key or host not configured in environment variables")
+        started = time.perf_counter()
+        try:
+            response = self.http.get(
+                f"{self.base_url}/{endpoint}",
+                headers={"x-rapidapi-key": self.key, "x-rapidapi-host": self.host},
+                params=params,
+                timeout=self.timeout
+            )
+        except requests.exceptions.RequestException:
+            rapidapi_calls.inc(endpoint, 'failed')
+            rapidapi_requests.inc(endpoint, 'error')
+            raise
+        finally:
+            rapidapi_call_seconds.observe(time.perf_counter() - started, endpoint)
+        rapidapi_calls.inc(endpoint, str(response.status_code))
+        self._record_quota(response.headers)
+        try:
+            response.raise_for_status()
+            data = response.json()
+        except (ValueError, requests.exceptions.RequestException): # Error status or an undecodable body
+            rapidapi_requests.inc(endpoint, 'error')
+            raise
+        rapidapi_requests.inc(endpoint, 'api')
+        self._write_cache(endpoint, key, response.content)
+        return data
+
+    def _record_quota(self, headers):
+        for kind, header in QUOTA_HEADERS.items():
+            value = headers.get(header)
+            if value is not None and value.isdigit():
+                rapidapi_quota.set(int(value), kind)
+
+    # --- On-disk cache ---
+    def _cache_path(self, endpoint, key):
+        return os.path.join(self.cache_dir, endpoint, f"{key}.json")
+
+    def _read_cache(self, endpoint, key, max_age):
+        if not self.cache_dir:
+            return None
+        path = self._cache_path(endpoint, key)
+        try:
+            if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+                return None
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_cache(self, endpoint, key, body):
+        if not self.cache_dir:
+            return
+        path = self._cache_path(endpoint, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: could not write RapidAPI cache entry {path}: {e}")
+
+    # --- Local fixtures (replay mode) ---
+    def _read_fixture(self, endpoint, params):
+        fixtures = self._load_fixtures()
+        return (fixtures.get((endpoint, params.get('tournId'), params.get('year')))
+                or fixtures.get((endpoint, params.get('tournId'), None)))
+
+    def _load_fixtures(self):
+        """Indexes every JSON payload file in the fixtures directory by (endpoint, tournId, year)."""
+        with self._fixtures_lock:
+            if self._fixtures is not None:
+                return self._fixtures
+            self._fixtures = {}
+            if not self.fixtures_dir or not os.path.isdir(self.fixtures_dir):
+                return self._fixtures
+            for name in sorted(os.listdir(self.fixtures_dir)):
+                if not name.endswith(('.txt', '.json')):
+                    continue
+                path = os.path.join(self.fixtures_dir, name)
+                try:
+                    with open(path, 'rb') as f:
+                        body = f.read()
+                    payload = json.loads(body)
+                except (OSError, ValueError):
+                    continue
+                if not isinstance(payload, dict):
+                    continue
+                for endpoint, marker in FIXTURE_MARKERS.items():
+                    if marker in payload:
+                        tourn_id = payload.get('tournId')
+                        year = str(payload['year']) if payload.get('year') is not None else None
+                        self._fixtures.setdefault((endpoint, tourn_id, year), body)
+                        self._fixtures.setdefault((endpoint, tourn_id, None), body)
+            return self._fixtures
@@ -0,0 +1,227 @@
+"""Streams RapidAPI `/schedule` payloads into `tournament`, one row per (tourn_id, year)."""
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Integer, String, bindparam, column, insert, select, table, update
+
+from jsonstream import FIELD, ITEM, iter_members
+
+# Lightweight table construct so this module works without the Flask app. The
+# types matter: they make datetimes bind the same way the ORM model does.
+tournament = table(
+    'tournament',
+    column('id', String),
+    column('tourn_id', String),
+    column('name', String),
+    column('year', Integer),
+    column('submission_start', DateTime),
+    column('submission_end', DateTime),
+    column('purse', Integer),
+    column('winners_share', Integer),
+)
+
+MAJORS = (
+    "THE PLAYERS Championship",
+    "Masters Tournament",
+    "PGA Championship",
+    "U.S. Open",
+    "The Open Championship",
+)
+
+DEFAULT_EVENTS = 'majors'
+
+# IDs per existing-tournament lookup, well under SQLite's bound parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+MS_PER_DAY = 24 * 3600 * 1000
+LAST_SECOND_MS = (23 * 3600 + 59 * 60 + 59) * 1000 # 23:59:59
+# 1970-01-01 was a Thursday; with Monday == 0 that is weekday 3
+EPOCH_WEEKDAY = 3
+
+
+class EventSelector:
+    """Decides which schedule events become tournaments.
+
+    Built from a rule string:
+        majors           the five majors (the original behaviour)
+        all              every event with a tournId
+        stroke           every stroke-play event (drops team and match play)
+        <name>,<id>,...  events whose tournId equals, or whose name contains,
+                         one of the comma separated terms (case-insensitive)
+    """
+
+    def __init__(self, rule=DEFAULT_EVENTS):
+        self.rule = (rule or DEFAULT_EVENTS).strip()
+        preset = self.rule.lower()
+        if preset == 'majors':
+            self.terms = [name.lower() for name in MAJORS]
+        elif preset in ('all', 'stroke'):
+            self.terms = None
+        else:
+            self.terms = [term.strip().lower() for term in self.rule.split(',') if term.strip()]
+            if not self.terms:
+                raise ValueError(f"Empty event selection rule '{rule}'")
+        self.stroke_only = preset == 'stroke'
+
+    def __call__(self, event):
+        if not event.get('tournId'):
+            return False
+        if self.stroke_only:
+            return event.get('format') == 'stroke'
+        if self.terms is None:
+            return True
+        name = (event.get('name') or '').lower()
+        tourn_id = str(event['tournId']).lower()
+        return any(term == tourn_id or term in name for term in self.terms)
+
+
+def submission_windows(start_timestamps_ms):
+    """Submission windows for a batch of tournament start times (epoch milliseconds).
+
+    The window opens on the Sunday before the start (at the start's time of day)
+    and closes at 23:59:59 on the Wednesday before the Thursday of that week.
+    Weekdays come straight from the day number, so the whole batch is integer
+    arithmetic with one datetime built per bound.
+    """
+    windows = []
+    for start_ms in start_timestamps_ms:
+        day, ms_of_day = divmod(start_ms, MS_PER_DAY)
+        weekday = (day + EPOCH_WEEKDAY) % 7
+        start_ms = (day - (weekday + 1) % 7) * MS_PER_DAY + ms_of_day
+        wednesday = day + (3 - weekday + 7) % 7 - 1
+        end_ms = wednesday * MS_PER_DAY + LAST_SECOND_MS + ms_of_day % 1000
+        windows.append((
+            datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc),
+            datetime.fromtimestamp(end_ms / 1000, tz=timezone.utc),
+        ))
+    return windows
+
+
+def read_schedule_events(path, select_event):
+    """Streams a `/schedule` file and returns `(year, selected_events)`.
+
+    Raises ValueError if the file has no `year` or no `schedule`, and
+    json.JSONDecodeError (a ValueError) if it is not valid JSON.
+    """
+    year = None
+    has_schedule = False
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for kind, key, value in iter_members(f, {'schedule'}):
+            if key == 'schedule':
+                has_schedule = True
+            if kind == FIELD and key == 'year':
+                year = value
+            elif kind == ITEM and select_event(value):
+                events.append(value)
+    if not has_schedule:
+        raise ValueError(f"No schedule found in {os.path.basename(path)}")
+    if year is None:
+        raise ValueError(f"Year not found in schedule file {os.path.basename(path)}")
+    return year, events
+
+
+def prize_money(value):
+    """Dollars from a schedule `purse` or `winnersShare` ({"$numberInt": ...}), or None if not announced."""
+    if isinstance(value, dict):
+        value = value.get('$numberInt', value.get('$numberLong'))
+    try:
+        amount = int(value)
+    except (TypeError, ValueError):
+        return None
+    return amount or None # Schedules list unannounced prize money as 0
+
+
+def tournament_rows(year, events):
+    """Turns selected schedule events into `tournament` rows, skipping incomplete ones."""
+    starts = []
+    named = []
+    for event in events:
+        try:
+            starts.append(int(event['date']['start']['$date']['$numberLong']))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Skipping tournament due to missing data: {event.get('name', '')}, Error: {e!r}")
+            continue
+        named.append(event)
+
+    return [
+        {
+            "tourn_id": event['tournId'],
+            "name": event.get('name', ''),
+            "year": int(year),
+            "submission_start": window_start,
+            "submission_end": window_end,
+            "purse": prize_money(event.get('purse')),
+            "winners_share": prize_money(event.get('winnersShare')),
+        }
+        for event, (window_start, window_end) in zip(named, submission_windows(starts))
+    ]
+
+
+def _naive_utc(value):
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def _changed(existing, row):
+    return (
+        existing.name != row['name']
+        or _naive_utc(existing.submission_start) != _naive_utc(row['submission_start'])
+        or _naive_utc(existing.submission_end) != _naive_utc(row['submission_end'])
+        or existing.purse != row['purse']
+        or existing.winners_share != row['winners_share']
+    )
+
+
+def season_tournament_id(tourn_id, year):
+    """The ID of a new tournament row: the tournId qualified by its season, e.g. '2026-007'."""
+    return f"{year}-{tourn_id}"
+
+
+def find_tournament_id(session, tourn_id, year=None):
+    """The ID of the stored tournament for a RapidAPI tournId and season, or None.
+
+    Without a year, the latest season's tournament with that tournId.
+    """
+    query = select(tournament.c.id).where(tournament.c.tourn_id == str(tourn_id))
+    if year is not None:
+        query = query.where(tournament.c.year == int(year))
+    return session.execute(query.order_by(tournament.c.year.desc()).limit(1)).scalar()
+
+
+def upsert_tournaments(session, rows):
+    """Inserts new tournaments and updates changed ones in set-based statements.
+
+    Rows are matched to stored tournaments on `(tourn_id, year)`, so loading a
+    new season never touches an earlier one. Within `rows`, the last row for an
+    event and season wins. Returns `(inserted, updated)`. The caller is
+    responsible for committing.
+    """
+    rows_by_key = {(row['tourn_id'], row['year']): row for row in rows}
+    if not rows_by_key:
+        return 0, 0
+
+    tourn_ids = sorted({tourn_id for tourn_id, _ in rows_by_key})
+    existing = {}
+    for start in range(0, len(tourn_ids), LOOKUP_CHUNK_SIZE):
+        result = session.execute(
+            select(tournament).where(tournament.c.tourn_id.in_(tourn_ids[start:start + LOOKUP_CHUNK_SIZE]))
+        )
+        existing.update(((r.tourn_id, r.year), r) for r in result)
+
+    new_rows = [
+        {**row, 'id': season_tournament_id(*key)} for key, row in rows_by_key.items() if key not in existing
+    ]
+    changed_rows = [
+        {**row, 'b_id': existing[key].id} for key, row in rows_by_key.items()
+        if key in existing and _changed(existing[key], row)
+    ]
+
+    if new_rows:
+        session.execute(insert(tournament), new_rows)
+    if changed_rows:
+        session.execute(
+            # The SET clause comes from the keys of each parameter set
+            update(tournament).where(tournament.c.id == bindparam('b_id')),
+            changed_rows,
+        )
+    return len(new_rows), len(changed_rows)
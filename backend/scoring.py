@@ -0,0 +1,136 @@
+"""Keeps the materialized `user_score` table in step with picks and results, in plain SQL."""
+from sqlalchemy import bindparam, text
+
+# Sum of the earnings of a user's picks. Correlated against `user_score.user_id`.
+_USER_TOTAL_SUBQUERY = """
+    SELECT COALESCE(SUM(tr.earnings), 0)
+    FROM pick p
+    JOIN tournament_result tr
+      ON tr.golfer_id = p.golfer_id AND tr.tournament_id = p.tournament_id
+    WHERE p.user_id = user_score.user_id
+"""
+
+# The aggregate the scoreboard used to run on every request. Kept here as the
+# source of truth for `rebuild_user_scores` and `find_score_mismatches`.
+_AGGREGATE_QUERY = """
+    SELECT u.id AS user_id, COALESCE(SUM(tr.earnings), 0) AS total_score
+    FROM "user" u
+    LEFT JOIN pick p ON p.user_id = u.id
+    LEFT JOIN tournament_result tr
+      ON tr.golfer_id = p.golfer_id AND tr.tournament_id = p.tournament_id
+    GROUP BY u.id
+"""
+
+
+def ensure_user_score_rows(session, user_ids):
+    """Creates a zero score row for any of the given users that doesn't have one yet."""
+    if not user_ids:
+        return
+    session.execute(text("""
+        INSERT INTO user_score (user_id, total_score)
+        SELECT u.id, 0 FROM "user" u WHERE u.id IN :user_ids
+        ON CONFLICT (user_id) DO NOTHING
+    """).bindparams(bindparam('user_ids', expanding=True)), {"user_ids": list(user_ids)})
+
+
+def refresh_scores_for_users(session, user_ids):
+    """Recomputes the stored total for each of the given users."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    session.flush()
+    ensure_user_score_rows(session, user_ids)
+    session.execute(text(f"""
+        UPDATE user_score SET total_score = ({_USER_TOTAL_SUBQUERY})
+        WHERE user_id IN :user_ids
+    """).bindparams(bindparam('user_ids', expanding=True)), {"user_ids": user_ids})
+
+
+# Stored totals of everyone with picks in a tournament
+_TOURNAMENT_PICKER_TOTALS = """
+    SELECT us.user_id, us.total_score FROM user_score us
+    WHERE us.user_id IN (SELECT p.user_id FROM pick p WHERE p.tournament_id = :tournament_id)
+"""
+
+
+def refresh_scores_for_tournament(session, tournament_id):
+    """Recomputes the stored total for every user who has picks in a tournament.
+
+    Call this in the same transaction that writes the tournament's results.
+    Returns `{user_id: (previous_total, new_total)}` for the totals that changed.
+    """
+    session.flush()
+    params = {"tournament_id": tournament_id}
+    previous = dict(session.execute(text(_TOURNAMENT_PICKER_TOTALS), params).all())
+    session.execute(text("""
+        INSERT INTO user_score (user_id, total_score)
+        SELECT DISTINCT p.user_id, 0 FROM pick p WHERE p.tournament_id = :tournament_id
+        ON CONFLICT (user_id) DO NOTHING
+    """), params)
+    session.execute(text(f"""
+        UPDATE user_score SET total_score = ({_USER_TOTAL_SUBQUERY})
+        WHERE user_id IN (SELECT p.user_id FROM pick p WHERE p.tournament_id = :tournament_id)
+    """), params)
+    return {
+        user_id: (previous.get(user_id, 0), total)
+        for user_id, total in session.execute(text(_TOURNAMENT_PICKER_TOTALS), params)
+        if previous.get(user_id, 0) != total
+    }
+
+
+def scoreboard_position(session, total_score, user_id):
+    """Returns `(rank, position)` of a scoreboard row, both 1-based.
+
+    `rank` is the competition rank (users on equal totals share it) and
+    `position` is the row's place in (total_score DESC, user_id) order. Counts
+    only the rows at or above the given total, so it is cheap near the top.
+    """
+    above, before = session.execute(text("""
+        SELECT
+            COALESCE(SUM(CASE WHEN total_score > :total_score THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN total_score > :total_score OR user_id < :user_id THEN 1 ELSE 0 END), 0)
+        FROM user_score
+        WHERE total_score >= :total_score
+    """), {"total_score": total_score, "user_id": user_id}).one()
+    return above + 1, before + 1
+
+
+def rebuild_user_scores(session):
+    """Throws away and recomputes every stored total from the aggregate query.
+
+    Returns the number of rows written. The caller is responsible for committing.
+    """
+    session.flush()
+    session.execute(text("DELETE FROM user_score"))
+    result = session.execute(text(f"""
+        INSERT INTO user_score (user_id, total_score)
+        SELECT agg.user_id, agg.total_score FROM ({_AGGREGATE_QUERY}) agg
+    """))
+    return result.rowcount
+
+
+def find_score_mismatches(session):
+    """Compares the stored totals against the aggregate query.
+
+    Returns a list of `(user_id, stored_score, expected_score)` tuples, where a
+    missing row is reported with a stored score of None. An empty list means the
+    table is consistent.
+    """
+    rows = session.execute(text(f"""
+        SELECT agg.user_id, us.total_score, agg.total_score
+        FROM ({_AGGREGATE_QUERY}) agg
+        LEFT JOIN user_score us ON us.user_id = agg.user_id
+        WHERE us.total_score IS NULL OR us.total_score != agg.total_score
+        UNION ALL
+        SELECT us.user_id, us.total_score, NULL
+        FROM user_score us
+        WHERE us.user_id NOT IN (SELECT id FROM "user")
+    """)).all()
+    return [(r[0], r[1], r[2]) for r in rows]
+
+
+def user_scores_need_rebuild(session):
+    """True when users exist but the score table has never been populated."""
+    has_users = session.execute(text('SELECT 1 FROM "user" LIMIT 1')).first() is not None
+    has_scores = session.execute(text("SELECT 1 FROM user_score LIMIT 1")).first() is not None
+    return has_users and not has_scores
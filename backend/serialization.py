@@ -0,0 +1,58 @@
+"""JSON encoding for API responses through orjson, and JSON arrays built from streamed rows."""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError: # Optional speedup; the stdlib encoder is used without it
+    orjson = None
+
+if orjson is not None:
+    # Datetimes go through Flask's default hook so they keep their HTTP date format
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider on orjson when it is installed. Unlike Flask's default, keys are not sorted."""
+
+    def dumps_bytes(self, obj):
+        """Compact UTF-8 encoded JSON for `obj`."""
+        if orjson is None:
+            return super().dumps(obj, separators=(",", ":")).encode('utf-8')
+        return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS)
+
+    def dumps(self, obj, **kwargs):
+        # Callers asking for stdlib options (indent, sort_keys, ...) get the stdlib encoder
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        option = ORJSON_OPTIONS
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        body = orjson.dumps(obj, default=self.default, option=option) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def iter_json_array(batches, dumps_bytes):
+    """Yields a JSON array, as byte chunks, holding the elements of every batch in turn.
+
+    Each non-empty batch (a list) is encoded with one `dumps_bytes` call, so the
+    per-chunk overhead is paid once per batch rather than once per element.
+    """
+    opened = False
+    for batch in batches:
+        if not batch:
+            continue
+        body = dumps_bytes(batch)
+        yield (b',' if opened else b'[') + body[1:-1]
+        opened = True
+    yield b']' if opened else b'[]'
@@ -0,0 +1,81 @@
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, os.path.join(backend_dir, 'benchmarks')) # For the RapidAPI stub
+
+# app.py reads its configuration on import; keep tests that import it off the real files
+_workdir = tempfile.mkdtemp(prefix='golf-tests-')
+os.environ.update(
+    DATABASE_URL='sqlite:///' + os.path.join(_workdir, 'app.db'),
+    DATA_VERSIONS_FILE=os.path.join(_workdir, 'data_versions'),
+    METRICS_DIR=os.path.join(_workdir, 'metrics'),
+    EARNINGS_ARCHIVE_DIR=os.path.join(_workdir, 'earnings_archive'),
+    PROJECTION_FILE=os.path.join(_workdir, 'projection.json'),
+)
+
+from database import create_engine
+from migrations import upgrade
+from models import Base, Golfer, Pick, Tournament, TournamentResult, User, tournament_golfers
+from scoring import rebuild_user_scores
+from stub_rapidapi import start_stub_server
+
+
+@pytest.fixture
+def session(tmp_path, capsys):
+    """A session on a fresh SQLite database at the latest schema."""
+    engine = create_engine('sqlite:///' + str(tmp_path / 'test.db'))
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        upgrade(session)
+        capsys.readouterr() # Migration progress
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def rapidapi_stub():
+    """The local RapidAPI stub, serving the payload files checked into the backend directory."""
+    stub = start_stub_server()
+    yield stub
+    stub.shutdown()
+    stub.server_close()
+
+
+@pytest.fixture
+def season(session):
+    """A small season: two scored tournaments, one open and one future, four users with picks."""
+    now = datetime.utcnow()
+    golfers = [f"G{g}" for g in range(12)]
+    session.execute(insert(Golfer), [{"id": g, "name": f"Golfer {g}"} for g in golfers])
+    session.execute(insert(User), [{"id": u, "displayName": u, "email": f"{u}@example.com",
+                                    "display_name_normalized": u, "email_normalized": f"{u}@example.com"}
+                                   for u in ("alice", "bob", "carol", "dave")])
+    schedule = [("T1", -20, True), ("T2", -10, True), ("T3", 2, False), ("T4", 9, False)]
+    session.execute(insert(Tournament), [{
+        "id": t, "name": f"Tournament {t}", "year": now.year, "winners_share": 3_600_000,
+        "submission_start": now + timedelta(days=days - 3), "submission_end": now + timedelta(days=days),
+    } for t, days, _ in schedule])
+    session.execute(insert(tournament_golfers), [{"tournament_id": t, "golfer_id": g}
+                                                 for t, _, _ in schedule[:3] for g in golfers])
+    # Lower numbered golfers earn more, so they are the strongest
+    session.execute(insert(TournamentResult), [{"tournament_id": t, "golfer_id": g, "earnings": 1_000_000 // (i + 1)}
+                                               for t, _, scored in schedule if scored for i, g in enumerate(golfers)])
+    picks = {
+        "alice": {"T1": ["G0", "G1", "G2"], "T2": ["G3", "G4", "G5"]},
+        "bob": {"T1": ["G6", "G7", "G8"], "T3": ["G0", "G1", "G2"]},
+        "carol": {"T2": ["G9", "G10", "G11"]},
+    }
+    session.execute(insert(Pick), [{"user_id": u, "tournament_id": t, "season": now.year, "golfer_id": g}
+                                   for u, by_tournament in picks.items()
+                                   for t, golfer_ids in by_tournament.items() for g in golfer_ids])
+    rebuild_user_scores(session)
+    session.commit()
+    return {"now": now, "golfers": golfers, "picks": picks}
@@ -0,0 +1,39 @@
+import pytest
+
+from app import app, data_versions, db
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+    return app.test_client()
+
+
+def _get(client, **headers):
+    response = client.get('/api/tournaments', headers=headers)
+    response.close() # Ends a streamed body, and the request context it holds
+    return response
+
+
+def test_etag_revalidation_follows_the_version(client):
+    first = _get(client)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    assert _get(client, **{'If-None-Match': etag}).status_code == 304
+
+    data_versions.bump('tournaments')
+    changed = _get(client, **{'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_a_write_in_the_same_second_is_not_hidden_by_if_modified_since(client):
+    first = _get(client)
+    data_versions.bump('tournaments') # Well within the second Last-Modified names
+
+    again = _get(client, **{'If-Modified-Since': first.headers['Last-Modified']})
+
+    assert again.status_code == 200
+    assert again.headers['ETag'] != first.headers['ETag']
@@ -0,0 +1,22 @@
+import json
+from collections import namedtuple
+
+from app import _detailed_scoreboard_chunks, app
+
+Row = namedtuple('Row', 'tournament_id tournament_name user_id displayName golfer_name earnings')
+
+
+def test_picks_of_users_read_after_the_user_list_are_counted():
+    overall_scores = {"alice": {"user_id": "alice", "displayName": "Alice", "total_score": 0}}
+    picks = [
+        Row("T2", "Second", "alice", "Alice", "Golfer 1", 300),
+        Row("T2", "Second", "bob", "Bob", "Golfer 2", 500), # Signed up after overall_scores was read
+        Row("T1", "First", "alice", "Alice", "Golfer 3", None),
+    ]
+
+    with app.app_context():
+        body = json.loads(b''.join(_detailed_scoreboard_chunks(iter(picks), overall_scores)))
+
+    assert [t["id"] for t in body["tournaments"]] == ["T2", "T1"]
+    assert [u["user_id"] for u in body["tournaments"][0]["user_scores"]] == ["bob", "alice"]
+    assert [(u["user_id"], u["total_score"]) for u in body["overall_leaderboard"]] == [("bob", 500), ("alice", 300)]
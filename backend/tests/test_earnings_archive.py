@@ -0,0 +1,49 @@
+import json
+import os
+
+from sqlalchemy import insert, update
+
+from earnings_archive import EarningsArchive
+from models import TournamentResult
+
+
+def _files(archive):
+    """The current generation's arrays and manifest, as bytes, less the generation number."""
+    generation = archive.current()
+    path = os.path.join(archive.directory, f"gen-{generation.number}")
+    with open(os.path.join(archive.directory, 'manifest.json')) as f:
+        manifest = {key: value for key, value in json.load(f).items() if key != 'generation'}
+    files = {}
+    for name in sorted(os.listdir(path)):
+        with open(os.path.join(path, name), 'rb') as f:
+            files[name] = f.read()
+    return manifest, files
+
+
+def _fresh(session, tmp_path, name):
+    archive = EarningsArchive(str(tmp_path / name))
+    assert archive.refresh(session)
+    return _files(archive)
+
+
+def test_incremental_refreshes_write_what_a_fresh_build_would(session, season, tmp_path):
+    archive = EarningsArchive(str(tmp_path / 'archive'))
+    assert archive.refresh(session)
+
+    # A new tournament's results, with golfers sorting before and after the known ones
+    session.execute(insert(TournamentResult), [{"tournament_id": "T3", "golfer_id": g, "earnings": 50_000}
+                                               for g in ("A1", "G0", "Z9")])
+    session.commit()
+    assert archive.refresh(session, ["T3"])
+    assert archive.current().number == 2
+    assert _files(archive) == _fresh(session, tmp_path, 'fresh-1')
+
+    # A corrected result in the first tournament, so every later row is carried over
+    session.execute(update(TournamentResult).where(TournamentResult.tournament_id == "T1",
+                                                   TournamentResult.golfer_id == "G1").values(earnings=1))
+    session.commit()
+    assert archive.refresh(session, ["T1"])
+    assert _files(archive) == _fresh(session, tmp_path, 'fresh-2')
+
+    [stats] = archive.current().stats(["A1"])
+    assert (stats["career"]["earnings"], stats["career"]["starts"]) == (50_000, 1)
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+import app as app_module
+from app import app, db, golfer_field_cache
+from models import Tournament
+
+
+def test_waiter_takes_over_a_lease_left_by_a_crashed_refresh(monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(app_module, 'FIELD_REFRESH_POLL_SECONDS', 0.05)
+    monkeypatch.setattr(app_module, 'FIELD_REFRESH_LEASE', timedelta(seconds=5))
+    monkeypatch.setattr(app_module, '_refresh_tournament_field',
+                        lambda tournament_id: refreshed.append(tournament_id) or (200, b'[]'))
+    with app.app_context():
+        db.create_all()
+        db.session.query(Tournament).filter_by(id="LEASED").delete()
+        # Never loaded, and the lease is held by a worker that won't come back
+        db.session.add(Tournament(id="LEASED", name="Leased", year=2026, submission_start=datetime.utcnow(),
+                                  submission_end=datetime.utcnow() + timedelta(days=3),
+                                  golfers_refresh_lease_until=datetime.utcnow() + timedelta(seconds=0.3)))
+        db.session.commit()
+    golfer_field_cache.pop("LEASED")
+
+    response = app.test_client().get('/api/tournaments/LEASED/golfers')
+
+    assert response.status_code == 200
+    assert refreshed == ["LEASED"]
+    with app.app_context():
+        assert db.session.get(Tournament, "LEASED").golfers_refresh_lease_until is None # Released
@@ -0,0 +1,72 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from ingest import ingest_earnings_file
+from models import Pick, Tournament, TournamentResult, User, UserScore
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def payload(session):
+    """The Genesis Invitational earnings payload, with its tournament and a user who picked the winner."""
+    with open(os.path.join(backend_dir, 'genesis_invitational_2025_earnings.txt')) as f:
+        payload = json.load(f)
+    session.execute(insert(Tournament), [{"id": "2025-007", "tourn_id": "007", "name": "Genesis", "year": 2025,
+                                          "submission_start": datetime(2025, 2, 10),
+                                          "submission_end": datetime(2025, 2, 13)}])
+    session.execute(insert(User), [{"id": "alice", "displayName": "alice", "email": "alice@example.com"}])
+    session.execute(insert(Pick), [{"user_id": "alice", "tournament_id": "2025-007", "season": 2025,
+                                    "golfer_id": payload['leaderboard'][0]['playerId']}])
+    session.commit()
+    return payload
+
+
+def _write(tmp_path, payload, text=None):
+    path = tmp_path / 'earnings.json'
+    path.write_text(text if text is not None else json.dumps(payload))
+    return str(path)
+
+
+def _results(session):
+    return dict(session.execute(select(TournamentResult.golfer_id, TournamentResult.earnings)).all())
+
+
+def test_ingesting_a_file_again_updates_it_in_place(session, tmp_path, payload):
+    leaderboard = payload['leaderboard']
+    winner = leaderboard[0]['playerId']
+    assert ingest_earnings_file(session, _write(tmp_path, payload), batch_size=10) == ("2025-007", len(leaderboard))
+
+    leaderboard[0]['earnings'] = {'$numberInt': '4100000'}
+    assert ingest_earnings_file(session, _write(tmp_path, payload), batch_size=10) == ("2025-007", len(leaderboard))
+
+    results = _results(session)
+    assert len(results) == session.scalar(select(func.count()).select_from(TournamentResult)) == len(leaderboard)
+    assert results[winner] == 4_100_000
+    assert session.get(UserScore, "alice").total_score == 4_100_000
+
+
+def test_a_file_that_fails_partway_writes_nothing(session, tmp_path, payload):
+    text = json.dumps(payload)
+    truncated = text[:text.index(payload['leaderboard'][30]['playerId'])] # After three batches of ten
+
+    with pytest.raises(ValueError): # json.JSONDecodeError
+        ingest_earnings_file(session, _write(tmp_path, payload, truncated), batch_size=10)
+
+    assert _results(session) == {}
+    assert session.get(UserScore, "alice") is None
+
+    # The complete file then loads as if the failure never happened
+    assert ingest_earnings_file(session, _write(tmp_path, payload), batch_size=10)[1] == len(payload['leaderboard'])
+    assert session.get(UserScore, "alice").total_score == 4_000_000
+
+
+def test_a_file_for_a_season_that_is_not_loaded_writes_nothing(session, tmp_path, payload):
+    with pytest.raises(ValueError, match="has not been loaded"):
+        ingest_earnings_file(session, _write(tmp_path, dict(payload, year="2026")), batch_size=10)
+
+    assert _results(session) == {}
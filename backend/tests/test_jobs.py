@@ -0,0 +1,81 @@
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from jobs import JobScheduler, Reschedule, job
+
+
+def _scheduler(session, name, handlers=None, **options):
+    # Each scheduler stands in for a different process
+    worker = type('Worker', (JobScheduler,), {'worker': name})
+    engine = session.get_bind()
+    return worker(lambda: engine, handlers or {}, **options)
+
+
+def _row(session, key='k'):
+    session.rollback() # See the schedulers' commits
+    return session.execute(select(job).where(job.c.key == key)).one()
+
+
+def test_a_leased_job_is_claimed_once(session):
+    a, b = _scheduler(session, 'a'), _scheduler(session, 'b')
+    a.plan([('kind', 'k', datetime.utcnow() - timedelta(seconds=1))])
+
+    [claimed] = a._claim(1)
+
+    assert (claimed.key, claimed.attempts) == ('k', 1)
+    assert b._claim(1) == []
+    assert (_row(session).status, _row(session).leased_by) == ('running', 'a')
+
+
+def test_an_expired_lease_is_reclaimed_and_only_the_new_holder_finishes(session):
+    ran = []
+    handlers = {'kind': lambda claimed: ran.append(claimed.attempts)}
+    a = _scheduler(session, 'a', handlers, lease=timedelta(milliseconds=10))
+    b = _scheduler(session, 'b', handlers)
+    a.plan([('kind', 'k', datetime.utcnow() - timedelta(seconds=1))])
+    [stale] = a._claim(1)
+    time.sleep(0.05) # a's lease runs out, as if its process died
+
+    [claimed] = b._claim(1)
+    assert (claimed.attempts, _row(session).leased_by) == (2, 'b')
+
+    a._run(stale) # a comes back late; its outcome is not recorded
+    assert _row(session).status == 'running'
+    b._run(claimed)
+    assert (_row(session).status, _row(session).attempts) == ('done', 0)
+    assert ran == [1, 2]
+
+
+def test_replanning_follows_a_moved_pending_job_but_not_a_rescheduled_one(session):
+    scheduler = _scheduler(session, 'a', {'kind': lambda claimed: Reschedule(datetime(2030, 1, 1), {"polls": 1})})
+    scheduler.plan([('kind', 'k', datetime(2029, 1, 1))])
+    assert scheduler.plan([('kind', 'k', datetime(2029, 2, 1))]) == 1
+    assert _row(session).run_at == datetime(2029, 2, 1)
+
+    scheduler.plan([('kind', 'k', datetime.utcnow() - timedelta(seconds=1))])
+    scheduler.tick()
+    scheduler.plan([('kind', 'k', datetime(2029, 3, 1))])
+
+    row = _row(session)
+    assert (row.status, row.run_at, row.state) == ('pending', datetime(2030, 1, 1), '{"polls": 1}')
+
+
+def test_replanning_a_finished_job_for_later_rearms_it(session):
+    def fail(claimed):
+        raise RuntimeError("API down")
+    scheduler = _scheduler(session, 'a', {'kind': lambda claimed: None, 'other': fail}, max_attempts=1)
+    due = datetime.utcnow() - timedelta(seconds=1)
+    scheduler.plan([('kind', 'k', due), ('other', 'f', due)])
+    scheduler.tick()
+    assert (_row(session).status, _row(session, 'f').status) == ('done', 'failed')
+
+    # The planner runs again with the same times: nothing changes
+    assert scheduler.plan([('kind', 'k', due), ('other', 'f', due)]) == 0
+
+    later = datetime.utcnow() + timedelta(days=7)
+    assert scheduler.plan([('kind', 'k', later), ('other', 'f', later)]) == 2
+    for key in ('k', 'f'):
+        row = _row(session, key)
+        assert (row.status, row.run_at, row.attempts, row.last_error) == ('pending', later, 0, None)
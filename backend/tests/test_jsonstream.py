@@ -0,0 +1,67 @@
+import io
+import json
+import os
+
+import pytest
+
+from jsonstream import FIELD, ITEM, expand_paths, iter_members
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PAYLOAD = {
+    "year": "2026",
+    "leaderboard": [
+        {"playerId": "1", "earnings": 3600000, "share": 0.18, "tied": False, "name": "A \"quoted\" name"},
+        {"playerId": "2", "earnings": 2.16e6, "share": -1.5e-3, "tied": True, "name": "Ünïcödé , ] }"},
+        [], {}, None, 12345678901234567890,
+    ],
+    "tournId": "007",
+    "schedule": {"not": "an array"},
+}
+
+
+def _members(text, chunk_size):
+    return list(iter_members(io.StringIO(text), {'leaderboard', 'schedule'}, chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 1 << 16])
+def test_matches_json_loads_at_any_chunk_size(chunk_size):
+    # Small chunks split strings, escapes and numbers across reads
+    members = _members(json.dumps(PAYLOAD, indent=1), chunk_size)
+
+    assert [value for kind, key, value in members if kind == ITEM] == PAYLOAD["leaderboard"]
+    assert [(key, value) for kind, key, value in members if kind == FIELD] == [
+        ("year", "2026"), ("tournId", "007"), ("schedule", {"not": "an array"})]
+    assert [key for _, key, _ in members] == ["year"] + ["leaderboard"] * 6 + ["tournId", "schedule"]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('{}', []),
+    ('{"leaderboard": []}', []),
+    (' { "leaderboard" : [ 1 , 2.5e3 ] } ', [(ITEM, "leaderboard", 1), (ITEM, "leaderboard", 2500.0)]),
+])
+def test_edge_cases(text, expected):
+    assert _members(text, 1) == expected
+
+
+@pytest.mark.parametrize('text', ['', '[]', '{"leaderboard": [1, 2}', '{"year": 2026', '{"year" 2026}'])
+def test_malformed_input_raises(text):
+    with pytest.raises(json.JSONDecodeError):
+        _members(text, 2)
+
+
+def test_expand_paths(tmp_path):
+    root = tmp_path / 'data'
+    root.mkdir()
+    (root / 'a.txt').write_text('{"schedule": []}')
+    (root / 'b.json').write_text('{"leaderboard": []}')
+    (root / 'notes.txt').write_text('not json')
+    (tmp_path / 'outside.txt').write_text('{}')
+
+    assert expand_paths('.', str(root)) == [str(root / 'a.txt'), str(root / 'b.json')]
+    assert expand_paths('*.txt', str(root)) == [str(root / 'a.txt')]
+    assert expand_paths('notes.txt', str(root)) == [str(root / 'notes.txt')] # Named explicitly
+    assert expand_paths('missing.txt', str(root)) == []
+    for spec in ('../outside.txt', '../*.txt'):
+        with pytest.raises(ValueError):
+            expand_paths(spec, str(root))
@@ -0,0 +1,110 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import select
+
+import live
+from app import app, db
+from live import ScoreboardFeed, record_score_changes, scoreboard_event
+from versions import open_versions
+
+
+def _record(session, count):
+    """Stores `count` scoreboard events for alice's T1 picks and returns their ids."""
+    ids = [record_score_changes(session, "T1", {"alice": (i, i + 1)}) for i in range(count)]
+    session.commit()
+    return ids
+
+
+def _feed(session, tmp_path, **options):
+    engine = session.get_bind()
+    versions = open_versions(str(tmp_path / 'data_versions'))
+    return versions, ScoreboardFeed(versions, lambda: engine, poll_interval=0.01, **options)
+
+
+def _next(subscription):
+    return subscription.queue.get(timeout=5)
+
+
+def test_an_event_carries_the_changed_users_and_their_picks(session, season):
+    [event_id] = _record(session, 1)
+
+    [(stored_id, payload)] = live.read_events(session.connection(), 0)
+    event = json.loads(payload)
+    assert stored_id == event_id
+    assert event["tournament_id"] == "T1"
+    [alice] = event["users"]
+    assert (alice["id"], alice["previous_score"], alice["score"]) == ("alice", 0, 1)
+    assert [pick["golfer_id"] for pick in alice["picks"]] == season["picks"]["alice"]["T1"]
+
+
+def test_a_reconnect_replays_what_it_missed_then_follows_new_events(session, season, tmp_path):
+    first, second, third = _record(session, 3)
+    versions, feed = _feed(session, tmp_path)
+
+    subscription = feed.subscribe(last_event_id=first)
+    assert [event_id for event_id, _ in subscription.replay] == [second, third]
+    assert feed.subscribe(last_event_id=third).replay == []
+
+    [fourth] = _record(session, 1)
+    versions.bump('results')
+    assert _next(subscription)[0] == fourth
+    assert subscription.queue.empty() # Replayed events are not sent twice
+
+
+def test_every_subscriber_gets_each_event_once(session, season, tmp_path):
+    versions, feed = _feed(session, tmp_path)
+    subscribers = [feed.subscribe() for _ in range(3)]
+    feed.unsubscribe(subscribers.pop())
+    assert len(feed) == 2
+
+    ids = _record(session, 2)
+    versions.bump('results')
+
+    for subscription in subscribers:
+        assert [_next(subscription)[0] for _ in ids] == ids
+        assert subscription.queue.empty()
+
+
+def test_a_subscriber_that_falls_behind_is_cut_off_alone(session, season, tmp_path):
+    versions, feed = _feed(session, tmp_path, queue_size=2)
+    slow, fast = feed.subscribe(), feed.subscribe()
+
+    first = _record(session, 2)
+    versions.bump('results')
+    assert [_next(fast)[0] for _ in first] == first
+    second = _record(session, 2)
+    versions.bump('results')
+
+    assert [_next(fast)[0] for _ in second] == second
+    assert slow.overflowed and not fast.overflowed
+    assert [slow.queue.get_nowait()[0] for _ in first] == first
+
+
+def test_old_events_are_pruned(session, season, monkeypatch):
+    monkeypatch.setattr(live, 'EVENT_RETENTION', 3)
+
+    ids = _record(session, 5)
+
+    assert session.scalars(select(scoreboard_event.c.id).order_by(scoreboard_event.c.id)).all() == ids[-3:]
+
+
+def test_the_stream_replays_from_last_event_id():
+    with app.app_context():
+        db.create_all()
+        db.session.execute(scoreboard_event.delete())
+        ids = [db.session.execute(scoreboard_event.insert().values(
+            created_at=datetime.utcnow(), tournament_id="T1", payload=json.dumps({"n": n})
+        )).inserted_primary_key[0] for n in range(3)]
+        db.session.commit()
+
+    response = app.test_client().get('/api/live/scoreboard', headers={'Last-Event-ID': str(ids[0])})
+    try:
+        chunks = iter(response.response)
+        assert next(chunks).startswith(b"retry: ")
+        assert [next(chunks) for _ in ids[1:]] == [
+            f"id: {event_id}\nevent: scores\ndata: {json.dumps({'n': n})}\n\n".encode()
+            for n, event_id in enumerate(ids[1:], 1)
+        ]
+    finally:
+        response.close()
@@ -0,0 +1,27 @@
+import logging
+
+import pytest
+
+from app import app, db
+from models import Pick, Tournament, TournamentResult, UserScore
+
+
+@pytest.fixture
+def client():
+    with app.app_context():
+        db.create_all()
+        for model in (UserScore, Pick, TournamentResult, Tournament):
+            db.session.query(model).delete()
+        db.session.commit()
+    return app.test_client()
+
+
+def test_files_that_are_not_schedules_are_skipped_with_a_warning(client, caplog):
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        response = client.post('/api/load-tournaments', json={"path": "*.txt", "events": "all"})
+
+    assert response.status_code == 200
+    skipped = [record.getMessage() for record in caplog.records if record.name == app.logger.name]
+    assert any(message.startswith("Skipping genesis_invitational_2025_earnings.txt: ") for message in skipped)
+    with app.app_context():
+        assert {year for (year,) in db.session.query(Tournament.year).distinct()} == {2025, 2026}
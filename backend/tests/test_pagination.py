@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select
+
+from models import Tournament, User, UserScore
+from pagination import after, before, decode_cursor, encode_cursor, key_values, order_by, parse_limit
+
+SCORE_KEYS = [(UserScore.total_score, True), (UserScore.user_id, False)]
+
+
+@pytest.fixture
+def scores(session):
+    # Many ties, so pages have to break them on user_id
+    rows = [{"user_id": f"u{i:03d}", "total_score": (i * 7) % 5 * 1000} for i in range(97)]
+    session.execute(insert(User), [{"id": row["user_id"]} for row in rows])
+    session.execute(insert(UserScore), rows)
+    session.commit()
+    return sorted(((row["total_score"], row["user_id"]) for row in rows), key=lambda row: (-row[0], row[1]))
+
+
+def _page(session, cursor, limit):
+    query = select(UserScore.total_score, UserScore.user_id).order_by(*order_by(SCORE_KEYS)).limit(limit)
+    if cursor:
+        query = query.where(after(SCORE_KEYS, decode_cursor(cursor, SCORE_KEYS)))
+    rows = session.execute(query).all()
+    return rows, encode_cursor(key_values(rows[-1], SCORE_KEYS)) if len(rows) == limit else None
+
+
+def test_pages_cover_the_list_once_in_order(session, scores):
+    seen, cursor = [], None
+    while True:
+        rows, cursor = _page(session, cursor, 10)
+        seen.extend(tuple(row) for row in rows)
+        if not cursor:
+            break
+    assert seen == scores
+
+
+def test_before_is_the_reverse_of_after(session, scores):
+    middle = scores[40]
+    rows = session.execute(
+        select(UserScore.total_score, UserScore.user_id).where(before(SCORE_KEYS, list(middle)))
+        .order_by(*order_by(SCORE_KEYS))
+    ).all()
+    assert [tuple(row) for row in rows] == scores[:40]
+
+
+def test_cursor_round_trips_datetimes():
+    keys = [(Tournament.submission_end, False), (Tournament.id, False)]
+    values = [datetime(2026, 4, 9, 12, 30), "T1"]
+    assert decode_cursor(encode_cursor(values), keys) == values
+
+
+@pytest.mark.parametrize('token', ["not base64!", encode_cursor([1]), encode_cursor(["100", "u1"])])
+def test_invalid_cursors_are_rejected(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token, SCORE_KEYS)
+
+
+def test_parse_limit():
+    assert parse_limit(None) is None
+    assert parse_limit('25') == 25
+    assert parse_limit('100000') == 1000
+    for value in ('0', 'ten'):
+        with pytest.raises(ValueError):
+            parse_limit(value)
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as app_module
+from app import app, db
+from models import Golfer, Pick, Tournament, TournamentResult, User, UserScore
+
+
+@pytest.fixture
+def client():
+    """The app on a database holding alice's picks in T1, with T2 open for picks."""
+    now = datetime.utcnow()
+    with app.app_context():
+        db.create_all()
+        for model in (UserScore, Pick, TournamentResult, User, Golfer, Tournament):
+            db.session.query(model).delete()
+        db.session.add_all([User(id="alice", displayName="Alice", email="alice@example.com")]
+                           + [Golfer(id=f"G{g}", name=f"Golfer {g}") for g in range(6)]
+                           + [Tournament(id=t, name=f"Tournament {t}", year=now.year,
+                                         submission_start=now + timedelta(days=days - 3),
+                                         submission_end=now + timedelta(days=days))
+                              for t, days in (("T1", 1), ("T2", 8))])
+        db.session.flush()
+        db.session.add_all([Pick(user_id="alice", golfer_id=g, tournament_id="T1", season=now.year)
+                            for g in ("G0", "G1", "G2")])
+        db.session.commit()
+    app_module.used_golfers_cache.clear()
+    return app.test_client()
+
+
+def test_a_pick_that_loses_the_race_is_rejected_by_the_unique_index(client, monkeypatch):
+    # As if a concurrent request committed alice's T1 picks after this one checked
+    monkeypatch.setattr(app_module, 'used_golfers', lambda user_id, season: {})
+
+    response = client.post('/api/picks', json={"user_id": "alice", "tournament_id": "T2",
+                                               "golfer_ids": ["G1", "G3", "G4"]})
+
+    assert response.status_code == 409
+    assert response.get_json()["conflicts"] == [{"golfer_id": "G1", "golfer_name": "Golfer 1", "tournament_id": "T1"}]
+    with app.app_context():
+        assert db.session.query(Pick).filter_by(tournament_id="T2").count() == 0
@@ -0,0 +1,52 @@
+from itertools import combinations, permutations
+
+import numpy as np
+import pytest
+
+from planner import _min_cost_assignment, load_earnings_table, plan_picks
+from projection import PICKS_PER_TOURNAMENT
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_assignment_is_optimal(seed):
+    rng = np.random.default_rng(seed)
+    rows = int(rng.integers(1, 6))
+    cost = rng.integers(-50, 50, size=(rows, int(rng.integers(rows, 8)))).astype(float)
+
+    assignment = _min_cost_assignment(cost)
+
+    assert len(set(assignment.tolist())) == rows
+    best = min(sum(cost[r, c] for r, c in enumerate(columns)) for columns in permutations(range(cost.shape[1]), rows))
+    assert cost[np.arange(rows), assignment].sum() == best
+
+
+def test_plan_respects_one_and_done(session, season):
+    table = load_earnings_table(session, simulations=200)
+    picks = [(g, t) for t, golfer_ids in season["picks"]["bob"].items() for g in golfer_ids]
+
+    plan = plan_picks(table, picks, season["now"])
+
+    assert [t["id"] for t in plan["tournaments"]] == ["T3", "T4"]
+    assert all(len(t["golfers"]) == PICKS_PER_TOURNAMENT for t in plan["tournaments"])
+    planned = [g["id"] for t in plan["tournaments"] for g in t["golfers"]]
+    assert len(planned) == len(set(planned))
+    # Bob's T1 golfers are used up; his open T3 picks may be planned again
+    assert not set(planned) & {"G6", "G7", "G8"}
+    assert plan["expected_earnings"] == sum(t["expected_earnings"] for t in plan["tournaments"])
+
+
+def test_plan_is_the_best_for_the_table(session, season):
+    table = load_earnings_table(session, simulations=200)
+
+    plan = plan_picks(table, [], season["now"])
+
+    column = {golfer_id: g for g, (golfer_id, _) in enumerate(table.golfers)}
+    rows = table.open_rows(season["now"])
+    best = max(
+        table.earnings[rows[0], list(first)].sum() + table.earnings[rows[1], list(second)].sum()
+        for first in combinations(range(len(table.golfers)), PICKS_PER_TOURNAMENT)
+        for second in combinations(sorted(set(range(len(table.golfers))) - set(first)), PICKS_PER_TOURNAMENT)
+    )
+    planned = sum(table.earnings[rows[e], column[g["id"]]] for e, t in enumerate(plan["tournaments"])
+                  for g in t["golfers"])
+    assert planned == pytest.approx(best)
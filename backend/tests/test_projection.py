@@ -0,0 +1,24 @@
+from sqlalchemy import insert
+
+from models import Pick
+from projection import project_standings
+
+
+def test_win_probabilities_add_up_to_one(session, season):
+    projection = project_standings(session, simulations=2000, rank_simulations=200)
+
+    assert [t["id"] for t in projection["remaining_tournaments"]] == ["T3", "T4"]
+    assert {row["id"] for row in projection["users"]} == {"alice", "bob", "carol", "dave"}
+    assert abs(sum(row["win_probability"] for row in projection["users"]) - 1) < 1e-6
+    assert projection == project_standings(session, simulations=2000, rank_simulations=200)
+
+
+def test_picks_of_unknown_users_are_ignored(session, season):
+    # submit_picks doesn't check that the user exists
+    session.execute(insert(Pick), [{"user_id": "ghost", "tournament_id": t, "season": season["now"].year, "golfer_id": g}
+                                   for t, g in (("T1", "G9"), ("T3", "G10"))])
+    session.commit()
+
+    projection = project_standings(session, simulations=500, rank_simulations=100)
+
+    assert "ghost" not in {row["id"] for row in projection["users"]}
@@ -0,0 +1,91 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+import app as app_module
+from app import app, data_versions, db, job_scheduler, projection_store
+from jobs import job
+from models import Golfer, Pick, Tournament, TournamentResult, User, UserScore, tournament_golfers
+from scoring import rebuild_user_scores
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """The app on a database with one scored and one remaining tournament, and no projection stored yet."""
+    monkeypatch.setattr(app_module, 'PROJECTION_SIMULATIONS', 200)
+    monkeypatch.setattr(app_module, 'PROJECTION_RANK_SIMULATIONS', 20)
+    now = datetime.utcnow()
+    golfers = [f"G{g}" for g in range(6)]
+    with app.app_context():
+        db.create_all()
+        db.session.execute(delete(tournament_golfers))
+        db.session.execute(delete(job))
+        for model in (UserScore, Pick, TournamentResult, User, Golfer, Tournament):
+            db.session.query(model).delete()
+        db.session.execute(insert(Golfer), [{"id": g, "name": f"Golfer {g}"} for g in golfers])
+        db.session.add_all([User(id=u, displayName=u, email=f"{u}@example.com") for u in ("alice", "bob")])
+        db.session.execute(insert(Tournament), [{
+            "id": t, "name": f"Tournament {t}", "year": now.year, "winners_share": 3_600_000,
+            "submission_start": now + timedelta(days=days - 3), "submission_end": now + timedelta(days=days),
+        } for t, days in (("T1", -10), ("T2", 2))])
+        db.session.execute(insert(tournament_golfers), [{"tournament_id": t, "golfer_id": g}
+                                                        for t in ("T1", "T2") for g in golfers])
+        db.session.execute(insert(TournamentResult), [{"tournament_id": "T1", "golfer_id": g,
+                                                       "earnings": 1_000_000 // (i + 1)}
+                                                      for i, g in enumerate(golfers)])
+        db.session.execute(insert(Pick), [{"user_id": u, "tournament_id": "T1", "season": now.year, "golfer_id": g}
+                                          for u, picked in (("alice", golfers[:3]), ("bob", golfers[3:]))
+                                          for g in picked])
+        rebuild_user_scores(db.session)
+        db.session.commit()
+    data_versions.bump('results')
+    if os.path.exists(projection_store.path):
+        os.remove(projection_store.path)
+    app_module.projection_requests.clear()
+    return app.test_client()
+
+
+def _planned():
+    with app.app_context():
+        return db.session.execute(select(job.c.status).where(job.c.kind == 'project_standings')).scalars().all()
+
+
+def _run_job():
+    [claimed] = job_scheduler._claim(1)
+    job_scheduler._run(claimed)
+
+
+def test_requests_serve_the_run_the_job_stored(client):
+    pending = client.get('/api/projection')
+    assert pending.status_code == 503
+    assert pending.headers['Retry-After']
+    assert _planned() == ['pending']
+
+    _run_job()
+
+    response = client.get('/api/projection')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["up_to_date"] is True
+    assert [row["id"] for row in body["users"]] == ["alice", "bob"]
+    assert client.get('/api/projection', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert _planned() == ['done']
+
+
+def test_a_results_write_serves_the_old_run_until_the_job_reruns(client):
+    client.get('/api/projection')
+    _run_job()
+    current = client.get('/api/projection')
+
+    data_versions.bump('results')
+    stale = client.get('/api/projection', headers={'If-None-Match': current.headers['ETag']})
+
+    assert stale.status_code == 200
+    assert stale.get_json()["up_to_date"] is False
+    assert stale.get_json()["users"] == current.get_json()["users"]
+    assert _planned() == ['pending']
+
+    _run_job()
+    assert client.get('/api/projection').get_json()["up_to_date"] is True
@@ -0,0 +1,29 @@
+import pytest
+
+from app import _hot_query_plans, _query_plan, app, db
+from migrations import upgrade
+
+HOT_QUERIES = _hot_query_plans()
+# The tables of the original schema, which had no indexes; later tables are created with theirs
+ORIGINAL_TABLES = ('user', 'golfer', 'tournament', 'tournament_golfers', 'pick', 'tournament_result')
+
+
+@pytest.fixture(scope='module')
+def upgraded_db():
+    """The app database with the original tables' indexes dropped, then upgraded through every migration."""
+    with app.app_context():
+        db.create_all()
+        indexes = db.session.execute(db.text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN "
+            f"({', '.join(repr(table) for table in ORIGINAL_TABLES)})")).scalars().all()
+        for name in indexes:
+            db.session.execute(db.text(f"DROP INDEX {name}"))
+        db.session.execute(db.text("DROP TABLE IF EXISTS schema_version"))
+        db.session.commit()
+        upgrade(db.session)
+        yield
+
+
+@pytest.mark.parametrize('name, stmt, index_name', HOT_QUERIES, ids=[name for name, _, _ in HOT_QUERIES])
+def test_hot_query_uses_index(upgraded_db, name, stmt, index_name):
+    assert index_name in _query_plan(stmt)
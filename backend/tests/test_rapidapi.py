@@ -0,0 +1,81 @@
+import os
+
+import pytest
+import requests
+
+from rapidapi import RapidAPIClient, RapidAPINotConfigured, ReplayMiss
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _client(stub, tmp_path, **options):
+    return RapidAPIClient(key='stub', host='stub', base_url=stub.base_url, cache_dir=str(tmp_path / 'cache'),
+                          **options)
+
+
+def _calls(stub, endpoint):
+    return stub.requests_by_path.get(f'/{endpoint}', 0)
+
+
+def test_fetches_through_the_api_then_serves_the_cache(rapidapi_stub, tmp_path):
+    with _client(rapidapi_stub, tmp_path) as client:
+        first = client.earnings('016', 2026)
+        again = client.earnings('016', 2026)
+        other_season = client.earnings('016', 2025)
+
+    assert (first['tournId'], first['year']) == ('016', '2026')
+    assert again == first
+    assert other_season['year'] == '2025'
+    assert _calls(rapidapi_stub, 'earnings') == 2
+
+
+def test_expired_or_bypassed_cache_entries_are_fetched_again(rapidapi_stub, tmp_path):
+    with _client(rapidapi_stub, tmp_path, ttls={'earnings': 0}) as client:
+        client.earnings('016', 2026)
+        client.earnings('016', 2026)
+        client.tournament('528', 2025)
+        client.tournament('528', 2025, use_cache=False)
+
+    assert (_calls(rapidapi_stub, 'earnings'), _calls(rapidapi_stub, 'tournament')) == (2, 2)
+
+
+def test_replay_serves_the_cache_at_any_age_and_fixture_files(rapidapi_stub, tmp_path):
+    with _client(rapidapi_stub, tmp_path) as live:
+        live.earnings('016', 2026)
+    replay = RapidAPIClient(mode='replay', cache_dir=str(tmp_path / 'cache'), fixtures_dir=backend_dir,
+                            ttls={'earnings': 0})
+
+    assert replay.earnings('016', 2026)['tournId'] == '016'
+    assert replay.earnings('007', 2025)['leaderboard'][0]['playerId'] == '52955'
+    assert replay.tournament('528', 2025)['players']
+    with pytest.raises(ReplayMiss):
+        replay.earnings('999', 2025)
+    assert _calls(rapidapi_stub, 'earnings') == 1
+
+
+def test_an_unconfigured_client_makes_no_calls():
+    client = RapidAPIClient(cache_dir=None)
+
+    assert not client.configured
+    with pytest.raises(RapidAPINotConfigured):
+        client.schedule(2026)
+
+
+def test_failures_are_retried_then_raised_and_not_cached(rapidapi_stub, tmp_path):
+    rapidapi_stub.fail_rate = 1.0 # Every call answers 429 or 503
+    with _client(rapidapi_stub, tmp_path, retries=2, backoff_factor=0) as client:
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.earnings('016', 2026)
+        assert _calls(rapidapi_stub, 'earnings') == 3
+
+        rapidapi_stub.fail_rate = 0.0
+        assert client.earnings('016', 2026)['tournId'] == '016'
+        assert _calls(rapidapi_stub, 'earnings') == 4
+
+
+def test_client_errors_are_not_retried(rapidapi_stub, tmp_path):
+    with _client(rapidapi_stub, tmp_path) as client:
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.schedule(1999) # The stub has no schedule file for it
+
+    assert _calls(rapidapi_stub, 'schedule') == 1
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+from sqlalchemy import insert, select
+
+from models import Pick, Tournament, User
+from schedule import (
+    EventSelector,
+    find_tournament_id,
+    read_schedule_events,
+    season_tournament_id,
+    tournament_rows,
+    upsert_tournaments,
+)
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _rows(filename):
+    year, events = read_schedule_events(os.path.join(backend_dir, filename), EventSelector('all'))
+    return tournament_rows(year, events)
+
+
+def _stored(session):
+    return {(t.tourn_id, t.year): (t.id, t.submission_start, t.submission_end)
+            for t in session.scalars(select(Tournament))}
+
+
+@pytest.mark.parametrize("order", [("schedule_2025.txt", "schedule_2026.txt"),
+                                   ("schedule_2026.txt", "schedule_2025.txt")])
+def test_seasons_are_stored_side_by_side(session, order):
+    first, second = (_rows(filename) for filename in order)
+    upsert_tournaments(session, first)
+    session.commit()
+    before = _stored(session)
+
+    inserted, updated = upsert_tournaments(session, second)
+    session.commit()
+
+    shared = {row['tourn_id'] for row in first} & {row['tourn_id'] for row in second}
+    assert shared
+    assert (inserted, updated) == (len(second), 0)
+    after = _stored(session)
+    assert {key: after[key] for key in before} == before
+    for tourn_id in shared:
+        assert after[tourn_id, 2025][0] == season_tournament_id(tourn_id, 2025)
+        assert after[tourn_id, 2026][0] == season_tournament_id(tourn_id, 2026)
+
+
+def test_reloading_a_season_updates_it_in_place(session):
+    rows = _rows('schedule_2026.txt')
+    upsert_tournaments(session, rows)
+    session.commit()
+
+    changed = [{**rows[0], 'name': 'Renamed'}] + rows[1:]
+    assert upsert_tournaments(session, changed) == (0, 1)
+    session.commit()
+
+    assert session.get(Tournament, season_tournament_id(rows[0]['tourn_id'], 2026)).name == 'Renamed'
+
+
+def test_new_season_leaves_picks_on_the_old_one(session):
+    upsert_tournaments(session, _rows('schedule_2025.txt'))
+    session.commit()
+    tournament_id = find_tournament_id(session, '007', 2025)
+    session.execute(insert(User), [{"id": "alice", "displayName": "alice", "email": "alice@example.com"}])
+    session.execute(insert(Pick), [{"user_id": "alice", "tournament_id": tournament_id, "season": 2025,
+                                    "golfer_id": "G1"}])
+    session.commit()
+
+    upsert_tournaments(session, _rows('schedule_2026.txt'))
+    session.commit()
+
+    assert session.get(Tournament, tournament_id).year == 2025
+    assert find_tournament_id(session, '007') == find_tournament_id(session, '007', 2026) != tournament_id
+    # The same golfer may be picked again in the new season
+    session.execute(insert(Pick), [{"user_id": "alice", "tournament_id": find_tournament_id(session, '007', 2026),
+                                    "season": 2026, "golfer_id": "G1"}])
+    session.commit()
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, insert, select
+
+import update_earnings
+from jobs import job
+from models import Tournament, TournamentResult
+from versions import open_versions
+
+
+@pytest.fixture
+def env(session, rapidapi_stub, monkeypatch, tmp_path):
+    """update_earnings.py pointed at the test database and the RapidAPI stub."""
+    monkeypatch.setenv('DATABASE_URL', session.get_bind().url.render_as_string(hide_password=False))
+    monkeypatch.setenv('DATA_VERSIONS_FILE', str(tmp_path / 'data_versions'))
+    monkeypatch.setenv('RAPIDAPI_BASE_URL', rapidapi_stub.base_url)
+    monkeypatch.setenv('RAPIDAPI_KEY', 'stub')
+    monkeypatch.setenv('RAPIDAPI_HOST', 'stub')
+    monkeypatch.setenv('RAPIDAPI_CACHE_DIR', '')
+    now = datetime.utcnow()
+    session.execute(insert(Tournament), [
+        {"id": t, "tourn_id": "007", "name": f"Tournament {t}", "year": year,
+         "submission_start": now - timedelta(days=days + 3), "submission_end": now - timedelta(days=days)}
+        for t, year, days in (("2025-007", 2025, 365), ("T-ended", now.year, 2))
+    ])
+    session.commit()
+    return rapidapi_stub
+
+
+def _results(session, tournament_id):
+    session.rollback() # See the script's commits
+    return session.scalar(select(func.count()).select_from(TournamentResult)
+                          .where(TournamentResult.tournament_id == tournament_id))
+
+
+def _earnings_requests(stub):
+    return stub.requests_by_path.get('/earnings', 0)
+
+
+def test_partial_results_are_completed_and_versions_bumped_once(session, env):
+    session.execute(insert(TournamentResult), [
+        {"tournament_id": "T-ended", "golfer_id": "52955", "earnings": 1},
+        # Last season's edition of the event, which doesn't count for this one
+        {"tournament_id": "2025-007", "golfer_id": "52955", "earnings": 4_000_000},
+    ])
+    session.commit()
+    versions = open_versions()
+    before, _ = versions.get('results')
+
+    update_earnings.update_recent_tournament_earnings(lookback_days=7)
+
+    assert _earnings_requests(env) == 1
+    assert _results(session, "T-ended") == len(env.earnings['leaderboard'])
+    assert _results(session, "2025-007") == 1
+    assert versions.get('results')[0] == before + 1
+
+
+def test_results_the_poll_saw_settle_are_not_fetched_again(session, env):
+    session.execute(insert(TournamentResult), [{"tournament_id": "T-ended", "golfer_id": "52955", "earnings": 1}])
+    session.execute(insert(job), [{"kind": "poll_earnings", "key": "T-ended", "status": "done",
+                                   "run_at": datetime.utcnow(), "attempts": 0, "updated_at": datetime.utcnow()}])
+    session.commit()
+
+    update_earnings.update_recent_tournament_earnings(lookback_days=7)
+    assert _earnings_requests(env) == 0
+
+    update_earnings.update_recent_tournament_earnings(lookback_days=7, force=True)
+    assert _earnings_requests(env) == 1
+
+
+def test_a_backfill_skips_only_old_tournaments_with_results(session, env):
+    session.execute(insert(TournamentResult), [{"tournament_id": "2025-007", "golfer_id": "52955", "earnings": 1}])
+    session.commit()
+
+    update_earnings.update_recent_tournament_earnings(season=2025)
+    assert _earnings_requests(env) == 0
+
+    session.execute(TournamentResult.__table__.delete())
+    session.commit()
+    update_earnings.update_recent_tournament_earnings(season=2025)
+    assert _earnings_requests(env) == 1
+    assert _results(session, "2025-007") == len(env.earnings['leaderboard'])
+
+
+def test_an_unconfigured_client_is_still_closed(session, env, monkeypatch, capsys):
+    monkeypatch.delenv('RAPIDAPI_KEY')
+    closed = []
+    monkeypatch.setattr(update_earnings.RapidAPIClient, 'close', lambda self: closed.append(self))
+
+    update_earnings.update_recent_tournament_earnings()
+
+    assert "not configured" in capsys.readouterr().out
+    assert len(closed) == 1
+    assert _earnings_requests(env) == 0
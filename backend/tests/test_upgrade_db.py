@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, text
+
+from app import app, db
+from migrations import LATEST_VERSION, DuplicatePicksError, current_version, dedupe_picks, upgrade
+from models import Golfer, Pick, Tournament, TournamentResult, User, UserScore
+
+
+def test_upgrade_db_populates_user_scores():
+    with app.app_context():
+        db.create_all()
+        for model in (UserScore, Pick, TournamentResult, User, Golfer, Tournament):
+            db.session.query(model).delete()
+        # A database from before user_score: picks and results, no stored totals
+        db.session.add_all([
+            User(id="alice", displayName="Alice", email="alice@example.com"),
+            Golfer(id="G1", name="Golfer 1"),
+            Tournament(id="T1", name="Tournament 1", year=2026, submission_start=datetime(2026, 1, 1),
+                       submission_end=datetime(2026, 1, 4)),
+        ])
+        db.session.flush()
+        db.session.add_all([Pick(user_id="alice", golfer_id="G1", tournament_id="T1", season=2026),
+                            TournamentResult(tournament_id="T1", golfer_id="G1", earnings=500000)])
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['upgrade-db'])
+
+    assert result.exit_code == 0, result.output
+    assert "User scores populated for 1 users." in result.output
+    scoreboard = app.test_client().get('/api/scoreboard').get_json()
+    assert [(row["id"], row["score"]) for row in scoreboard] == [("alice", 500000)]
+
+
+def _before_one_and_done(session, picks):
+    """Rolls the schema back to before migration 4, with `picks` as (user, golfer, tournament)."""
+    session.execute(text("DROP INDEX IF EXISTS uq_pick_user_season_golfer"))
+    session.execute(text("DROP INDEX IF EXISTS uq_pick_user_golfer"))
+    session.execute(text("UPDATE schema_version SET version = 3"))
+    session.execute(insert(Pick), [{"user_id": u, "golfer_id": g, "tournament_id": t, "season": 2026}
+                                   for u, g, t in picks])
+    session.commit()
+
+
+def _picks(session):
+    return session.execute(text("SELECT user_id, golfer_id, tournament_id FROM pick ORDER BY id")).all()
+
+
+def test_migration_refuses_to_delete_duplicate_picks(session):
+    picks = [("alice", "G1", "T1"), ("alice", "G1", "T2"), ("alice", "G2", "T2"), ("bob", "G1", "T1")]
+    _before_one_and_done(session, picks)
+
+    with pytest.raises(DuplicatePicksError, match="1 golfer.*: alice picked G1 in T1, T2\\."):
+        upgrade(session)
+    session.rollback()
+
+    assert _picks(session) == picks
+    assert current_version(session) == 3
+
+
+def test_dedupe_picks_keeps_the_earliest_use(session):
+    _before_one_and_done(session, [("alice", "G1", "T1"), ("alice", "G1", "T2"), ("alice", "G2", "T2")])
+
+    assert dedupe_picks(session) == 1
+    session.commit()
+    upgrade(session)
+
+    assert _picks(session) == [("alice", "G1", "T1"), ("alice", "G2", "T2")]
+    assert current_version(session) == LATEST_VERSION
+
+
+def test_upgrade_db_dedupes_picks_only_when_asked():
+    with app.app_context():
+        db.create_all()
+        for model in (UserScore, Pick, TournamentResult, User, Golfer, Tournament):
+            db.session.query(model).delete()
+        db.session.commit()
+        _before_one_and_done(db.session, [("alice", "G1", "T1"), ("alice", "G1", "T2")])
+
+    result = app.test_cli_runner().invoke(args=['upgrade-db'])
+    assert result.exit_code == 1
+    assert "alice picked G1 in T1, T2" in result.output
+
+    result = app.test_cli_runner().invoke(args=['upgrade-db', '--dedupe-picks'])
+    assert result.exit_code == 0, result.output
+    assert "Deleted 1 duplicate pick(s)." in result.output
+    with app.app_context():
+        assert _picks(db.session) == [("alice", "G1", "T1")]
+        assert current_version(db.session) == LATEST_VERSION
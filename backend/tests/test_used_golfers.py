@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, insert
+
+import app as app_module
+from app import app, data_versions, db
+from models import Golfer, Pick, Tournament, TournamentResult, User, UserScore, tournament_golfers
+
+
+@pytest.fixture
+def client():
+    """Alice's picks: G0-G2 in T1 and G3 in T2 this season, G4 in T0 last season. T2's field is stored."""
+    now = datetime.utcnow()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(delete(tournament_golfers))
+        for model in (UserScore, Pick, TournamentResult, User, Golfer, Tournament):
+            db.session.query(model).delete()
+        db.session.add_all([User(id="alice", displayName="Alice", email="alice@example.com")]
+                           + [Golfer(id=f"G{g}", name=f"Golfer {g}") for g in range(6)])
+        db.session.execute(insert(Tournament), [{
+            "id": t, "name": f"Tournament {t}", "year": year, "golfers_last_updated": now,
+            "submission_start": now + timedelta(days=days - 3), "submission_end": now + timedelta(days=days),
+        } for t, year, days in (("T0", now.year - 1, -300), ("T1", now.year, 1), ("T2", now.year, 8))])
+        db.session.execute(insert(tournament_golfers), [{"tournament_id": "T2", "golfer_id": f"G{g}"}
+                                                        for g in range(6)])
+        db.session.execute(insert(TournamentResult), [{"tournament_id": "T0", "golfer_id": "G4", "earnings": 1000}])
+        db.session.execute(insert(Pick), [{"user_id": "alice", "tournament_id": t, "season": year, "golfer_id": g}
+                                          for t, year, golfers in (("T0", now.year - 1, ["G4"]),
+                                                                   ("T1", now.year, ["G0", "G1", "G2"]),
+                                                                   ("T2", now.year, ["G3"]))
+                                          for g in golfers])
+        db.session.commit()
+    data_versions.bump('tournaments', 'picks', 'fields')
+    for cache in (app_module.used_golfers_cache, app_module.tournament_seasons,
+                  app_module.season_in_play_cache, app_module.golfer_field_cache):
+        cache.clear()
+    return app.test_client()
+
+
+def _get(client, url):
+    response = client.get(url)
+    body = response.get_json()
+    response.close()
+    return response.status_code, body
+
+
+def _by_golfer(rows, *keys):
+    return {row["golfer_id"]: tuple(row[key] for key in keys) for row in rows}
+
+
+def test_a_tournament_lists_the_whole_season_and_what_it_may_keep(client):
+    status, rows = _get(client, '/api/users/alice/used-golfers?tournament_id=T1')
+
+    assert status == 200
+    assert _by_golfer(rows, "tournament_id", "available") == {
+        "G0": ("T1", True), "G1": ("T1", True), "G2": ("T1", True), "G3": ("T2", False),
+    }
+
+
+def test_without_a_tournament_the_season_is_chosen(client):
+    this_season = _by_golfer(_get(client, '/api/users/alice/used-golfers')[1], "tournament_id")
+    last_season = _get(client, f'/api/users/alice/used-golfers?season={datetime.utcnow().year - 1}')[1]
+
+    assert this_season == {"G0": ("T1",), "G1": ("T1",), "G2": ("T1",), "G3": ("T2",)}
+    assert last_season == [{"golfer_id": "G4", "golfer_name": "Golfer 4", "tournament_id": "T0"}]
+
+
+def test_unknown_users_and_tournaments_are_not_found(client):
+    assert _get(client, '/api/users/nobody/used-golfers')[0] == 404
+    assert _get(client, '/api/users/alice/used-golfers?tournament_id=nope')[0] == 404
+    assert _get(client, '/api/users/alice/used-golfers?season=last')[0] == 400
+
+
+def test_the_field_flags_golfers_used_earlier_in_the_season(client):
+    status, field = _get(client, '/api/tournaments/T2/golfers?user_id=alice')
+
+    assert status == 200
+    assert {golfer["id"]: golfer["available"] for golfer in field} == {
+        "G0": False, "G1": False, "G2": False, # Picked for T1
+        "G3": True, # Picked for T2 itself
+        "G4": True, # Picked last season
+        "G5": True,
+    }
+    assert all("available" not in golfer for golfer in _get(client, '/api/tournaments/T2/golfers')[1])
@@ -1,70 +1,95 @@
+import argparse
 import os
 import sys
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, Column, String, Integer, DateTime, ForeignKey
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 
+from database import create_engine
+from earnings_archive import open_earnings_archive
+from rapidapi import RapidAPIClient
+from ingest import upsert_tournament_results
+from jobs import job
+from live import record_score_changes
+from metrics import begin_scope, open_metrics_store
+from models import Tournament, TournamentResult # The app's own models, without Flask
+from scoring import refresh_scores_for_tournament
+from versions import open_versions
+
 # --- Setup Project Path ---
 # This allows the script to be run from anywhere and still find the DB
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(project_root)
 
-# --- Database Model Definitions ---
-# We need to redefine the models here so the script is self-contained
-Base = declarative_base()
-
-class Tournament(Base):
-    __tablename__ = 'tournament'
-    id = Column(String, primary_key=True)
-    name = Column(String, nullable=False)
-    year = Column(Integer, nullable=False)
-    submission_start = Column(DateTime, nullable=False)
-    submission_end = Column(DateTime, nullable=False)
-
-class TournamentResult(Base):
-    __tablename__ = 'tournament_result'
-    id = Column(Integer, primary_key=True)
-    tournament_id = Column(String, ForeignKey('tournament.id'), nullable=False) # Not linking to Golfer table to keep script simple
-    golfer_id = Column(String, nullable=False) 
-    earnings = Column(Integer)
+# --- Load Environment Variables ---
+# Before the defaults below read them
+load_dotenv()
+
+# --- Configuration ---
+DEFAULT_LOOKBACK_DAYS = int(os.getenv('EARNINGS_LOOKBACK_DAYS', 7))
+DEFAULT_WORKERS = int(os.getenv('EARNINGS_FETCH_WORKERS', 8))
+# Past the app's polling window (4 days' delay plus 10 days), stored results are taken as final
+RESULTS_FINAL_AFTER = timedelta(days=int(os.getenv('EARNINGS_FINAL_DAYS', 14)))
+
+def final_results(session, tournaments, now):
+    """Ids of the tournaments among `tournaments` whose stored results are final.
+
+    Results are final once the app's earnings poll for that tournament has seen
+    the leaderboard settle, or once the tournament ended RESULTS_FINAL_AFTER ago.
+    Ids are per season, so another season's results never count.
+    """
+    ids = [t.id for t in tournaments]
+    loaded = set(session.scalars(
+        select(TournamentResult.tournament_id).where(TournamentResult.tournament_id.in_(ids)).distinct()))
+    settled = set(session.scalars(select(job.c.key).where(
+        job.c.kind == 'poll_earnings', job.c.status == 'done', job.c.key.in_(ids))))
+    cutoff = now.replace(tzinfo=None) - RESULTS_FINAL_AFTER
+    return {t.id for t in tournaments if t.id in loaded and (t.id in settled or t.submission_end < cutoff)}
 
 # --- Main Script Logic ---
-def update_recent_tournament_earnings():
+def update_recent_tournament_earnings(lookback_days=DEFAULT_LOOKBACK_DAYS, season=None, workers=DEFAULT_WORKERS, force=False):
     """
-    Finds tournaments that ended in the last 7 days, checks if their results
-    have been loaded, and if not, fetches and stores them.
+    Finds tournaments that ended in the last `lookback_days` days (or every
+    ended tournament of `season`), checks if their final results have been
+    loaded, and if not, fetches and stores them.
+
+    Up to `workers` earnings requests are in flight at once through the shared
+    RapidAPI client. Results are written on the calling thread as each fetch
+    completes.
     """
     print(f"--- Script started at {datetime.now(timezone.utc).isoformat()} ---")
 
     # --- Database Connection ---
-    db_path = os.path.join(os.path.dirname(__file__), 'golf_app.db')
-    engine = create_engine(f'sqlite:///{db_path}')
+    begin_scope('update_earnings.py') # Labels this run's queries in the metrics
+    engine = create_engine() # Same DATABASE_URL and engine profile as the app
     Session = sessionmaker(bind=engine)
     session = Session()
 
-    # --- Load Environment Variables ---
-    load_dotenv()
-    rapidapi_key = os.getenv('RAPIDAPI_KEY')
-    rapidapi_host = os.getenv('RAPIDAPI_HOST')
+    # Pool sized so every worker thread gets its own keep-alive connection
+    client = RapidAPIClient.from_env(pool_size=workers)
 
-    if not rapidapi_key or not rapidapi_host:
-        print("Error: RapidAPI key or host not configured in .env file.")
-        return
+    # Shared with the app's workers, so their cached responses get revalidated
+    # and their live scoreboard clients hear about the new results
+    data_versions = open_versions()
 
     try:
+        if not client.configured:
+            print("Error: RapidAPI key or host not configured in .env file.")
+            return
+
         # --- Find Recently Ended Tournaments ---
-        # Consider tournaments that ended up to 7 days ago and before now
-        one_week_ago = datetime.now(timezone.utc) - timedelta(days=7)
         now = datetime.now(timezone.utc)
-
-        recently_ended_tournaments = session.query(Tournament).filter(
-            Tournament.submission_end >= one_week_ago,
-            Tournament.submission_end <= now
-        ).all()
+        query = session.query(Tournament).filter(Tournament.submission_end <= now)
+        if season is not None:
+            query = query.filter(Tournament.year == season)
+        else:
+            query = query.filter(Tournament.submission_end >= now - timedelta(days=lookback_days))
+        recently_ended_tournaments = query.all()
 
         if not recently_ended_tournaments:
             print("No recently ended tournaments found to update.")
@@ -72,76 +97,95 @@ def update_recent_tournament_earnings():
 
         print(f"Found {len(recently_ended_tournaments)} recently ended tournament(s).")
 
-        for t in recently_ended_tournaments:
-            print(f"\nChecking tournament: {t.name} ({t.id})")
+        # --- Check if Final Results Already Exist ---
+        # Partial results, e.g. from a poll before the leaderboard settled, are fetched again
+        if not force:
+            loaded = final_results(session, recently_ended_tournaments, now)
+            for t in recently_ended_tournaments:
+                if t.id in loaded:
+                    print(f"Final results for tournament {t.name} ({t.id}) already exist. Skipping.")
+            recently_ended_tournaments = [t for t in recently_ended_tournaments if t.id not in loaded]
 
-            # --- Check if Results Already Exist ---
-            # Check if any results exist for this tournament
-            result_exists = session.query(TournamentResult).filter_by(tournament_id=t.id).first()
-            if result_exists:
-                print(f"Results for tournament {t.id} already exist. Skipping.")
-                continue
+        if not recently_ended_tournaments:
+            return
 
-            print(f"No results found for {t.id}. Fetching from API...")
+        print(f"Fetching earnings for {len(recently_ended_tournaments)} tournament(s) with {workers} worker(s)...")
 
-            # --- Fetch Earnings from API ---
-            url = f"https://{rapidapi_host}/earnings"
-            headers = {
-                "x-rapidapi-key": rapidapi_key,
-                "x-rapidapi-host": rapidapi_host
+        # --- Fetch Earnings from API ---
+        # Earnings are always fetched fresh here; the cache only records the payloads
+        stored = []
+        with client, ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(client.earnings, t.tourn_id, t.year, use_cache=False): t
+                for t in recently_ended_tournaments
             }
-            params = {
-                "tournId": t.id,
-                "year": str(t.year)
-            }
-
-            try:
-                response = requests.get(url, headers=headers, params=params, timeout=30)
-                response.raise_for_status()
-                data = response.json()
+            for future in as_completed(futures):
+                t = futures[future]
+                try:
+                    data = future.result()
+                except requests.exceptions.RequestException as e:
+                    print(f"Error fetching earnings from external API for tournament {t.id}: {e}")
+                    continue # Move to the next tournament
 
                 if 'leaderboard' not in data or not data['leaderboard']:
                     print(f"Warning: No leaderboard/earnings found for tournament {t.id} from external API.")
                     continue
 
                 # --- Process and Store Results ---
-                updated_count = 0
-                for player_result in data['leaderboard']:
-                    golfer_id = player_result.get('playerId')
-                    earnings = player_result.get('earnings', {}).get('$numberInt')
-
-                    if not golfer_id or earnings is None:
-                        continue
-                    
-                    new_result = TournamentResult(
-                        tournament_id=t.id,
-                        golfer_id=golfer_id,
-                        earnings=int(earnings)
-                    )
-                    session.add(new_result)
-                    updated_count += 1
-                
-                session.commit()
-                print(f"Successfully loaded earnings for {updated_count} golfers for tournament {t.id}.")
-
-            except requests.exceptions.RequestException as e:
-                print(f"Error fetching earnings from external API for tournament {t.id}: {e}")
-                session.rollback()
-                continue # Move to the next tournament
+                try:
+                    updated_count = upsert_tournament_results(session, t.id, data['leaderboard'])
+                    changes = refresh_scores_for_tournament(session, t.id)
+                    record_score_changes(session, t.id, changes) # Pushed to live scoreboard clients
+                    session.commit()
+                    stored.append(t.id)
+                    print(f"Successfully loaded earnings for {updated_count} golfers for tournament {t.id}.")
+                except SQLAlchemyError as e:
+                    print(f"Database error storing earnings for tournament {t.id}: {e}")
+                    session.rollback()
+
+        # One archive refresh and one version bump for the whole run. The bump
+        # revalidates the app's cached responses, golfer statistics included,
+        # and wakes its live scoreboard clients.
+        if stored:
+            try:
+                open_earnings_archive().refresh(session, stored)
+            finally:
+                data_versions.bump('results')
 
     except SQLAlchemyError as e:
         print(f"Database error: {e}")
-        if 'session' in locals() and session.is_active:
+        if session.is_active:
             session.rollback()
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
-        if 'session' in locals() and session.is_active:
+        if session.is_active:
             session.rollback()
     finally:
-        if 'session' in locals():
-            session.close()
+        session.close()
+        client.close()
+        engine.dispose()
+        open_metrics_store().flush() # Counted into the app's /metrics
         print(f"--- Script finished at {datetime.now(timezone.utc).isoformat()} ---")
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch and store earnings for recently ended tournaments.")
+    parser.add_argument('--lookback-days', type=int, default=DEFAULT_LOOKBACK_DAYS,
+                        help=f"how far back to look for ended tournaments (default: {DEFAULT_LOOKBACK_DAYS})")
+    parser.add_argument('--season', type=int,
+                        help="backfill every ended tournament of this year instead of using the lookback window")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"maximum concurrent API requests (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--force', action='store_true',
+                        help="refetch tournaments that already have results")
+    return parser.parse_args(argv)
+
+
 if __name__ == '__main__':
-    update_recent_tournament_earnings()
\ No newline at end of file
+    args = parse_args()
+    update_recent_tournament_earnings(
+        lookback_days=args.lookback_days,
+        season=args.season,
+        workers=max(1, args.workers),
+        force=args.force
+    )
@@ -0,0 +1,104 @@
+"""Shared data version counters behind the ETag and Last-Modified of cached responses."""
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+DOMAINS = ('tournaments', 'fields', 'picks', 'results', 'users')
+
+_MAGIC = b'GOLFVER1'
+_HEADER = struct.Struct('<8s8s') # magic, epoch
+_SLOT = struct.Struct('<QQ') # counter, last modified (unix seconds)
+_FILE_SIZE = 4096 # Room for ~250 domains, so new ones don't change the layout
+
+
+def _slot_offset(domain):
+    return _HEADER.size + DOMAINS.index(domain) * _SLOT.size
+
+
+class DataVersions:
+    """A counter and last-modified time per domain, in a memory-mapped file every process on the host shares.
+
+    The file's random epoch is part of every ETag, so deleting it never makes an
+    old ETag match. If it can't be opened, versions are disabled rather than
+    risk stale 304s.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._map = None
+        self._fd = None
+        try:
+            self._open()
+        except OSError as e:
+            print(f"Warning: data versions disabled, could not open {path}: {e}")
+
+    def _open(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+            try:
+                header = os.pread(fd, _HEADER.size, 0)
+                if len(header) < _HEADER.size or not header.startswith(_MAGIC):
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, _FILE_SIZE)
+                    os.pwrite(fd, _HEADER.pack(_MAGIC, os.urandom(8)), 0)
+                elif os.fstat(fd).st_size < _FILE_SIZE:
+                    os.ftruncate(fd, _FILE_SIZE)
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(fd, _FILE_SIZE)
+        except OSError:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self.epoch = _HEADER.unpack_from(self._map, 0)[1].hex()
+
+    @property
+    def enabled(self):
+        return self._map is not None
+
+    def get(self, domain):
+        """Returns `(counter, last_modified_unix_seconds)` for a domain."""
+        if not self.enabled:
+            return 0, 0
+        return _SLOT.unpack_from(self._map, _slot_offset(domain))
+
+    def bump(self, *domains):
+        """Marks domains as changed. Call after the change is committed."""
+        if not self.enabled or not domains:
+            return
+        now = int(time.time())
+        # The thread lock covers this process; the record lock covers the others
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                for domain in set(domains):
+                    offset = _slot_offset(domain)
+                    counter, _ = _SLOT.unpack_from(self._map, offset)
+                    _SLOT.pack_into(self._map, offset, counter + 1, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    def etag(self, domains):
+        """The (unquoted) entity tag covering `domains`, or None when versions are disabled."""
+        if not self.enabled:
+            return None
+        counters = '.'.join(str(self.get(domain)[0]) for domain in domains)
+        return f"{self.epoch}-{counters}"
+
+    def last_modified(self, domains):
+        if not self.enabled:
+            return None
+        modified = max(self.get(domain)[1] for domain in domains)
+        return datetime.fromtimestamp(modified, tz=timezone.utc) if modified else None
+
+
+def open_versions(path=None):
+    return DataVersions(path or os.getenv('DATA_VERSIONS_FILE', os.path.join(basedir, '.data_versions')))